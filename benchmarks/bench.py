@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+"""
+Benchmark harness for Llama Wrangler's download, hashing and quantize pipeline
+Starts the fake registry, runs each scenario in its own process with an isolated HOME
+(empty blob store and caches) and records wall time, throughput and peak RSS as JSON in
+benchmarks/results/, optionally comparing against an earlier result file
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import resource
+import tempfile
+import subprocess
+from pathlib import Path
+from statistics import median
+from typing import Optional, Dict, Any, List, Tuple
+
+BENCH_DIR = Path(__file__).resolve().parent
+ROOT_DIR = BENCH_DIR.parent
+SCRIPTS_DIR = ROOT_DIR / "scripts"
+RESULTS_DIR = BENCH_DIR / "results"
+
+SCENARIOS = ('ollama', 'hf', 'hash', 'progress', 'quantize')
+REGRESSION_THRESHOLD = 0.10  # Flag changes worse than 10% in --compare
+
+# Direction of "better" for each compared metric
+HIGHER_IS_BETTER = {'rate_mbps': True, 'seconds': False, 'peak_rss_mb': False, 'ns_per_update': False}
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process (ru_maxrss is KB on Linux, bytes on macOS)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def app_version() -> Optional[str]:
+    try:
+        with open(ROOT_DIR / "package.json", 'r') as f:
+            return json.load(f).get('version')
+    except (OSError, ValueError):
+        return None
+
+
+# ---------------------------------------------------------------------------
+# Scenario workers (run in a child process with HOME pointing at a scratch dir)
+# ---------------------------------------------------------------------------
+
+def run_ollama(params: Dict[str, Any], work_dir: Path) -> Dict[str, Any]:
+    from download_ollama import OllamaDownloader
+
+    downloader = OllamaDownloader(connections=params.get('connections'))
+    started = time.perf_counter()
+    path = downloader.download_model('bench/model:latest', str(work_dir))
+    elapsed = time.perf_counter() - started
+    return {'seconds': elapsed, 'bytes': os.path.getsize(path)}
+
+
+def run_hf(params: Dict[str, Any], work_dir: Path) -> Dict[str, Any]:
+    from download_hf import ModelConverter
+
+    # ModelConverter insists on a llama.cpp checkout; downloads never touch it
+    llama_cpp = work_dir / "llama.cpp"
+    llama_cpp.mkdir()
+    (llama_cpp / "convert_hf_to_gguf.py").write_text("")
+
+    converter = ModelConverter(llama_cpp_path=str(llama_cpp), connections=params.get('connections'))
+    started = time.perf_counter()
+    files = converter.check_for_gguf_files('bench/model')
+    if not files:
+        raise Exception("Fake registry returned no GGUF files")
+    first = converter.download_gguf_set('bench/model', files[0], str(work_dir))
+    elapsed = time.perf_counter() - started
+    paths = converter.shard_sets.get(files[0], [files[0]])
+    total = sum(os.path.getsize(work_dir / os.path.basename(p)) for p in paths)
+    return {'seconds': elapsed, 'bytes': total, 'files': len(paths), 'first': os.path.basename(first)}
+
+
+def run_hash(params: Dict[str, Any], work_dir: Path) -> Dict[str, Any]:
+    import hashlib
+    from download_ollama import OllamaDownloader
+
+    size = int(params['hash_mb'] * 1024 * 1024)
+    path = work_dir / "hash.bin"
+    block = os.urandom(1024 * 1024)
+    sha256 = hashlib.sha256()
+    with open(path, 'wb') as f:
+        for chunk in [block] * (size // len(block)) + [block[:size % len(block)]]:
+            f.write(chunk)
+            sha256.update(chunk)
+    expected = f"sha256:{sha256.hexdigest()}"
+
+    # The verify path the app runs on existing downloads; the page cache is warm, so this is CPU-bound
+    downloader = OllamaDownloader()
+    started = time.perf_counter()
+    ok = downloader.verify_download(str(path), expected)
+    elapsed = time.perf_counter() - started
+    if not ok:
+        raise Exception("verify_download rejected a correct digest")
+    return {'seconds': elapsed, 'bytes': size}
+
+
+def run_progress(params: Dict[str, Any], work_dir: Path) -> Dict[str, Any]:
+    from progress import ProgressReporter
+
+    updates = params['progress_updates']
+    total = updates * 64 * 1024
+    reporter = ProgressReporter('download', total=total, name='bench.gguf')
+    started = time.perf_counter_ns()
+    for i in range(1, updates + 1):
+        reporter.update(i * 64 * 1024)
+    elapsed_ns = time.perf_counter_ns() - started
+    reporter.finish()
+    return {'seconds': elapsed_ns / 1e9, 'updates': updates, 'events': reporter.events,
+            'ns_per_update': round(elapsed_ns / updates)}
+
+
+def run_quantize(params: Dict[str, Any], work_dir: Path) -> Dict[str, Any]:
+    from quantize import quantize_fanout, as_targets
+
+    targets = as_targets(params['quantize_targets'])
+    started = time.perf_counter()
+    results = quantize_fanout(params['quantize_source'], targets, str(work_dir / "bench"),
+                              tool=Path(params['quantize_tool']), log=lambda message: None)
+    elapsed = time.perf_counter() - started
+    failed = [r['quantization'] for r in results if not r['success']]
+    if failed:
+        raise Exception(f"Quantization failed for {', '.join(failed)}")
+    return {'seconds': elapsed, 'bytes': os.path.getsize(params['quantize_source']) * len(targets),
+            'targets': {r['quantization']: r['seconds'] for r in results}}
+
+
+WORKERS = {
+    'ollama': run_ollama,
+    'hf': run_hf,
+    'hash': run_hash,
+    'progress': run_progress,
+    'quantize': run_quantize,
+}
+
+
+def worker_main(scenario: str, params_json: str, result_path: str):
+    """Child-process entry: run one scenario and write its measurements to result_path"""
+    sys.path.insert(0, str(SCRIPTS_DIR))
+    work_dir = Path(os.environ['HOME']) / "work"
+    work_dir.mkdir(parents=True, exist_ok=True)
+    os.chdir(work_dir)
+
+    result = WORKERS[scenario](json.loads(params_json), work_dir)
+    result['peak_rss_mb'] = peak_rss_mb()
+    with open(result_path, 'w') as f:
+        json.dump(result, f)
+
+
+# ---------------------------------------------------------------------------
+# Driver
+# ---------------------------------------------------------------------------
+
+def start_registry(args) -> Tuple[subprocess.Popen, str]:
+    cmd = [sys.executable, str(BENCH_DIR / "fake_registry.py"), '--port', '0',
+           '--ollama-gb', str(args.ollama_gb), '--hf-gb', str(args.hf_gb),
+           '--hf-shards', str(args.hf_shards), '--latency-ms', str(args.latency_ms),
+           '--bandwidth-mbps', str(args.bandwidth_mbps)]
+    process = subprocess.Popen(cmd, stdout=subprocess.PIPE, text=True)
+    line = process.stdout.readline()  # Printed once the blob digests are computed
+    if not line.startswith('Fake registry on '):
+        process.kill()
+        raise Exception("Fake registry failed to start")
+    return process, line.split()[-1]
+
+
+def run_scenario(scenario: str, params: Dict[str, Any], endpoint: str, verbose: bool) -> Dict[str, Any]:
+    """Run one scenario in a fresh process with its own HOME; returns its measurements"""
+    home = Path(tempfile.mkdtemp(prefix=f"llw-bench-{scenario}-"))
+    result_path = home / "result.json"
+    env = dict(os.environ, HOME=str(home),
+               HF_ENDPOINT=endpoint, LLAMA_WRANGLER_OLLAMA_REGISTRY=endpoint,
+               LLAMA_WRANGLER_PROGRESS='jsonl')
+    env.pop('HF_TOKEN', None)
+    env.pop('LLAMA_WRANGLER_BANDWIDTH', None)
+    try:
+        completed = subprocess.run(
+            [sys.executable, __file__, '--worker', scenario, json.dumps(params), str(result_path)],
+            env=env, stdout=None if verbose else subprocess.DEVNULL,
+            stderr=None if verbose else subprocess.PIPE, text=True)
+        if completed.returncode != 0:
+            detail = (completed.stderr or '').strip().splitlines()
+            raise Exception(detail[-1] if detail else f"exit code {completed.returncode}")
+        with open(result_path, 'r') as f:
+            return json.load(f)
+    finally:
+        shutil.rmtree(home, ignore_errors=True)
+
+
+def summarise(runs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Median of repeated runs; throughput derived from bytes and wall time"""
+    summary = dict(runs[len(runs) // 2])
+    summary['seconds'] = round(median(r['seconds'] for r in runs), 3)
+    summary['peak_rss_mb'] = max(r['peak_rss_mb'] for r in runs)
+    if 'ns_per_update' in summary:
+        summary['ns_per_update'] = round(median(r['ns_per_update'] for r in runs))
+    if summary.get('bytes') and summary['seconds'] > 0:
+        summary['rate_mbps'] = round(summary['bytes'] / summary['seconds'] / 1e6, 1)
+    summary['runs'] = len(runs)
+    return summary
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any]) -> List[str]:
+    """Print metric deltas against a baseline result; returns the regressions found"""
+    regressions = []
+    print(f"\nCompared with {baseline.get('git_rev') or '?'} ({baseline.get('timestamp', '?')})")
+    knobs = ('ollama_gb', 'hf_gb', 'hf_shards', 'latency_ms', 'bandwidth_mbps', 'connections', 'hash_mb')
+    differing = [k for k in knobs if baseline.get('config', {}).get(k) != current['config'].get(k)]
+    if differing:
+        print(f"  Warning: configs differ ({', '.join(differing)}); deltas are not like for like")
+    for scenario, metrics in current['scenarios'].items():
+        old = baseline.get('scenarios', {}).get(scenario)
+        if not old or 'error' in metrics or 'error' in old:
+            continue
+        for metric, higher_better in HIGHER_IS_BETTER.items():
+            if metric not in metrics or not old.get(metric):
+                continue
+            change = (metrics[metric] - old[metric]) / old[metric]
+            worse = -change if higher_better else change
+            flag = '  REGRESSION' if worse > REGRESSION_THRESHOLD else ''
+            print(f"  {scenario:<9} {metric:<14} {old[metric]:>12} -> {metrics[metric]:>12}  {change:+.1%}{flag}")
+            if flag:
+                regressions.append(f"{scenario}.{metric}")
+    return regressions
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == '--worker':
+        worker_main(*sys.argv[2:5])
+        return
+
+    parser = argparse.ArgumentParser(description="Benchmark Llama Wrangler's download/hash/quantize pipeline")
+    parser.add_argument('scenarios', nargs='*',
+                        help=f"Scenarios to run (default: all that apply): {', '.join(SCENARIOS)}")
+    parser.add_argument('--ollama-gb', type=float, default=2.0)
+    parser.add_argument('--hf-gb', type=float, default=2.0)
+    parser.add_argument('--hf-shards', type=int, default=1)
+    parser.add_argument('--latency-ms', type=float, default=0.0)
+    parser.add_argument('--bandwidth-mbps', type=float, default=0.0, help="Per-connection cap, MB/s")
+    parser.add_argument('--connections', type=int, default=None)
+    parser.add_argument('--hash-mb', type=float, default=1024)
+    parser.add_argument('--progress-updates', type=int, default=200000)
+    parser.add_argument('--quantize-source', help="GGUF to quantize (quantize scenario)")
+    parser.add_argument('--quantize-tool', help="llama-quantize binary (quantize scenario)")
+    parser.add_argument('--quantize-targets', default='Q4_K_M')
+    parser.add_argument('--repeat', type=int, default=1, help="Runs per scenario; the median is kept")
+    parser.add_argument('--compare', help="Earlier result JSON to compare against")
+    parser.add_argument('--output', help="Result file (default: benchmarks/results/<time>-<rev>.json)")
+    parser.add_argument('--verbose', action='store_true', help="Show scenario output")
+    args = parser.parse_args()
+
+    unknown = [s for s in args.scenarios if s not in SCENARIOS]
+    if unknown:
+        print(f"Error: Unknown scenario(s): {', '.join(unknown)}")
+        sys.exit(1)
+    scenarios = args.scenarios or [s for s in SCENARIOS if s != 'quantize' or args.quantize_source]
+    if 'quantize' in scenarios and not (args.quantize_source and args.quantize_tool):
+        print("Error: quantize scenario needs --quantize-source and --quantize-tool")
+        sys.exit(1)
+
+    params = {
+        'connections': args.connections,
+        'hash_mb': args.hash_mb,
+        'progress_updates': args.progress_updates,
+        'quantize_source': args.quantize_source and str(Path(args.quantize_source).resolve()),
+        'quantize_tool': args.quantize_tool and str(Path(args.quantize_tool).resolve()),
+        'quantize_targets': args.quantize_targets,
+    }
+
+    registry, endpoint = None, ''
+    if {'ollama', 'hf'} & set(scenarios):
+        print(f"Starting fake registry ({args.ollama_gb} GB Ollama blob, {args.hf_gb} GB HF GGUF)...", flush=True)
+        registry, endpoint = start_registry(args)
+
+    results: Dict[str, Dict[str, Any]] = {}
+    try:
+        for scenario in scenarios:
+            runs = []
+            try:
+                for _ in range(args.repeat):
+                    runs.append(run_scenario(scenario, params, endpoint, args.verbose))
+                results[scenario] = summarise(runs)
+            except Exception as e:
+                results[scenario] = {'error': str(e)}
+            metrics = results[scenario]
+            if 'error' in metrics:
+                print(f"  {scenario:<9} failed: {metrics['error']}")
+            else:
+                extra = (f"{metrics['ns_per_update']} ns/update" if 'ns_per_update' in metrics
+                         else f"{metrics.get('rate_mbps', 0)} MB/s")
+                print(f"  {scenario:<9} {metrics['seconds']:>8.2f}s  {extra:>16}  peak RSS {metrics['peak_rss_mb']} MB",
+                      flush=True)
+    finally:
+        if registry:
+            registry.terminate()
+            registry.wait()
+
+    report = {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'git_rev': git_revision(),
+        'version': app_version(),
+        'platform': {
+            'system': platform.system(),
+            'release': platform.release(),
+            'machine': platform.machine(),
+            'python': platform.python_version(),
+            'cpu_count': os.cpu_count(),
+        },
+        'config': dict(vars(args), scenarios=scenarios),
+        'scenarios': results,
+    }
+    output = Path(args.output) if args.output else (
+        RESULTS_DIR / f"{time.strftime('%Y%m%d-%H%M%S')}-{report['git_rev'] or 'unknown'}.json")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {output}")
+
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            regressions = compare(report, json.load(f))
+        if regressions:
+            print(f"Regressions: {', '.join(regressions)}")
+            sys.exit(2)
+
+    sys.exit(1 if any('error' in r for r in results.values()) else 0)
+
+
+if __name__ == "__main__":
+    main()
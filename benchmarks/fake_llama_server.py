@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Fake llama-server for Llama Wrangler load tests
+Speaks the OpenAI-compatible endpoints llama-server exposes (/v1/models, /health,
+/v1/chat/completions, /v1/completions) and streams synthetic tokens over SSE with a
+configurable time to first token, per-slot decode rate and parallel slot count
+"""
+
+import sys
+import json
+import time
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any
+
+MODEL_ID = 'fake-model.gguf'
+
+
+class FakeLlama:
+    """Timing model: `slots` requests decode at once (like llama-server -np), the rest queue
+
+    Each active slot beyond the first slows every slot down by `contention`, roughly how
+    batched decoding shares one GPU or CPU.
+    """
+
+    def __init__(self, slots: int = 4, ttft: float = 0.05, tokens_per_sec: float = 50.0,
+                 contention: float = 0.1):
+        self.slots = threading.Semaphore(max(1, slots))
+        self.ttft = ttft
+        self.tokens_per_sec = tokens_per_sec
+        self.contention = contention
+        self.active = 0
+        self.lock = threading.Lock()
+
+    def token_interval(self) -> float:
+        with self.lock:
+            active = max(1, self.active)
+        return (1 + self.contention * (active - 1)) / self.tokens_per_sec
+
+    def generate(self, max_tokens: int):
+        """Yield token texts in real time; blocks while all slots are busy"""
+        with self.slots:
+            with self.lock:
+                self.active += 1
+            try:
+                time.sleep(self.ttft)
+                for i in range(max_tokens):
+                    if i:
+                        time.sleep(self.token_interval())
+                    yield f" tok{i}"
+            finally:
+                with self.lock:
+                    self.active -= 1
+
+
+def make_handler(llama: FakeLlama):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, format, *args):
+            pass
+
+        def send_json(self, status: int, body: Dict[str, Any]):
+            data = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            if self.path == '/health':
+                self.send_json(200, {'status': 'ok'})
+            elif self.path == '/v1/models':
+                self.send_json(200, {'object': 'list', 'data': [{'id': MODEL_ID, 'object': 'model'}]})
+            else:
+                self.send_json(404, {'error': {'message': 'Not found', 'type': 'not_found_error'}})
+
+        def do_POST(self):
+            if self.path not in ('/v1/chat/completions', '/v1/completions'):
+                self.send_json(404, {'error': {'message': 'Not found', 'type': 'not_found_error'}})
+                return
+            try:
+                body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+            except ValueError:
+                self.send_json(400, {'error': {'message': 'Invalid JSON', 'type': 'invalid_request_error'}})
+                return
+
+            chat = self.path == '/v1/chat/completions'
+            max_tokens = int(body.get('max_tokens') or body.get('n_predict') or 16)
+            started = time.perf_counter()
+            if not body.get('stream'):
+                text = ''.join(llama.generate(max_tokens))
+                choice = {'index': 0, 'finish_reason': 'length'}
+                choice.update({'message': {'role': 'assistant', 'content': text}} if chat else {'text': text})
+                self.send_json(200, {'object': 'chat.completion' if chat else 'text_completion', 'model': MODEL_ID,
+                                     'choices': [choice],
+                                     'usage': {'prompt_tokens': 8, 'completion_tokens': max_tokens,
+                                               'total_tokens': 8 + max_tokens}})
+                return
+
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream')
+            self.send_header('Cache-Control', 'no-cache')
+            self.send_header('Connection', 'close')
+            self.end_headers()
+            self.close_connection = True
+            try:
+                first = None
+                for token in llama.generate(max_tokens):
+                    first = first or time.perf_counter()
+                    choice = {'index': 0, 'finish_reason': None}
+                    choice.update({'delta': {'content': token}} if chat else {'text': token})
+                    self.send_event({'object': 'chat.completion.chunk' if chat else 'text_completion',
+                                     'model': MODEL_ID, 'choices': [choice]})
+                decode = time.perf_counter() - (first or started)
+                final = {'index': 0, 'finish_reason': 'length'}
+                final.update({'delta': {}} if chat else {'text': ''})
+                self.send_event({
+                    'object': 'chat.completion.chunk' if chat else 'text_completion', 'model': MODEL_ID,
+                    'choices': [final],
+                    'usage': {'prompt_tokens': 8, 'completion_tokens': max_tokens, 'total_tokens': 8 + max_tokens},
+                    'timings': {'prompt_n': 8, 'predicted_n': max_tokens,
+                                'predicted_per_second': (max_tokens - 1) / decode if decode > 0 else None},
+                })
+                self.wfile.write(b'data: [DONE]\n\n')
+                self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                pass  # Client gave up mid-stream
+
+        def send_event(self, payload: Dict[str, Any]):
+            self.wfile.write(b'data: ' + json.dumps(payload).encode() + b'\n\n')
+            self.wfile.flush()
+
+    return Handler
+
+
+class QuietServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        pass
+
+
+def serve(llama: FakeLlama, port: int = 0) -> QuietServer:
+    """Start the fake server on 127.0.0.1 in a background thread"""
+    server = QuietServer(('127.0.0.1', port), make_handler(llama))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake streaming llama-server for load tests")
+    parser.add_argument('--port', type=int, default=7070)
+    parser.add_argument('--slots', type=int, default=4, help="Requests decoded in parallel")
+    parser.add_argument('--ttft-ms', type=float, default=50.0, help="Delay before the first token")
+    parser.add_argument('--tokens-per-sec', type=float, default=50.0, help="Decode rate of one slot")
+    parser.add_argument('--contention', type=float, default=0.1,
+                        help="Slowdown per extra active slot (0.1 = 10%%)")
+    args = parser.parse_args()
+
+    server = serve(FakeLlama(args.slots, args.ttft_ms / 1000, args.tokens_per_sec, args.contention), args.port)
+    print(f"Fake llama-server on http://127.0.0.1:{server.server_address[1]}", flush=True)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
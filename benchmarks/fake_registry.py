@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Fake Ollama registry and HuggingFace hub for Llama Wrangler benchmarks
+Serves synthetic blobs of any size (generated on the fly, never held in memory) through
+the Ollama /v2 manifest/blob endpoints and the HF api/tree and resolve endpoints, with
+configurable per-request latency and per-connection bandwidth
+"""
+
+import re
+import sys
+import json
+import time
+import random
+import hashlib
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+from urllib.parse import urlparse, unquote
+
+PATTERN_SIZE = 4 * 1024 * 1024  # Blobs repeat a 4MB pseudo-random pattern
+SEND_CHUNK = 256 * 1024
+
+
+class SyntheticBlob:
+    """Deterministic content of a given size; byte i is pattern[(i + offset) % len(pattern)]"""
+
+    def __init__(self, size: int, seed: int):
+        self.size = size
+        self.pattern = random.Random(seed).randbytes(PATTERN_SIZE)
+        self.offset = seed * 4099 % PATTERN_SIZE  # Different blobs, same pattern memory
+        self._sha256: Optional[str] = None
+
+    def read(self, start: int, length: int) -> bytes:
+        out = bytearray()
+        position = (start + self.offset) % PATTERN_SIZE
+        while len(out) < length:
+            take = min(length - len(out), PATTERN_SIZE - position)
+            out += self.pattern[position:position + take]
+            position = 0
+        return bytes(out)
+
+    @property
+    def sha256(self) -> str:
+        if self._sha256 is None:
+            digest = hashlib.sha256()
+            for start in range(0, self.size, PATTERN_SIZE):
+                digest.update(self.read(start, min(PATTERN_SIZE, self.size - start)))
+            self._sha256 = digest.hexdigest()
+        return self._sha256
+
+
+class FakeRegistry:
+    """Blob catalogue plus request counters shared by the handler threads"""
+
+    def __init__(self, ollama_size: int, hf_size: int, hf_shards: int,
+                 latency: float = 0.0, bandwidth: float = 0.0):
+        self.latency = latency
+        self.bandwidth = bandwidth  # Bytes/s per connection, 0 = unlimited
+        self.ollama_blob = SyntheticBlob(ollama_size, seed=1)
+        self.hf_files: Dict[str, SyntheticBlob] = {'README.md': SyntheticBlob(1024, seed=2)}
+        if hf_shards > 1:
+            for index in range(1, hf_shards + 1):
+                name = f"gguf/bench-Q4_K_M-{index:05d}-of-{hf_shards:05d}.gguf"
+                self.hf_files[name] = SyntheticBlob(hf_size // hf_shards, seed=10 + index)
+        else:
+            self.hf_files['gguf/bench-Q4_K_M.gguf'] = SyntheticBlob(hf_size, seed=10)
+        self.stats = {'requests': 0, 'bytes_sent': 0}
+        self.lock = threading.Lock()
+
+    def prepare(self):
+        """Hash every blob up front so digests don't skew the first benchmark"""
+        self.ollama_blob.sha256
+        for blob in self.hf_files.values():
+            blob.sha256
+
+    def manifest(self) -> bytes:
+        return json.dumps({
+            'schemaVersion': 2,
+            'layers': [{
+                'mediaType': 'application/vnd.ollama.image.model',
+                'digest': f"sha256:{self.ollama_blob.sha256}",
+                'size': self.ollama_blob.size,
+            }],
+        }).encode()
+
+    def tree(self) -> bytes:
+        items = [{'type': 'directory', 'path': 'gguf'}]
+        for path, blob in self.hf_files.items():
+            items.append({'type': 'file', 'path': path, 'size': blob.size, 'oid': blob.sha256[:40],
+                          'lfs': {'oid': blob.sha256, 'size': blob.size}})
+        return json.dumps(items).encode()
+
+
+def make_handler(registry: FakeRegistry):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, *args):
+            pass
+
+        def _count(self, sent: int = 0):
+            with registry.lock:
+                registry.stats['requests'] += 1
+                registry.stats['bytes_sent'] += sent
+
+        def _send_json(self, body: bytes, headers: Optional[Dict[str, str]] = None):
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            self._count(len(body))
+
+        def _send_blob(self, blob: SyntheticBlob, head: bool = False):
+            start, end, status = 0, blob.size - 1, 200
+            match = re.match(r'bytes=(\d+)-(\d*)', self.headers.get('Range', ''))
+            if match:
+                start = int(match.group(1))
+                end = min(int(match.group(2)) if match.group(2) else blob.size - 1, blob.size - 1)
+                status = 206
+            self.send_response(status)
+            self.send_header('Content-Length', str(end - start + 1))
+            self.send_header('Accept-Ranges', 'bytes')
+            self.send_header('ETag', f'"{blob.sha256}"')
+            self.send_header('X-Linked-Etag', f'"{blob.sha256}"')
+            if status == 206:
+                self.send_header('Content-Range', f'bytes {start}-{end}/{blob.size}')
+            self.end_headers()
+            if head:
+                self._count()
+                return
+
+            sent = 0
+            started = time.monotonic()
+            position = start
+            while position <= end:
+                chunk = blob.read(position, min(SEND_CHUNK, end - position + 1))
+                self.wfile.write(chunk)
+                position += len(chunk)
+                sent += len(chunk)
+                if registry.bandwidth:
+                    ahead = sent / registry.bandwidth - (time.monotonic() - started)
+                    if ahead > 0:
+                        time.sleep(ahead)
+            self._count(sent)
+
+        def _route(self, head: bool = False):
+            if registry.latency:
+                time.sleep(registry.latency)
+            path = urlparse(self.path).path
+
+            if re.match(r'^/v2/.+/manifests/[^/]+$', path):
+                return self._send_json(registry.manifest())
+            if re.match(r'^/v2/.+/blobs/sha256:[0-9a-f]{64}$', path):
+                return self._send_blob(registry.ollama_blob, head)
+            if re.match(r'^/api/models/[^/]+/[^/]+/tree/', path):
+                return self._send_json(registry.tree(), {'ETag': '"bench-tree"'})
+            match = re.match(r'^/[^/]+/[^/]+/resolve/[^/]+/(.+)$', path)
+            if match and unquote(match.group(1)) in registry.hf_files:
+                return self._send_blob(registry.hf_files[unquote(match.group(1))], head)
+
+            self.send_response(404)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            self._count()
+
+        def do_GET(self):
+            try:
+                self._route()
+            except (BrokenPipeError, ConnectionResetError):
+                pass  # Client cancelled a segment
+
+        def do_HEAD(self):
+            self._route(head=True)
+
+    return Handler
+
+
+class QuietServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        pass  # Clients hang up mid-body when they abort; not interesting here
+
+
+def serve(registry: FakeRegistry, port: int = 0) -> QuietServer:
+    """Start the fake registry on 127.0.0.1 in a background thread"""
+    server = QuietServer(('127.0.0.1', port), make_handler(registry))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake Ollama/HF registry for benchmarks")
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--ollama-gb', type=float, default=1.0, help="Ollama model blob size")
+    parser.add_argument('--hf-gb', type=float, default=1.0, help="Total HF GGUF size")
+    parser.add_argument('--hf-shards', type=int, default=1, help="Split the HF GGUF into N shards")
+    parser.add_argument('--latency-ms', type=float, default=0.0, help="Delay before every response")
+    parser.add_argument('--bandwidth-mbps', type=float, default=0.0, help="Per-connection cap, MB/s")
+    args = parser.parse_args()
+
+    registry = FakeRegistry(int(args.ollama_gb * 1024 ** 3), int(args.hf_gb * 1024 ** 3), args.hf_shards,
+                            args.latency_ms / 1000, args.bandwidth_mbps * 1024 ** 2)
+    registry.prepare()
+    server = serve(registry, args.port)
+    print(f"Fake registry on http://127.0.0.1:{server.server_address[1]}", flush=True)
+    print(f"  LLAMA_WRANGLER_OLLAMA_REGISTRY=http://127.0.0.1:{server.server_address[1]}")
+    print(f"  HF_ENDPOINT=http://127.0.0.1:{server.server_address[1]}  (repo: bench/model)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Content-addressed blob store for Llama Wrangler
+Keeps one copy of each model file keyed by sha256, shared by the HF and Ollama downloaders
+"""
+
+import os
+import sys
+import json
+import time
+import errno
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional, Dict, List
+
+from placement import place_file, same_file
+
+try:
+    import fcntl
+except ImportError:  # Windows: prune is not serialised against other processes
+    fcntl = None
+
+# Blobs changed (written, renamed in, linked) more recently than this are never pruned: a
+# job may have finalised one and not yet linked it into a models directory
+PRUNE_GRACE = 60 * 60
+
+
+def normalize_digest(digest: str) -> str:
+    """Return the bare lowercase hex form of 'sha256:<hex>' or '<hex>'"""
+    digest = digest.strip().lower()
+    if digest.startswith('sha256:'):
+        digest = digest[len('sha256:'):]
+    if len(digest) != 64 or any(c not in '0123456789abcdef' for c in digest):
+        raise ValueError(f"Invalid sha256 digest: {digest}")
+    return digest
+
+
+class BlobStore:
+    """sha256-keyed storage under ~/.llama-wrangler/blobs with named links into model dirs"""
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = Path(root) if root else Path.home() / ".llama-wrangler" / "blobs"
+        (self.root / "sha256").mkdir(parents=True, exist_ok=True)
+        # Names placed by reflink or copy don't share the blob's inode, so its link count
+        # can't show they use it; they are recorded here instead
+        self.refs_path = self.root / "refs.json"
+        self.catalog: Dict[str, str] = {}  # Absolute path -> digest of every name placed by this instance
+
+    @contextmanager
+    def _locked(self, name: str, exclusive: bool):
+        """Store-wide lock: placements hold it shared, prune exclusively"""
+        with open(self.root / name, 'a+') as lock:
+            if fcntl:
+                fcntl.flock(lock.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(lock.fileno(), fcntl.LOCK_UN)
+
+    def _load_refs(self) -> Dict[str, List[str]]:
+        try:
+            with open(self.refs_path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_refs(self, refs: Dict[str, List[str]]):
+        tmp_path = self.refs_path.with_suffix('.json.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(refs, f)
+        os.replace(tmp_path, self.refs_path)
+
+    def _add_ref(self, digest: str, path: str):
+        with self._locked("refs.lock", exclusive=True):
+            refs = self._load_refs()
+            paths = refs.setdefault(normalize_digest(digest), [])
+            path = os.path.abspath(path)
+            if path not in paths:
+                paths.append(path)
+            self._save_refs(refs)
+
+    def path_for(self, digest: str) -> Path:
+        """Location of a blob in the store (whether or not it exists yet)"""
+        return self.root / "sha256" / normalize_digest(digest)
+
+    def has(self, digest: str) -> bool:
+        return self.path_for(digest).is_file()
+
+    def shares_device(self, path: str) -> bool:
+        """True when path (or its nearest existing parent) is on the store's filesystem
+
+        Only then can a blob be renamed in or hardlinked out; across devices every name
+        placed from the store is a full copy.
+        """
+        path = os.path.abspath(path)
+        while not os.path.exists(path):
+            parent = os.path.dirname(path)
+            if parent == path:
+                return False
+            path = parent
+        try:
+            return os.stat(path).st_dev == os.stat(self.root).st_dev
+        except OSError:
+            return False
+
+    def is_linked(self, digest: str, path: str) -> bool:
+        """True when path is a hardlink to the stored blob, so it needs no re-verification"""
+        return self.has(digest) and same_file(str(self.path_for(digest)), path)
+
+    def link(self, digest: str, dest: str) -> str:
+        """Materialise a stored blob at dest and return the placement strategy used"""
+        with self._locked(".lock", exclusive=False):
+            return self._link(digest, dest)
+
+    def _link(self, digest: str, dest: str) -> str:
+        strategy = place_file(str(self.path_for(digest)), dest)
+        self.catalog[os.path.abspath(dest)] = normalize_digest(digest)
+        if strategy != 'hardlink':
+            self._add_ref(digest, dest)
+        return strategy
+
+    def ingest(self, path: str, digest: str) -> str:
+        """Move a verified file into the store and leave a link at its original name
+
+        From another filesystem the file can't be renamed in or linked back: the store gets
+        its own copy (reflinked where possible) and the original stays in place, recorded as
+        a ref. Returns the strategy used for the name at path.
+        """
+        with self._locked(".lock", exclusive=False):
+            blob_path = self.path_for(digest)
+            if not blob_path.exists():
+                try:
+                    os.replace(path, blob_path)
+                except OSError as e:
+                    if e.errno != errno.EXDEV:
+                        raise
+                    place_file(path, str(blob_path), allow_hardlink=False)
+            if os.path.exists(path) and not self.shares_device(path):
+                self.catalog[os.path.abspath(path)] = normalize_digest(digest)
+                self._add_ref(digest, path)
+                return 'kept'
+            return self._link(digest, path)
+
+    def adopt(self, src: str, digest: str) -> str:
+        """Place an existing verified file (e.g. a local Ollama blob) into the store; returns the strategy"""
+        with self._locked(".lock", exclusive=False):
+            return place_file(src, str(self.path_for(digest)))
+
+    def release(self, path: str, digest: Optional[str] = None):
+        """Remove a named model file and drop its blob if nothing else references it
+
+        The blob is found from digest, or from the catalog or refs index that recorded the
+        name; a file neither knows is just removed and its blob, if any, left to prune.
+        """
+        path = os.path.abspath(path)
+        with self._locked(".lock", exclusive=True), self._locked("refs.lock", exclusive=True):
+            refs = self._load_refs()
+            digest = digest or self.catalog.get(path)
+            if not digest:
+                digest = next((d for d, paths in refs.items() if path in paths), None)
+            self.catalog.pop(path, None)
+            os.remove(path)
+            if not digest:
+                return
+
+            digest = normalize_digest(digest)
+            if path in refs.get(digest, []):
+                refs[digest].remove(path)
+            blob_path = self.path_for(digest)
+            try:
+                stat = blob_path.stat()
+            except OSError:
+                stat = None
+            if stat and stat.st_nlink <= 1 and not self._referenced(refs, digest, stat.st_size):
+                blob_path.unlink()
+            self._save_refs(refs)
+
+    def _referenced(self, refs: Dict[str, List[str]], digest: str, size: int) -> bool:
+        """Whether a reflinked or copied name still holds this blob; forgets names that don't"""
+        live = [path for path in refs.get(digest, [])
+                if os.path.isfile(path) and os.path.getsize(path) == size]
+        if live:
+            refs[digest] = live
+        else:
+            refs.pop(digest, None)
+        return bool(live)
+
+    def prune(self) -> int:
+        """Delete blobs no model directory links to or holds a copy of any more; returns bytes freed"""
+        freed = 0
+        cutoff = time.time() - PRUNE_GRACE
+        with self._locked(".lock", exclusive=True), self._locked("refs.lock", exclusive=True):
+            refs = self._load_refs()
+            for blob_path in (self.root / "sha256").iterdir():
+                if blob_path.name.endswith('.partial') or blob_path.name.endswith('.json'):
+                    continue
+                stat = blob_path.stat()
+                if stat.st_nlink > 1 or max(stat.st_mtime, stat.st_ctime) > cutoff:
+                    continue
+                if self._referenced(refs, blob_path.name, stat.st_size):
+                    continue
+                freed += stat.st_size
+                blob_path.unlink()
+            self._save_refs(refs)
+        return freed
+
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] != 'prune':
+        print("Usage: blob_store.py prune")
+        sys.exit(1)
+
+    freed = BlobStore().prune()
+    print(f"Freed {freed / 1e9:.2f} GB from blob store")
+
+
+if __name__ == "__main__":
+    main()
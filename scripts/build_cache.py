@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Conversion and quantization result cache for Llama Wrangler
+Maps (source content digest, target, converter/quantizer fingerprint) to an output kept
+under that build key, so repeat builds link instantly under any name and a changed source
+or llama.cpp upgrade misses; least recently used outputs are evicted under a size budget
+"""
+
+import os
+import sys
+import json
+import time
+import hashlib
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional, Dict, Any, List
+
+from blob_store import normalize_digest
+from digest_cache import hash_file, digest_cache
+from placement import place_file, same_file
+
+try:
+    import fcntl
+except ImportError:  # Windows: index updates are not serialised across processes
+    fcntl = None
+
+INDEX_VERSION = 2  # 1 kept outputs in the blob store
+DEFAULT_BUDGET_GB = 100
+
+
+def default_budget() -> int:
+    """Cache size budget in bytes, from LLAMA_WRANGLER_BUILD_CACHE_GB"""
+    try:
+        return int(float(os.environ.get('LLAMA_WRANGLER_BUILD_CACHE_GB', DEFAULT_BUDGET_GB)) * 1024 ** 3)
+    except ValueError:
+        return DEFAULT_BUDGET_GB * 1024 ** 3
+
+
+_fingerprints: Dict[tuple, str] = {}
+
+
+def tool_fingerprint(*paths) -> str:
+    """Digest of the toolchain files that produce an output (binary, convert script, ...)
+
+    Directories are hashed by their .py files, so a converter fingerprint can include gguf-py.
+    Results are remembered per process while every file keeps its size and mtime.
+    """
+    entries = []
+    for path in paths:
+        path = Path(path)
+        files = sorted(path.rglob('*.py')) if path.is_dir() else [path]
+        for file in files:
+            if file.is_file():
+                stat = file.stat()
+                name = str(file.relative_to(path) if path.is_dir() else file.name)
+                entries.append((name, str(file), stat.st_size, stat.st_mtime_ns))
+    key = tuple(entries)
+    if key not in _fingerprints:
+        sha256 = hashlib.sha256()
+        for name, file, _, _ in entries:
+            sha256.update(name.encode())
+            sha256.update(hash_file(file).encode())
+        _fingerprints[key] = sha256.hexdigest()[:16]
+    return _fingerprints[key]
+
+
+class BuildCache:
+    """Index of cached build outputs under ~/.llama-wrangler/build-cache
+
+    Outputs are kept as outputs/<key>.gguf, hardlinked to the model files built with them
+    where the filesystem allows. They stay out of the blob store: they are never hashed, and
+    the store only holds files under their content digest.
+    """
+
+    def __init__(self, root: Optional[str] = None, budget: Optional[int] = None):
+        self.root = Path(root) if root else Path.home() / ".llama-wrangler" / "build-cache"
+        (self.root / "outputs").mkdir(parents=True, exist_ok=True)
+        self.index_path = self.root / "index.json"
+        self.budget = default_budget() if budget is None else budget
+
+    @staticmethod
+    def key(source_digest: str, target: str, tool_hash: str) -> str:
+        return hashlib.sha256(f"{normalize_digest(source_digest)}|{target}|{tool_hash}".encode()).hexdigest()[:32]
+
+    @staticmethod
+    def derived_digest(source_digest: str, target: str, tool_hash: str) -> str:
+        """Stand-in source key for an output that is never hashed, from the inputs that determine it
+
+        Lets an intermediate (e.g. a converted F16) key the builds made from it. It names no
+        file's content, so it is only ever used as a source_digest in this index.
+        """
+        return hashlib.sha256(f"{normalize_digest(source_digest)}|{target}|{tool_hash}".encode()).hexdigest()
+
+    @contextmanager
+    def _locked_index(self):
+        """Read-modify-write the index under an exclusive lock"""
+        with open(self.root / "index.lock", 'a+') as lock:
+            if fcntl:
+                fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+            try:
+                index = {'version': INDEX_VERSION, 'entries': {}}
+                try:
+                    with open(self.index_path, 'r') as f:
+                        data = json.load(f)
+                    if data.get('version') == INDEX_VERSION:
+                        index = data
+                    else:
+                        self._discard_outputs()
+                except (OSError, ValueError):
+                    pass
+                yield index
+                tmp_path = self.index_path.with_suffix('.json.tmp')
+                with open(tmp_path, 'w') as f:
+                    json.dump(index, f)
+                os.replace(tmp_path, self.index_path)
+            finally:
+                if fcntl:
+                    fcntl.flock(lock.fileno(), fcntl.LOCK_UN)
+
+    def _discard_outputs(self):
+        """Remove outputs an index of another version recorded; they can't be looked up any more"""
+        for path in (self.root / "outputs").glob("*.gguf"):
+            path.unlink()
+
+    def _output_path(self, key: str) -> Path:
+        return self.root / "outputs" / f"{key}.gguf"
+
+    def file_digest(self, path: str) -> str:
+        """sha256 of a local file, remembered by (device, inode, size, mtime) in the digest cache"""
+        return digest_cache().digest(path)
+
+    def lookup(self, source_digest: str, target: str, tool_hash: str, dest_path: str) -> Optional[str]:
+        """Place a cached output at dest_path; returns the cached file's path, or None on a miss"""
+        key = self.key(source_digest, target, tool_hash)
+        cached = self._output_path(key)
+        with self._locked_index() as index:
+            entry = index['entries'].get(key)
+            if not entry or not cached.is_file() or cached.stat().st_size != entry['size']:
+                index['entries'].pop(key, None)
+                return None
+            entry['last_used'] = time.time()
+            entry['hits'] = entry.get('hits', 0) + 1
+        if not same_file(str(cached), dest_path):
+            place_file(str(cached), dest_path)
+        return str(cached)
+
+    def put(self, source_digest: str, target: str, tool_hash: str, output_path: str) -> str:
+        """Keep a freshly built output under its build key; returns the cached file's path
+
+        The output is hardlinked (reflinked or copied across filesystems), never hashed: the
+        key already says what produced it.
+        """
+        key = self.key(source_digest, target, tool_hash)
+        cached = self._output_path(key)
+        if not same_file(str(cached), output_path):
+            place_file(output_path, str(cached))
+
+        with self._locked_index() as index:
+            index['entries'][key] = {
+                'source': normalize_digest(source_digest),
+                'target': target,
+                'tool': tool_hash,
+                'size': os.path.getsize(output_path),
+                'created': time.time(),
+                'last_used': time.time(),
+                'hits': 0,
+            }
+            self._evict(index)
+        return str(cached)
+
+    def _evict(self, index: Dict[str, Any]) -> int:
+        """Drop least recently used entries until the cache fits its budget"""
+        entries = index['entries']
+        total = sum(e['size'] for e in entries.values())
+        freed = 0
+        for key in sorted(entries, key=lambda k: entries[k]['last_used']):
+            if total <= self.budget:
+                break
+            entry = entries.pop(key)
+            total -= entry['size']
+            cached = self._output_path(key)
+            if cached.exists():
+                # Model files hardlinked to it keep their data
+                cached.unlink()
+                freed += entry['size']
+        return freed
+
+    def evict(self) -> int:
+        with self._locked_index() as index:
+            return self._evict(index)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._locked_index() as index:
+            entries: List[Dict[str, Any]] = list(index['entries'].values())
+        return {
+            'entries': len(entries),
+            'bytes': sum(e['size'] for e in entries),
+            'budget': self.budget,
+            'hits': sum(e.get('hits', 0) for e in entries),
+        }
+
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] not in ('stats', 'evict'):
+        print("Usage: build_cache.py stats|evict")
+        sys.exit(1)
+
+    cache = BuildCache()
+    if sys.argv[1] == 'evict':
+        print(f"Freed {cache.evict() / 1e9:.2f} GB from build cache")
+    print(json.dumps(cache.stats()))
+
+
+if __name__ == "__main__":
+    main()
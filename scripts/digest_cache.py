@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Verified-digest cache for Llama Wrangler
+Remembers the sha256 of model files keyed by (device, inode, size, mtime), in a
+user.llama_wrangler.sha256 extended attribute where the filesystem allows it and in a
+sidecar index otherwise, so existing multi-GB files are hashed once rather than on
+every run; full hashes overlap reading with hashing and fan out across files
+"""
+
+import os
+import sys
+import json
+import time
+import queue
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Callable
+
+from blob_store import normalize_digest
+
+try:
+    import fcntl
+except ImportError:  # Windows: sidecar updates are not serialised across processes
+    fcntl = None
+
+XATTR = 'user.llama_wrangler.sha256'
+HASH_CHUNK = 16 * 1024 * 1024
+READ_AHEAD = 4           # Chunks read ahead of the hasher
+MAX_SIDECAR_ENTRIES = 10000
+HASH_WORKERS = 4         # Files hashed at once by hash_files()
+
+
+def hash_file(path: str, progress: Optional[Callable[[int, int], None]] = None) -> str:
+    """sha256 of a file, reading ahead on a second thread while this one hashes
+
+    hashlib releases the GIL for large updates, so disk reads and hashing overlap
+    instead of alternating; `progress(done, total)` follows the hashed bytes.
+    """
+    total = os.path.getsize(path)
+    chunks: queue.Queue = queue.Queue(maxsize=READ_AHEAD)
+    failure: List[BaseException] = []
+
+    def read():
+        try:
+            with open(path, 'rb') as f:
+                if hasattr(os, 'posix_fadvise'):
+                    os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+                for block in iter(lambda: f.read(HASH_CHUNK), b''):
+                    chunks.put(block)
+        except BaseException as e:
+            failure.append(e)
+        finally:
+            chunks.put(None)
+
+    reader = threading.Thread(target=read, daemon=True)
+    reader.start()
+    sha256 = hashlib.sha256()
+    done = 0
+    while True:
+        block = chunks.get()
+        if block is None:
+            break
+        sha256.update(block)
+        done += len(block)
+        if progress:
+            progress(done, total)
+    reader.join()
+    if failure:
+        raise failure[0]
+    return sha256.hexdigest()
+
+
+def _stat_key(stat: os.stat_result) -> str:
+    return f"{stat.st_dev}:{stat.st_ino}:{stat.st_size}:{stat.st_mtime_ns}"
+
+
+class DigestCache:
+    """Known sha256 digests of files, valid while the file's inode, size and mtime are unchanged"""
+
+    def __init__(self, sidecar: Optional[str] = None):
+        self.sidecar = Path(sidecar) if sidecar else Path.home() / ".llama-wrangler" / "cache" / "digests.json"
+
+    @contextmanager
+    def _locked_sidecar(self, write: bool):
+        self.sidecar.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.sidecar.with_suffix('.lock'), 'a+') as lock:
+            if fcntl:
+                fcntl.flock(lock.fileno(), fcntl.LOCK_EX if write else fcntl.LOCK_SH)
+            try:
+                entries: Dict[str, str] = {}
+                try:
+                    with open(self.sidecar, 'r') as f:
+                        entries = json.load(f)
+                except (OSError, ValueError):
+                    pass
+                yield entries
+                if write:
+                    while len(entries) > MAX_SIDECAR_ENTRIES:
+                        del entries[next(iter(entries))]
+                    tmp_path = self.sidecar.with_suffix('.json.tmp')
+                    with open(tmp_path, 'w') as f:
+                        json.dump(entries, f)
+                    os.replace(tmp_path, self.sidecar)
+            finally:
+                if fcntl:
+                    fcntl.flock(lock.fileno(), fcntl.LOCK_UN)
+
+    def get(self, path: str) -> Optional[str]:
+        """The recorded digest of path, if the file hasn't changed since it was recorded"""
+        stat = os.stat(path)
+        key = _stat_key(stat)
+        if hasattr(os, 'getxattr'):
+            try:
+                value = json.loads(os.getxattr(path, XATTR))
+                # The attribute lives on the inode; size and mtime show it still describes the data
+                if value.get('size') == stat.st_size and value.get('mtime_ns') == stat.st_mtime_ns:
+                    return value['sha256']
+            except (OSError, ValueError, KeyError, AttributeError):
+                pass
+        with self._locked_sidecar(write=False) as entries:
+            return entries.get(key)
+
+    def record(self, path: str, digest: str):
+        """Remember that path currently hashes to digest"""
+        digest = normalize_digest(digest)
+        stat = os.stat(path)
+        if hasattr(os, 'setxattr'):
+            value = json.dumps({'sha256': digest, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns})
+            try:
+                os.setxattr(path, XATTR, value.encode())
+                return
+            except OSError:
+                pass  # No user xattrs here (tmpfs, some network filesystems) or not our file
+        with self._locked_sidecar(write=True) as entries:
+            entries[_stat_key(stat)] = digest
+
+    def digest(self, path: str, progress: Optional[Callable[[int, int], None]] = None) -> str:
+        """sha256 of path, hashing only when no valid digest is recorded"""
+        digest = self.get(path)
+        if digest:
+            return digest
+        digest = hash_file(path, progress)
+        self.record(path, digest)
+        return digest
+
+    def verify(self, path: str, expected: str, progress: Optional[Callable[[int, int], None]] = None) -> bool:
+        return self.digest(path, progress) == normalize_digest(expected)
+
+
+_default: Optional[DigestCache] = None
+
+
+def digest_cache() -> DigestCache:
+    global _default
+    if _default is None:
+        _default = DigestCache()
+    return _default
+
+
+def hash_files(paths: List[str], workers: int = HASH_WORKERS, cache: Optional[DigestCache] = None) -> List[Dict[str, Any]]:
+    """Digests of many files, several at a time; cached ones cost a stat"""
+    cache = cache or digest_cache()
+
+    def one(path: str) -> Dict[str, Any]:
+        started = time.perf_counter()
+        try:
+            cached = cache.get(path)
+            digest = cached or cache.digest(path)
+        except OSError as e:
+            return {'path': path, 'error': str(e)}
+        return {'path': path, 'sha256': digest, 'cached': bool(cached),
+                'seconds': round(time.perf_counter() - started, 3)}
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        return list(pool.map(one, paths))
+
+
+def main():
+    # digest_cache.py <file>... [--workers N]: print each file's sha256, hashing only unknown files
+    args = sys.argv[1:]
+    workers = HASH_WORKERS
+    if '--workers' in args:
+        index = args.index('--workers')
+        workers = int(args[index + 1])
+        del args[index:index + 2]
+    if not args:
+        print("Usage: digest_cache.py <file>... [--workers N]")
+        sys.exit(1)
+    started = time.perf_counter()
+    results = hash_files(args, workers)
+    print(json.dumps({'files': results, 'seconds': round(time.perf_counter() - started, 3)}))
+    if any('error' in result for result in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Disk footprint planning for Llama Wrangler conversions
+Predicts the peak disk use of a download/convert/quantize run, holds the space it will
+need in an fallocate'd reservation file so concurrent jobs can't take it, and samples
+the real allocated size of the run's files to report the actual peak
+"""
+
+import os
+import sys
+import json
+import errno
+import shutil
+import threading
+from pathlib import Path
+from typing import Optional, Dict, Any, List
+
+# Approximate bits per weight of llama.cpp output types (scales + weights)
+QUANT_BITS = {
+    'Q2_K': 2.63, 'Q3_K_S': 3.5, 'Q3_K_M': 3.91, 'Q3_K_L': 4.27,
+    'Q4_0': 4.55, 'Q4_K_S': 4.58, 'Q4_K_M': 4.89,
+    'Q5_0': 5.54, 'Q5_K_S': 5.54, 'Q5_K_M': 5.69,
+    'Q6_K': 6.56, 'Q8_0': 8.5, 'F16': 16, 'F32': 32,
+}
+
+# Targets convert_hf_to_gguf.py can write itself via --outtype, skipping the F16 intermediate
+DIRECT_OUTTYPES = {'Q8_0': 'q8_0', 'F16': 'f16', 'F32': 'f32'}
+
+SAFETY_MARGIN = 0.05  # Headroom on top of the predicted peak
+SAMPLE_INTERVAL = 0.5
+
+
+def format_gb(count: float) -> str:
+    return f"{count / 1e9:.2f} GB"
+
+
+def free_space(path: str) -> int:
+    """Free bytes on the filesystem holding path (or its nearest existing parent)"""
+    path = Path(path)
+    while not path.exists() and path != path.parent:
+        path = path.parent
+    return shutil.disk_usage(str(path)).free
+
+
+def estimate_output_size(weights_bytes: int, quantization: str, source_bits: float = 16) -> int:
+    """Size of weights_bytes of source_bits-per-weight tensors written as quantization"""
+    return int(weights_bytes * QUANT_BITS.get(quantization, 16) / source_bits)
+
+
+def plan_peak(snapshot_bytes: int, targets: List[str], low_disk: bool = False,
+              direct: bool = False, source_bits: float = 16) -> Dict[str, Any]:
+    """Predicted footprint after each step of a conversion run, and its peak
+
+    The default run keeps snapshot, F16 intermediate and outputs until the end. Low-disk
+    mode deletes the snapshot right after conversion and the intermediate after
+    quantizing; with a direct --outtype there is no intermediate at all.
+    """
+    intermediate = estimate_output_size(snapshot_bytes, 'F16', source_bits)
+    outputs = sum(estimate_output_size(snapshot_bytes, q, source_bits) for q in targets)
+    if direct:
+        steps = [('download', snapshot_bytes), ('convert', snapshot_bytes + outputs), ('cleanup', outputs)]
+    elif low_disk:
+        steps = [('download', snapshot_bytes), ('convert', snapshot_bytes + intermediate),
+                 ('quantize', intermediate + outputs), ('cleanup', outputs)]
+    else:
+        steps = [('download', snapshot_bytes), ('convert', snapshot_bytes + intermediate),
+                 ('quantize', snapshot_bytes + intermediate + outputs), ('cleanup', intermediate + outputs)]
+    return {
+        'steps': steps,
+        'peak': max(size for _, size in steps),
+        'intermediate': 0 if direct else intermediate,
+        'outputs': outputs,
+    }
+
+
+def remaining_peak(plan: Dict[str, Any], step: str) -> int:
+    """Largest predicted footprint from step to the end of the run"""
+    names = [name for name, _ in plan['steps']]
+    return max(size for _, size in plan['steps'][names.index(step):])
+
+
+def required_space(peak: int) -> int:
+    return int(peak * (1 + SAFETY_MARGIN))
+
+
+def allocated_size(path: str, seen: Optional[set] = None) -> int:
+    """Bytes actually allocated under path; hardlinked files are counted once"""
+    seen = set() if seen is None else seen
+    paths = [path]
+    if os.path.isdir(path):
+        paths = [os.path.join(root, name) for root, _, files in os.walk(path) for name in files]
+    total = 0
+    for file in paths:
+        try:
+            stat = os.stat(file)
+        except OSError:
+            continue  # Removed mid-walk
+        if (stat.st_dev, stat.st_ino) in seen:
+            continue
+        seen.add((stat.st_dev, stat.st_ino))
+        total += stat.st_blocks * 512 if hasattr(stat, 'st_blocks') else stat.st_size
+    return total
+
+
+class DiskReservation:
+    """Space held in an fallocate'd file and handed back step by step
+
+    Without posix_fallocate (macOS, Windows) only the up-front free-space check applies.
+    """
+
+    def __init__(self, directory: str, size: int = 0):
+        self.path = os.path.join(directory, f".llama-wrangler-reserve-{os.getpid()}")
+        self.size = 0
+        self.fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            self.resize(size)
+        except Exception:
+            self.release()
+            raise
+
+    def resize(self, size: int):
+        size = max(0, int(size))
+        if size > self.size and hasattr(os, 'posix_fallocate'):
+            try:
+                os.posix_fallocate(self.fd, 0, size)
+            except OSError as e:
+                # Any other error means the filesystem can't reserve; nothing is held
+                if e.errno in (errno.ENOSPC, errno.EFBIG):
+                    raise Exception(f"Not enough free disk space: {format_gb(size - self.size)} more needed")
+        elif size < self.size:
+            os.ftruncate(self.fd, size)
+        self.size = size
+
+    def release(self):
+        if self.fd is None:
+            return
+        os.close(self.fd)
+        self.fd = None
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+class DiskMonitor:
+    """Samples the allocated size of a run's files in the background and keeps the peak"""
+
+    def __init__(self, paths: Optional[List[str]] = None, interval: float = SAMPLE_INTERVAL):
+        self.paths = list(paths or [])
+        self.interval = interval
+        self.peak = 0
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.reservation: Optional[DiskReservation] = None
+        self.target = 0
+
+    def add(self, path: str):
+        with self.lock:
+            if path not in self.paths:
+                self.paths.append(path)
+
+    def sample(self) -> int:
+        """Measure now; call before deleting files so a short-lived peak isn't missed"""
+        with self.lock:
+            paths = list(self.paths)
+        seen = set()
+        current = sum(allocated_size(path, seen) for path in paths if os.path.exists(path))
+        self.peak = max(self.peak, current)
+        with self.lock:
+            # Hand reserved space over as the run's own files grow into it
+            if self.reservation and self.reservation.fd is not None:
+                self.reservation.resize(min(self.reservation.size, max(0, self.target - current)))
+        return current
+
+    def hold(self, reservation: 'DiskReservation', target: int):
+        """Keep reservation at target minus what the run's files take now, shrinking as they grow
+
+        Growing it may raise when another job has taken the space meanwhile.
+        """
+        current = self.sample()
+        with self.lock:
+            self.reservation, self.target = reservation, target
+            if reservation.fd is not None:
+                reservation.resize(max(0, target - current))
+
+    def _run(self):
+        while not self.stopped.wait(self.interval):
+            self.sample()
+
+    def start(self) -> 'DiskMonitor':
+        self.thread.start()
+        return self
+
+    def stop(self) -> int:
+        self.stopped.set()
+        if self.thread.is_alive():
+            self.thread.join()
+        self.sample()
+        return self.peak
+
+
+def main():
+    # disk_budget.py <snapshot_bytes> <QUANT[,QUANT...]> [dir]: print predicted peaks
+    if len(sys.argv) < 3:
+        print("Usage: disk_budget.py <snapshot_bytes> <QUANT[,QUANT...]> [dir]")
+        sys.exit(1)
+
+    snapshot_bytes = int(sys.argv[1])
+    targets = [t for t in sys.argv[2].split(',') if t]
+    directory = sys.argv[3] if len(sys.argv) > 3 else '.'
+    direct = len(targets) == 1 and targets[0] in DIRECT_OUTTYPES
+    print(json.dumps({
+        'free': free_space(directory),
+        'default': plan_peak(snapshot_bytes, targets)['peak'],
+        'low_disk': plan_peak(snapshot_bytes, targets, low_disk=True, direct=direct)['peak'],
+    }))
+
+
+if __name__ == "__main__":
+    main()
@@ -7,19 +7,34 @@ Automatically downloads and converts HuggingFace models to GGUF format with prog
 import os
 import sys
 import json
+import time
 import subprocess
 from pathlib import Path
 from typing import Optional, Dict, Any, List
 import shutil
+import threading
 import requests
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from urllib.parse import quote
 
-try:
-    from huggingface_hub import snapshot_download, hf_hub_download
-    from tqdm import tqdm
-except ImportError:
-    print("Error: Required packages not installed. Run: pip install huggingface-hub tqdm")
-    sys.exit(1)
+from range_download import DigestMismatch, SegmentedDownloader, has_partial, default_connections
+from blob_store import BlobStore
+from gguf_split import parse_shard_name, shard_paths, merge_shards
+from hf_tree import HFTreeCache, hf_endpoint, hf_auth_headers
+from job_slots import stage_slot
+from transport import shared_session, report_stats
+from toolchain import find_llama_cpp
+from progress import ProgressReporter, emit_stage, watch_files
+from hf_pipeline import SnapshotPipeline, snapshot_digest
+from snapshot_plan import plan_snapshot, format_plan
+from quantize import VALID_QUANT_TYPES, as_targets, find_quantize_tool, quantize_cached, output_path_for
+from disk_budget import (DIRECT_OUTTYPES, DiskMonitor, DiskReservation, estimate_output_size, format_gb,
+                         free_space, plan_peak, remaining_peak, required_space)
+from build_cache import BuildCache, tool_fingerprint
+
+# Parts of the overall job bar after a base-model download (10-40%)
+CONVERT_SPAN = (40, 80)
+QUANTIZE_SPAN = (80, 100)
 
 
 def print_progress(message):
@@ -27,18 +42,66 @@ def print_progress(message):
     print(message, flush=True)
 
 
-class ProgressCallback:
-    """Callback for tracking download progress"""
-    def __init__(self):
-        self.pbar = None
-        self.last_percentage = 0
+def directory_size(path: str) -> int:
+    """Bytes under path, including in-progress download files"""
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass  # Renamed or removed mid-walk
+    return total
+
+
+class ShardProgress:
+    """Aggregates progress and digest state from concurrent shard downloads into one stream"""
+    def __init__(self, expected_total: int = 0):
+        self.expected_total = expected_total
+        self.shards: Dict[str, tuple] = {}
+        self.digests: Dict[str, str] = {}
+        self.lock = threading.Lock()
+        self.reporter = ProgressReporter('download', total=expected_total)
+    
+    def for_shard(self, name: str) -> 'ShardCallback':
+        return ShardCallback(self, name)
+    
+    def update(self, name: str, bytes_downloaded: int, total_bytes: int):
+        with self.lock:
+            self.shards[name] = (bytes_downloaded, total_bytes)
+            done = sum(d for d, _ in self.shards.values())
+            total = max(self.expected_total, sum(t for _, t in self.shards.values()))
+        self.reporter.update(done, total)
+    
+    def set_digest(self, name: str, state: str):
+        with self.lock:
+            self.digests[name] = state
+            states = set(self.digests.values())
+        if 'mismatch' in states:
+            self.reporter.set_digest('mismatch')
+        elif 'streaming' in states:
+            self.reporter.set_digest('streaming')
+        else:
+            self.reporter.set_digest('unverified' if 'unverified' in states else 'verified')
+    
+    def finish(self):
+        self.reporter.finish()
+
+
+class ShardCallback:
+    """Per-shard progress handle with the same interface as ProgressReporter"""
+    def __init__(self, parent: ShardProgress, name: str):
+        self.parent = parent
+        self.name = name
     
     def __call__(self, bytes_downloaded, total_bytes):
-        if total_bytes > 0:
-            percentage = int((bytes_downloaded / total_bytes) * 100)
-            if percentage != self.last_percentage:
-                print_progress(f"{percentage}%")
-                self.last_percentage = percentage
+        self.parent.update(self.name, bytes_downloaded, total_bytes)
+    
+    def set_digest(self, state: str):
+        self.parent.set_digest(self.name, state)
+    
+    def finish(self):
+        pass  # The set finishes once every shard is done
 
 
 class ModelConverter:
@@ -67,174 +130,276 @@ class ModelConverter:
     # Popular quantization formats
     PREFERRED_QUANTS = ["Q4_K_M", "Q4_K", "Q5_K_M", "Q5_K", "Q3_K_M", "Q6_K", "Q8_0"]
     
-    def __init__(self, llama_cpp_path: Optional[str] = None):
+    def __init__(self, llama_cpp_path: Optional[str] = None, connections: Optional[int] = None):
         """Initialize converter"""
+        self.connections = connections
+        self.remote_files: Dict[str, Dict[str, Any]] = {}
+        self.shard_sets: Dict[str, List[str]] = {}
+        self.session = shared_session()
+        self.tree = HFTreeCache(session=self.session)
+        self.store = BlobStore()
+        self.cache = BuildCache()
+        self.snapshot_digest: Optional[str] = None  # Content digest of the last base-model download
+        self.conversion_digest: Optional[str] = None  # Build key of the last conversion's output
         self.llama_cpp_path = self._find_llama_cpp(llama_cpp_path)
         if not self.llama_cpp_path:
             raise RuntimeError("llama.cpp not found. Please ensure llama.cpp is installed.")
     
     def _find_llama_cpp(self, custom_path: Optional[str] = None) -> Optional[Path]:
-        """Find llama.cpp installation"""
-        if custom_path:
-            path = Path(custom_path)
-            if path.exists() and self._has_converter_scripts(path):
-                return path
-        
-        # Check common locations
-        home = Path.home()
-        locations = [
-            home / ".llama-wrangler" / "llama.cpp",
-            home / ".METALlama.cpp",
-            Path.cwd() / "llama.cpp",
-            home / "llama.cpp",
-            Path("/usr/local/llama.cpp"),
-        ]
-        
-        for loc in locations:
-            if loc.exists() and self._has_converter_scripts(loc):
-                return loc
-        
-        return None
-    
-    def _has_converter_scripts(self, path: Path) -> bool:
-        """Check if the path has converter scripts"""
-        return any((
-            (path / "convert-hf-to-gguf.py").exists(),
-            (path / "convert_hf_to_gguf.py").exists(),
-            (path / "convert.py").exists()
-        ))
+        """Find a llama.cpp installation with converter scripts (cached per process)"""
+        return find_llama_cpp(custom_path, require_converter=True)
     
     def extract_repo_info(self, url: str) -> tuple[str, str, str]:
         """Extract repo_id, revision, and specific file from HuggingFace URL"""
         url = url.strip().rstrip('/')
         specific_file = None
         
-        if "huggingface.co/" in url:
-            parts = url.split("huggingface.co/")[-1].split("/")
+        # Accept full URLs and the bare "<org>/<repo>/..." form the app passes in
+        repo_path = url.split("huggingface.co/")[-1]
+        if "/" in repo_path:
+            parts = repo_path.split("/")
             if len(parts) >= 2:
                 repo_id = f"{parts[0]}/{parts[1]}"
                 
-                # Check if URL points to a specific GGUF file
-                if ("blob/" in url or "tree/" in url) and url.endswith('.gguf'):
-                    specific_file = url.split('/')[-1]
-                
-                # Extract revision
-                if "tree/" in url:
-                    revision = url.split("tree/")[-1].split("/")[0]
-                elif "blob/" in url:
-                    revision = url.split("blob/")[-1].split("/")[0]
-                else:
-                    revision = "main"
+                # URLs look like <org>/<repo>/(blob|tree|resolve)/<revision>/<path/in/repo>
+                revision = "main"
+                if len(parts) >= 4 and parts[2] in ("blob", "tree", "resolve"):
+                    revision = parts[3]
+                    # Check if URL points to a specific GGUF file (possibly in a subfolder)
+                    if url.endswith('.gguf') and len(parts) >= 5:
+                        specific_file = "/".join(parts[4:])
                     
                 return repo_id, revision, specific_file
         
         return url, "main", None
     
-    def check_for_gguf_files(self, repo_id: str, preferred_quant: str = "Q4_K_M") -> List[str]:
-        """Check if model has pre-converted GGUF files"""
-        api_url = f"https://huggingface.co/api/models/{repo_id}/tree/main"
-        
+    def check_for_gguf_files(self, repo_id: str, preferred_quant: str = "Q4_K_M",
+                             revision: str = "main") -> List[str]:
+        """Check if model has pre-converted GGUF files (anywhere in the repo tree)"""
         try:
-            headers = {}
-            hf_token = os.environ.get('HF_TOKEN') or os.environ.get('HUGGING_FACE_HUB_TOKEN')
-            if hf_token:
-                headers['Authorization'] = f'Bearer {hf_token}'
+            files = self.tree.list_files(repo_id, revision)
+            gguf_files = []
             
-            response = requests.get(api_url, timeout=10, headers=headers)
-            if response.status_code == 200:
-                files = response.json()
-                gguf_files = []
-                
-                # Collect all GGUF files
-                for file in files:
-                    if file['path'].endswith('.gguf') and 'ggml-vocab' not in file['path']:
-                        gguf_files.append(file['path'])
-                
-                # Sort by preference
-                def quant_priority(filename):
-                    for i, quant in enumerate(self.PREFERRED_QUANTS):
-                        if quant.lower() in filename.lower():
-                            return i
-                    return len(self.PREFERRED_QUANTS)
-                
-                gguf_files.sort(key=quant_priority)
-                return gguf_files[:5]  # Return top 5 options
+            # Collect all GGUF files, listing each shard set once by its first shard
+            for file in files:
+                if file['path'].endswith('.gguf') and 'ggml-vocab' not in file['path']:
+                    self.remote_files[file['path']] = file
+                    shard = parse_shard_name(file['path'])
+                    if shard:
+                        first = shard_paths(file['path'])[0]
+                        self.shard_sets.setdefault(first, []).append(file['path'])
+                        if shard[1] != 1:
+                            continue
+                    gguf_files.append(file['path'])
+            
+            # Sort by preference
+            def quant_priority(filename):
+                for i, quant in enumerate(self.PREFERRED_QUANTS):
+                    if quant.lower() in filename.lower():
+                        return i
+                return len(self.PREFERRED_QUANTS)
+            
+            gguf_files.sort(key=quant_priority)
+            return gguf_files[:5]  # Return top 5 options
         except Exception as e:
             print_progress(f"Error checking for GGUF files: {e}")
         
         return []
     
-    def download_gguf_direct(self, repo_id: str, file_path: str, output_dir: str) -> str:
-        """Download a GGUF file directly with progress"""
-        url = f"https://huggingface.co/{repo_id}/resolve/main/{quote(file_path)}"
+    def get_lfs_sha256(self, url: str, repo_id: str, revision: str, file_path: str,
+                       headers: Dict[str, str]) -> Optional[str]:
+        """Return the LFS sha256 for a repo file, from the tree listing or a HEAD request"""
+        info = self.remote_files.get(file_path)
+        if info is None:
+            try:
+                info = self.tree.file_info(repo_id, revision, file_path)
+            except requests.RequestException:
+                info = None
+        lfs = (info or {}).get('lfs') or {}
+        if lfs.get('oid'):
+            return lfs['oid']
+        
+        # The resolve endpoint reports the LFS oid before redirecting to the CDN
+        try:
+            response = self.session.head(url, headers=headers, allow_redirects=False, timeout=10)
+            linked_etag = response.headers.get('x-linked-etag', '').strip('"')
+            if len(linked_etag) == 64:
+                return linked_etag
+        except requests.RequestException as e:
+            print_progress(f"Warning: Could not look up file hash: {e}")
+        return None
+    
+    def download_gguf_direct(self, repo_id: str, file_path: str, output_dir: str,
+                             progress_callback=None, connections: Optional[int] = None,
+                             revision: str = "main", cancel: Optional[threading.Event] = None) -> str:
+        """Download a GGUF file directly with progress, verifying its LFS sha256
+
+        Setting `cancel` stops the download at its next chunk, keeping the .partial for resume.
+        """
+        url = f"{hf_endpoint()}/{repo_id}/resolve/{quote(revision, safe='')}/{quote(file_path)}"
         filename = os.path.basename(file_path)
         dest_path = os.path.join(output_dir, filename)
         
         print_progress(f"Downloading {filename}...")
         
-        headers = {}
-        hf_token = os.environ.get('HF_TOKEN') or os.environ.get('HUGGING_FACE_HUB_TOKEN')
-        if hf_token:
-            headers['Authorization'] = f'Bearer {hf_token}'
+        headers = hf_auth_headers()
+        if headers:
             print_progress("Using HuggingFace token for authentication")
         
-        response = requests.get(url, stream=True, allow_redirects=True, headers=headers)
-        response.raise_for_status()
-        
-        total_size = int(response.headers.get('content-length', 0))
-        if total_size == 0:
-            print_progress("Warning: Unknown file size, progress may not be accurate")
-            total_size = 1
-        
-        downloaded = 0
-        last_percentage = -1
-        chunk_size = 1024 * 1024  # 1MB chunks
-        
-        with open(dest_path, 'wb') as f:
-            for chunk in response.iter_content(chunk_size=chunk_size):
-                if chunk:
-                    f.write(chunk)
-                    downloaded += len(chunk)
-                    
-                    percentage = int((downloaded / total_size) * 100) if total_size > 1 else 0
-                    if percentage != last_percentage:
-                        print_progress(f"{percentage}%")
-                        last_percentage = percentage
+        reporter = progress_callback or ProgressReporter('download', name=filename)
+        expected_sha256 = self.get_lfs_sha256(url, repo_id, revision, file_path, headers)
+        if expected_sha256 and self.store.has(expected_sha256):
+            strategy = self.store.link(expected_sha256, dest_path)
+            print_progress(f"File found in blob store, linked ({strategy})")
+            reporter.set_digest('verified')
+            reporter.finish()
+            print_progress(f"Downloaded to {dest_path}")
+            return dest_path
+        if not expected_sha256:
+            print_progress("Warning: No LFS hash published for this file, skipping verification")
+        
+        # Known digests download straight into the store; others are stored once hashed.
+        # A store on another filesystem is skipped: linking out of it would be a full copy
+        in_store = self.store.shares_device(dest_path)
+        target_path = str(self.store.path_for(expected_sha256)) if expected_sha256 and in_store else dest_path
+        if has_partial(target_path):
+            print_progress("Resuming interrupted download")
+        
+        downloader = SegmentedDownloader(
+            session=self.session,
+            connections=connections or self.connections,
+            headers=headers,
+            progress_callback=reporter,
+            cancel=cancel
+        )
+        reporter.set_digest('streaming' if expected_sha256 else 'unverified')
+        try:
+            downloader.download(url, target_path, expected_sha256=expected_sha256)
+        except DigestMismatch:
+            reporter.set_digest('mismatch')
+            raise
+        if expected_sha256:
+            reporter.set_digest('verified')
+            print_progress("Download verified")
+        if target_path != dest_path:
+            self.store.link(expected_sha256, dest_path)
+        elif in_store:
+            self.store.ingest(dest_path, downloader.sha256)
+        reporter.finish()
         
         print_progress(f"Downloaded to {dest_path}")
         return dest_path
     
+    def download_gguf_set(self, repo_id: str, file_path: str, output_dir: str,
+                          revision: str = "main") -> str:
+        """Download a GGUF file, or every shard of a split model concurrently
+        
+        Returns the local path of the file (or first shard) to load.
+        """
+        shards = shard_paths(file_path)
+        if len(shards) == 1:
+            return self.download_gguf_direct(repo_id, file_path, output_dir, revision=revision)
+        
+        print_progress(f"Model is split into {len(shards)} shards, downloading all of them")
+        expected_total = sum(self.remote_files.get(p, {}).get('size', 0) for p in shards)
+        progress = ShardProgress(expected_total)
+        
+        # Share the connection budget between shards instead of multiplying it
+        per_shard = max(1, (self.connections or default_connections()) // len(shards))
+        cancel = threading.Event()
+        with ThreadPoolExecutor(max_workers=len(shards)) as pool:
+            futures = [
+                pool.submit(self.download_gguf_direct, repo_id, shard, output_dir,
+                            progress.for_shard(shard), per_shard, revision, cancel)
+                for shard in shards
+            ]
+            try:
+                for future in as_completed(futures):
+                    future.result()
+            except Exception:
+                # The other shards stop at their next chunk and keep their .partial for resume
+                cancel.set()
+                pool.shutdown(wait=False, cancel_futures=True)
+                raise
+            local_paths = [future.result() for future in futures]
+        
+        progress.finish()
+        return local_paths[0]
+    
     def download_model(self, repo_id: str, revision: str = "main", 
-                      output_dir: Optional[str] = None) -> Path:
-        """Download model from HuggingFace with progress tracking"""
+                      output_dir: Optional[str] = None, pipelined: bool = True,
+                      plan: Optional[Dict[str, Any]] = None) -> Path:
+        """Download model from HuggingFace with progress tracking
+        
+        Only the files the converter needs are fetched (see snapshot_plan.py). The pipelined
+        mode fetches them in parallel with the segmented engine and checks each safetensors
+        shard as it lands; snapshot_download is the fallback.
+        """
         if not output_dir:
             output_dir = f"./models/{repo_id.replace('/', '_')}"
         
         temp_dir = os.path.join(output_dir, f"temp_{repo_id.replace('/', '_')}")
+        self.snapshot_digest = None  # Stays unset for an unplanned snapshot: nothing is cached
         
         print_progress(f"Downloading {repo_id} (revision: {revision})")
-        print_progress("10%")
-        
+        if plan is None:
+            try:
+                plan = plan_snapshot(self.tree, repo_id, revision)
+                print_progress(format_plan(plan))
+            except Exception as e:
+                print_progress(f"Warning: Could not plan the snapshot ({e}), downloading the whole repository")
+        if pipelined and plan:
+            try:
+                stats = SnapshotPipeline(self.tree, connections=self.connections).run(
+                    repo_id, revision, temp_dir, plan)
+                self.snapshot_digest = stats['digest']
+                print_progress(
+                    f"Fetched {stats['files']} files in {stats['download_s']}s "
+                    f"({stats['rate_mbps']} MB/s); {stats['shards']} shards checked during download, "
+                    f"{stats['tail_s']}s after it"
+                )
+                return Path(temp_dir)
+            except Exception as e:
+                print_progress(f"Warning: Pipelined download failed ({e}), using snapshot download")
+        
+        # Imported here: the GGUF and pipelined paths never need huggingface_hub
+        try:
+            from huggingface_hub import snapshot_download
+        except ImportError:
+            raise Exception("Required packages not installed. Run: pip install huggingface-hub tqdm")
+        
+        # Real byte progress: expected size from the plan, bytes on disk by polling
+        allow_patterns = [item['path'] for item in plan['files']] if plan else None
+        expected_total = plan['bytes'] if plan else 0
+        if plan:
+            self.snapshot_digest = snapshot_digest(plan['files'])
+        reporter = ProgressReporter('download', total=expected_total, name=repo_id, span=(10, 40))
+        reporter.set_digest('streaming')
+        finished = threading.Event()
+        
+        def watch_progress():
+            while not finished.wait(0.5):
+                reporter.update(directory_size(temp_dir))
+        
+        watcher = threading.Thread(target=watch_progress, daemon=True)
+        watcher.start()
         try:
-            file_count = 0
-            def progress_callback(filename):
-                nonlocal file_count
-                file_count += 1
-                progress = 10 + min(30, (file_count * 30) // 100)
-                print_progress(f"{progress}%")
-            
             local_dir = snapshot_download(
                 repo_id=repo_id,
                 revision=revision,
                 local_dir=temp_dir,
-                ignore_patterns=["*.bin", "*.safetensors.index.json", "*.h5", "*.msgpack", 
-                               "*.ot", "*.pt", "*.pth"],
+                allow_patterns=allow_patterns,
                 resume_download=True,
                 max_workers=2
             )
-            print_progress("40%")
+            finished.set()
+            watcher.join()
+            # huggingface_hub checks LFS sha256 as each file completes
+            reporter.set_digest('verified')
+            reporter.finish()
             return Path(local_dir)
         except Exception as e:
+            finished.set()
             print_progress(f"Error downloading model: {e}")
             raise
     
@@ -300,9 +465,8 @@ class ModelConverter:
         
         return None
     
-    def convert_to_gguf(self, model_path: Path, output_path: Optional[str] = None,
-                       quantization: Optional[str] = None) -> Path:
-        """Convert model to GGUF format with progress tracking"""
+    def resolve_conversion_script(self, model_path: Path) -> Path:
+        """Conversion script for the model's architecture"""
         architecture = self.identify_architecture(model_path)
         if not architecture:
             print_progress("Warning: Could not identify architecture, using default converter")
@@ -313,23 +477,72 @@ class ModelConverter:
         
         if not script_path:
             raise RuntimeError(f"No conversion script found in {self.llama_cpp_path}")
+        return script_path
+    
+    @staticmethod
+    def supports_outtype(script_path: Path, outtype: str) -> bool:
+        """Whether the converter can write outtype itself (--outtype q8_0, f16, ...)"""
+        try:
+            source = script_path.read_text(errors='ignore')
+        except OSError:
+            return False
+        return '--outtype' in source and f'"{outtype}"' in source
+    
+    def convert_to_gguf(self, model_path: Path, output_path: Optional[str] = None,
+                       quantization: Optional[str] = None, outtype: Optional[str] = None,
+                       cache_output: bool = True) -> Path:
+        """Convert model to GGUF format with progress tracking
+        
+        Conversions are cached by snapshot digest and converter version. `outtype` writes
+        that type directly; `cache_output=False` keeps a fresh output out of the cache so
+        deleting it really frees its space.
+        """
+        script_path = self.resolve_conversion_script(model_path)
+        if outtype and not self.supports_outtype(script_path, outtype):
+            print_progress(f"Warning: {script_path.name} can't write {outtype} directly, converting to F16 first")
+            outtype, output_path = None, None
         
         if not output_path:
             output_path = str(model_path.parent / f"{model_path.name}.gguf")
         
         cmd = [sys.executable, str(script_path), str(model_path), "--outfile", output_path]
+        if outtype:
+            cmd += ["--outtype", outtype]
         
         # Don't add vocab-type for convert_hf_to_gguf.py as it doesn't support it
         
+        tool_hash = tool_fingerprint(script_path, self.llama_cpp_path / "gguf-py")
+        cache_target = f"convert-{outtype}" if outtype else 'convert'
+        # Builds from the output are keyed by what produced it, so it is never read just for a key
+        self.conversion_digest = None
+        converted_digest = None
+        if self.snapshot_digest:
+            self.conversion_digest = self.cache.derived_digest(self.snapshot_digest, cache_target, tool_hash)
+            converted_digest = self.cache.lookup(self.snapshot_digest, cache_target, tool_hash, output_path)
+        reporter = ProgressReporter('convert', name=os.path.basename(output_path), span=CONVERT_SPAN)
+        if converted_digest:
+            print_progress("Converted model found in build cache, skipping conversion")
+            reporter.total = os.path.getsize(output_path)
+            reporter.finish()
+            if quantization:
+                return self.quantize_model(Path(output_path), quantization, self.conversion_digest)
+            return Path(output_path)
+        
         print_progress(f"Converting model using {script_path.name}")
-        print_progress("50%")
+        emit_stage('convert', script=script_path.name)
+        weights = sum(f.stat().st_size for f in model_path.iterdir()
+                      if f.suffix in ('.safetensors', '.bin', '.pt', '.pth'))
+        reporter.total = estimate_output_size(weights, outtype.upper() if outtype else 'F16')
         
         try:
-            result = subprocess.run(cmd, check=True, capture_output=True, text=True)
-            print_progress("75%")
+            with watch_files(reporter, [output_path]):
+                result = subprocess.run(cmd, check=True, capture_output=True, text=True)
+            reporter.finish()
+            if self.snapshot_digest and cache_output:
+                self.cache.put(self.snapshot_digest, cache_target, tool_hash, output_path)
             
             if quantization:
-                return self.quantize_model(Path(output_path), quantization)
+                return self.quantize_model(Path(output_path), quantization, self.conversion_digest)
             
             return Path(output_path)
             
@@ -339,65 +552,182 @@ class ModelConverter:
                 print_progress(f"Error details: {e.stderr}")
             raise
     
-    def quantize_model(self, gguf_path: Path, quantization: str) -> Path:
-        """Quantize GGUF model with progress tracking"""
-        possible_paths = [
-            self.llama_cpp_path / "build" / "bin" / "llama-quantize",
-            self.llama_cpp_path / "llama-quantize",
-            self.llama_cpp_path / "quantize"
-        ]
-        
-        quantize_path = None
-        for path in possible_paths:
-            if path.exists():
-                quantize_path = path
-                break
-        
+    def quantize_model(self, gguf_path: Path, quantization, source_digest: Optional[str] = None) -> Path:
+        """Quantize GGUF model to one or more types with progress tracking; returns the first output"""
+        targets = as_targets(quantization)
+        quantize_path = find_quantize_tool(self.llama_cpp_path)
         if not quantize_path:
             print_progress("Warning: quantize tool not found, skipping quantization")
             return gguf_path
         
-        output_path = gguf_path.parent / f"{gguf_path.stem}-{quantization}.gguf"
-        
-        # Set up environment with library path for quantization
-        env = os.environ.copy()
-        lib_path = self.llama_cpp_path / "build"
-        if lib_path.exists():
-            env['DYLD_LIBRARY_PATH'] = str(lib_path)
-        
-        cmd = [str(quantize_path), str(gguf_path), str(output_path), quantization]
-        print_progress(f"Quantizing model to {quantization}")
-        print_progress("85%")
-        
+        print_progress(f"Quantizing model to {', '.join(targets)}")
+        emit_stage('quantize', quantization=','.join(targets))
+        
+        results = quantize_cached(str(gguf_path), targets, str(gguf_path.parent / gguf_path.stem),
+                                  tool=quantize_path, source_digest=source_digest, log=print_progress,
+                                  reporter=ProgressReporter('quantize', span=QUANTIZE_SPAN))
+        for result in results:
+            if not result['success']:
+                print_progress(f"Quantization to {result['quantization']} failed: {result['error']}")
+        succeeded = [Path(r['output']) for r in results if r['success']]
+        return succeeded[0] if succeeded else gguf_path
+
+
+def merge_downloaded_shards(converter: ModelConverter, first_shard: str) -> str:
+    """Merge a downloaded shard set into a single GGUF and drop the shards"""
+    shards = shard_paths(first_shard)
+    if len(shards) == 1:
+        return first_shard
+    
+    print_progress(f"Merging {len(shards)} shards into one file...")
+    emit_stage('merge', shards=len(shards))
+    with stage_slot('disk', on_wait=print_progress):
+        merged_path = merge_shards(first_shard)
+    for shard in shards:
+        converter.store.release(shard)
+    print_progress(f"Merged into {merged_path}")
+    return merged_path
+
+def convert_base_model(converter: ModelConverter, repo_id: str, revision: str, output_dir: str,
+                       quantizations: List[str], pipelined: bool = True, low_disk: bool = False) -> Path:
+    """Download a base model, convert and quantize it, and report its peak disk use
+    
+    Low-disk mode refuses to start without room for the predicted peak, holds the part of it
+    its files don't take yet in a reservation file until cleanup, has the converter write
+    Q8_0/F16/F32 itself and deletes the snapshot and the F16 intermediate as soon as each
+    has been used.
+    """
+    try:
+        snapshot = plan_snapshot(converter.tree, repo_id, revision)
+        print_progress(format_plan(snapshot))
+        snapshot_bytes = snapshot['bytes']
+    except Exception as e:
+        print_progress(f"Warning: Could not plan the snapshot ({e})")
+        snapshot, snapshot_bytes = None, 0
+    
+    outtype = None
+    if low_disk and len(quantizations) == 1 and quantizations[0] in DIRECT_OUTTYPES:
+        outtype = DIRECT_OUTTYPES[quantizations[0]]
+        default_script = converter.find_conversion_script("convert_hf_to_gguf.py")
+        if not default_script or not converter.supports_outtype(default_script, outtype):
+            outtype = None
+    plan = plan_peak(snapshot_bytes, quantizations, low_disk, direct=outtype is not None)
+    free = free_space(output_dir)
+    print_progress(f"Disk: predicted peak {format_gb(plan['peak'])}, {format_gb(free)} free"
+                   + (" (low-disk mode)" if low_disk else ""))
+    if snapshot_bytes and free < required_space(plan['peak']):
+        if low_disk:
+            raise Exception(f"Not enough free disk space: about {format_gb(required_space(plan['peak']))} "
+                            f"needed, {format_gb(free)} free")
+        low_plan = plan_peak(snapshot_bytes, quantizations, low_disk=True)
+        print_progress(f"Warning: Conversion may run out of disk space; --low-disk needs about "
+                       f"{format_gb(low_plan['peak'])}")
+    
+    temp_dir = os.path.join(output_dir, f"temp_{repo_id.replace('/', '_')}")
+    monitor = DiskMonitor([temp_dir]).start()
+    # The download preallocates its own files; hold the rest of the peak meanwhile
+    reservation = DiskReservation(output_dir, plan['peak'] - snapshot_bytes) if low_disk else None
+    
+    def hold_for(step: str):
+        """Resize the reservation to the rest of the predicted peak not yet on disk"""
         try:
-            subprocess.run(cmd, check=True, env=env)
-            print_progress("95%")
-            return output_path
-        except subprocess.CalledProcessError as e:
-            print_progress(f"Quantization failed: {e}")
-            return gguf_path
+            monitor.hold(reservation, remaining_peak(plan, step))
+        except Exception as e:
+            print_progress(f"Warning: Could not reserve disk space for {step} ({e})")
+    
+    started = time.perf_counter()
+    try:
+        try:
+            with stage_slot('network', on_wait=print_progress):
+                model_path = converter.download_model(repo_id, revision, output_dir, pipelined, snapshot)
+            print_progress("Base model downloaded, converting to GGUF...")
+        except Exception as e:
+            print_progress(f"Error downloading base model: {str(e)}")
+            print_progress("The model may be too large or require authentication")
+            sys.exit(1)
+        
+        output_prefix = str(model_path.parent / model_path.name)
+        monitor.add(f"{output_prefix}.gguf")
+        for target in quantizations:
+            monitor.add(output_path_for(output_prefix, target))
+        
+        # Conversion and quantization share one CPU slot
+        downloaded = time.perf_counter()
+        with stage_slot('cpu', on_wait=print_progress):
+            if not low_disk:
+                gguf_path = converter.convert_to_gguf(model_path, quantization=quantizations)
+            else:
+                hold_for('convert')
+                direct_output = output_path_for(output_prefix, quantizations[0]) if outtype else None
+                gguf_path = converter.convert_to_gguf(model_path, output_path=direct_output, outtype=outtype,
+                                                      cache_output=False)
+                monitor.sample()
+                shutil.rmtree(model_path)
+                print_progress("Removed downloaded snapshot")
+                if str(gguf_path) != direct_output:
+                    hold_for('quantize')
+                    intermediate = gguf_path
+                    gguf_path = converter.quantize_model(intermediate, quantizations, converter.conversion_digest)
+                    monitor.sample()
+                    if all(os.path.exists(output_path_for(output_prefix, q)) for q in quantizations):
+                        converter.store.release(str(intermediate))
+                        print_progress("Removed F16 intermediate")
+        finished = time.perf_counter()
+        print_progress(
+            f"Timing: download {downloaded - started:.1f}s, convert {finished - downloaded:.1f}s, "
+            f"total {finished - started:.1f}s"
+        )
+        
+        # Clean up temporary files
+        if model_path.exists() and model_path.is_dir():
+            monitor.sample()
+            shutil.rmtree(model_path)
+            print_progress("Cleaned up temporary files")
+    finally:
+        actual_peak = monitor.stop()  # Stopped first: its samples resize the reservation
+        if reservation:
+            reservation.release()
+    print_progress(f"Disk: predicted peak {format_gb(plan['peak'])}, actual peak {format_gb(actual_peak)}")
+    return gguf_path
 
+def plan_download(converter: ModelConverter, repo_id: str, revision: str, specific_file: Optional[str],
+                  quantization: str) -> Dict[str, Any]:
+    """What a run would fetch, without downloading: the GGUF (all shards) or the conversion snapshot"""
+    if not specific_file:
+        gguf_files = converter.check_for_gguf_files(repo_id, quantization, revision)
+        specific_file = next((f for f in gguf_files if quantization.lower() in f.lower()),
+                             gguf_files[0] if gguf_files else None)
+    if not specific_file:
+        plan = plan_snapshot(converter.tree, repo_id, revision)
+        print_progress(format_plan(plan))
+        return dict(plan, kind='snapshot')
 
-VALID_QUANT_TYPES = {
-    'Q2_K', 'Q3_K_S', 'Q3_K_M', 'Q3_K_L',
-    'Q4_0', 'Q4_K_S', 'Q4_K_M',
-    'Q5_0', 'Q5_K_S', 'Q5_K_M',
-    'Q6_K', 'Q8_0', 'F16', 'F32',
-}
+    wanted = set(shard_paths(specific_file))
+    files = [item for item in converter.tree.list_files(repo_id, revision) if item['path'] in wanted]
+    planned_bytes = sum(item.get('size', 0) for item in files)
+    print_progress(f"Planned {len(files)} GGUF files, {planned_bytes / 1e9:.2f} GB")
+    return {'kind': 'gguf', 'repo_id': repo_id, 'revision': revision, 'files': files, 'bytes': planned_bytes}
 
 def main():
     if len(sys.argv) < 4:
-        print("Usage: download_hf.py <model_id> <output_dir> <quantization>")
+        print("Usage: download_hf.py <model_id> <output_dir> <quantization[,quantization...]> [--merge-shards] [--no-pipeline] [--low-disk] [--dry-run]")
         sys.exit(1)
 
     model_id = sys.argv[1]
     output_dir = sys.argv[2]
     quantization = sys.argv[3]
+    merge_split = '--merge-shards' in sys.argv[4:]
+    pipelined = '--no-pipeline' not in sys.argv[4:]
+    low_disk = '--low-disk' in sys.argv[4:]
+    dry_run = '--dry-run' in sys.argv[4:]
 
-    # FIX: Validate quantization type to prevent shell injection downstream
-    if quantization not in VALID_QUANT_TYPES:
+    # FIX: Validate quantization type(s) to prevent shell injection downstream
+    quantizations = as_targets(quantization)
+    if not quantizations or any(q not in VALID_QUANT_TYPES for q in quantizations):
         print(f"Error: Invalid quantization type '{quantization}'")
         sys.exit(1)
+    # Pre-quantized GGUF selection uses the first type; conversion produces all of them
+    quantization = quantizations[0]
 
     # FIX: Validate model_id to safe characters (namespace/repo format)
     import re
@@ -423,16 +753,22 @@ def main():
         print_progress(f"Debug: revision = {revision}")
         print_progress(f"Debug: specific_file = {specific_file}")
         
-        if specific_file:
+        if dry_run:
+            # Last line is the plan as JSON
+            print_progress(json.dumps(plan_download(converter, repo_id, revision, specific_file, quantization)))
+        elif specific_file:
             print_progress(f"Downloading specific file: {specific_file}")
-            final_path = converter.download_gguf_direct(repo_id, specific_file, output_dir)
-            print_progress("100%")
+            with stage_slot('network', on_wait=print_progress):
+                final_path = converter.download_gguf_set(repo_id, specific_file, output_dir, revision)
+            if merge_split:
+                final_path = merge_downloaded_shards(converter, final_path)
+            emit_stage('done', path=final_path)
             print_progress("Download complete!")
         else:
             print_progress(f"Checking {repo_id} for GGUF files...")
             
             # Check for pre-converted GGUF files
-            gguf_files = converter.check_for_gguf_files(repo_id, quantization)
+            gguf_files = converter.check_for_gguf_files(repo_id, quantization, revision)
             
             if gguf_files:
                 print_progress(f"Found {len(gguf_files)} compatible GGUF files")
@@ -446,36 +782,29 @@ def main():
                     selected_file = gguf_files[0]
                 
                 print_progress(f"Downloading {selected_file}")
-                final_path = converter.download_gguf_direct(repo_id, selected_file, output_dir)
-                print_progress("100%")
+                with stage_slot('network', on_wait=print_progress):
+                    final_path = converter.download_gguf_set(repo_id, selected_file, output_dir, revision)
+                if merge_split:
+                    final_path = merge_downloaded_shards(converter, final_path)
+                emit_stage('done', path=final_path)
                 print_progress("Download complete!")
             else:
                 print_progress("No pre-quantized GGUF files found")
                 print_progress("Downloading base model for local conversion...")
                 
-                try:
-                    model_path = converter.download_model(repo_id, revision, output_dir)
-                    print_progress("Base model downloaded, converting to GGUF...")
-                except Exception as e:
-                    print_progress(f"Error downloading base model: {str(e)}")
-                    print_progress("The model may be too large or require authentication")
-                    sys.exit(1)
-                
-                gguf_path = converter.convert_to_gguf(model_path, quantization=quantization)
-                print_progress("100%")
+                gguf_path = convert_base_model(converter, repo_id, revision, output_dir, quantizations,
+                                               pipelined, low_disk)
+                emit_stage('done', path=str(gguf_path))
                 if quantization and not gguf_path.name.endswith(f"-{quantization}.gguf"):
                     print_progress("Model converted successfully! (Quantization optional)")
                 else:
                     print_progress("Model converted and quantized successfully!")
-                
-                # Clean up temporary files
-                if model_path.exists() and model_path.is_dir():
-                    shutil.rmtree(model_path)
-                    print_progress("Cleaned up temporary files")
         
     except Exception as e:
         print_progress(f"Error: {str(e)}")
         sys.exit(1)
+    finally:
+        report_stats(print_progress)
 
 
 if __name__ == "__main__":
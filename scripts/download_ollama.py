@@ -8,12 +8,25 @@ import os
 import sys
 import json
 import requests
-import hashlib
-import subprocess
 import shutil
+import time
 from pathlib import Path
 from typing import Optional, Dict, Any
 
+from range_download import DigestMismatch, SegmentedDownloader, has_partial
+from blob_store import BlobStore, normalize_digest
+from digest_cache import digest_cache, hash_file
+from ollama_local import OllamaLocalStore
+from job_slots import stage_slot
+from transport import shared_session, report_stats
+from toolchain import find_llama_cpp
+from progress import ProgressReporter, emit_stage
+from quantize import VALID_QUANT_TYPES, as_targets, find_quantize_tool, quantize_cached
+
+# Parts of the overall job bar when the download is followed by quantization
+DOWNLOAD_SPAN = (0, 70)
+QUANTIZE_SPAN = (70, 100)
+
 def print_progress(message):
     """Print progress messages that the Electron app can parse"""
     print(message, flush=True)
@@ -21,38 +34,20 @@ def print_progress(message):
 class OllamaDownloader:
     """Downloads models from Ollama's registry"""
     
-    REGISTRY_URL = "https://registry.ollama.ai"
+    REGISTRY_URL = os.environ.get("LLAMA_WRANGLER_OLLAMA_REGISTRY", "https://registry.ollama.ai")
     API_URL = "https://ollama.ai/api"
     
-    def __init__(self, llama_cpp_path: Optional[str] = None):
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Llama-Wrangler/1.0'
-        })
+    def __init__(self, llama_cpp_path: Optional[str] = None, connections: Optional[int] = None,
+                 use_local: bool = True):
+        self.connections = connections
+        self.session = shared_session()  # Pooled, with retries and the Llama-Wrangler User-Agent
         self.llama_cpp_path = self._find_llama_cpp(llama_cpp_path)
+        self.store = BlobStore()
+        self.local = OllamaLocalStore() if use_local else None  # Models a local Ollama already pulled
     
     def _find_llama_cpp(self, custom_path: Optional[str] = None) -> Optional[Path]:
-        """Find llama.cpp installation"""
-        if custom_path:
-            path = Path(custom_path)
-            if path.exists():
-                return path
-        
-        # Check common locations - SAME AS HUGGINGFACE SCRIPT
-        home = Path.home()
-        paths_to_check = [
-            home / ".llama-wrangler" / "llama.cpp",
-            home / ".METALlama.cpp",  # METALlama installation
-            Path.cwd() / "llama.cpp",
-            home / "llama.cpp",
-            Path("/usr/local/llama.cpp"),
-        ]
-        
-        for path in paths_to_check:
-            if path.exists():
-                return path
-        
-        return None
+        """Find llama.cpp installation (same locations as the HuggingFace script, cached)"""
+        return find_llama_cpp(custom_path)
     
     def parse_model_name(self, model_name: str) -> tuple[str, str]:
         """Parse model name into namespace/model:tag format"""
@@ -106,100 +101,110 @@ class OllamaDownloader:
         
         return model_layer
     
-    def download_blob(self, model_path: str, digest: str, size: int, output_path: str) -> str:
-        """Download a blob from the registry"""
+    def import_local_blob(self, digest: str, size: int) -> Optional[str]:
+        """Place a layer a local Ollama already has into the blob store; returns the strategy or None"""
+        if not self.local:
+            return None
+        local_path = self.local.blob_path(digest, size)
+        if not local_path:
+            return None
+        # Hardlink or reflink shares Ollama's data blocks; a copy only across filesystems
+        return self.store.adopt(str(local_path), digest)
+    
+    def download_blob(self, model_path: str, digest: str, size: int, output_path: str,
+                      span=(0, 100)) -> str:
+        """Download a blob from the registry, verifying its digest as it streams
+
+        `span` is the part of the overall job bar the download covers.
+        """
         blob_url = f"{self.REGISTRY_URL}/v2/{model_path}/blobs/{digest}"
         
         print_progress(f"Downloading model ({size / 1e9:.2f} GB)")
-        
-        response = self.session.get(blob_url, stream=True)
-        response.raise_for_status()
-        
-        downloaded = 0
-        chunk_size = 8192
-        
-        with open(output_path, 'wb') as f:
-            for chunk in response.iter_content(chunk_size=chunk_size):
-                if chunk:
-                    f.write(chunk)
-                    downloaded += len(chunk)
-                    percentage = int((downloaded / size) * 100)
-                    print_progress(f"{percentage}%")
+        if has_partial(output_path):
+            print_progress("Resuming interrupted download")
+        
+        reporter = ProgressReporter('download', total=size, name=model_path, span=span)
+        downloader = SegmentedDownloader(
+            session=self.session,
+            connections=self.connections,
+            progress_callback=reporter
+        )
+        reporter.set_digest('streaming')
+        with stage_slot('network', on_wait=print_progress):
+            try:
+                downloader.download(blob_url, output_path, expected_size=size, expected_sha256=digest)
+            except DigestMismatch:
+                reporter.set_digest('mismatch')
+                raise
+        reporter.set_digest('verified')
+        reporter.finish()
         
         return output_path
     
     def verify_download(self, file_path: str, expected_digest: str) -> bool:
-        """Verify the downloaded file matches the expected digest"""
-        print_progress("Verifying download...")
-        
-        sha256_hash = hashlib.sha256()
-        with open(file_path, "rb") as f:
-            for byte_block in iter(lambda: f.read(4096), b""):
-                sha256_hash.update(byte_block)
-        
-        actual_digest = f"sha256:{sha256_hash.hexdigest()}"
-        return actual_digest == expected_digest
+        """Verify the downloaded file matches the expected digest
+        
+        A file verified before (same inode, size and mtime) is not hashed again.
+        """
+        cache = digest_cache()
+        digest = cache.get(file_path)
+        if digest is None:
+            print_progress("Verifying download...")
+            emit_stage('verify')
+            reporter = ProgressReporter('verify', total=os.path.getsize(file_path), name=os.path.basename(file_path))
+            digest = hash_file(file_path, progress=reporter)
+            cache.record(file_path, digest)
+        return digest == normalize_digest(expected_digest)
     
-    def quantize_model(self, gguf_path: str, quantization: str) -> str:
-        """Quantize GGUF model - EXACT COPY FROM HUGGINGFACE SCRIPT"""
+    def quantize_model(self, gguf_path: str, quantization, source_digest: Optional[str] = None) -> str:
+        """Quantize GGUF model to one or more types ('Q4_K_M' or 'Q4_K_M,Q8_0'); returns the first output
+        
+        Builds are cached by source digest and quantizer version, so repeats link instantly.
+        """
+        targets = as_targets(quantization)
         if not self.llama_cpp_path:
-            print_progress(f"Warning: llama.cpp not found, skipping quantization to {quantization}")
+            print_progress(f"Warning: llama.cpp not found, skipping quantization to {', '.join(targets)}")
             return gguf_path
         
-        # EXACT SAME PATHS AS HUGGINGFACE
-        possible_paths = [
-            self.llama_cpp_path / "build" / "bin" / "llama-quantize",
-            self.llama_cpp_path / "llama-quantize",
-            self.llama_cpp_path / "quantize"
-        ]
-        
-        quantize_path = None
-        for path in possible_paths:
-            if path.exists():
-                quantize_path = path
-                break
-        
+        quantize_path = find_quantize_tool(self.llama_cpp_path)
         if not quantize_path:
             print_progress("Warning: quantize tool not found, skipping quantization")
             return gguf_path
         
         input_path = Path(gguf_path)
-        output_path = input_path.parent / f"{input_path.stem}-{quantization}.gguf"
-        
-        # EXACT SAME ENV SETUP AS HUGGINGFACE
-        env = os.environ.copy()
-        lib_path = self.llama_cpp_path / "build"
-        if lib_path.exists():
-            env['DYLD_LIBRARY_PATH'] = str(lib_path)
-        
-        cmd = [str(quantize_path), str(gguf_path), str(output_path), quantization]
-        print_progress(f"Quantizing model to {quantization}")
-        
-        try:
-            print_progress(f"Running quantize command: {' '.join(cmd)}")
-            result = subprocess.run(cmd, check=True, env=env, capture_output=True, text=True)
-            print_progress(f"Quantize stdout: {result.stdout[:200] if result.stdout else 'none'}")
-            print_progress(f"Model quantized to {quantization}")
-            # Remove original to save space
-            if output_path.exists():
-                print_progress(f"Quantized file exists, removing original: {gguf_path}")
-                os.remove(gguf_path)
-                print_progress("Original removed successfully")
-            else:
-                print_progress(f"WARNING: Quantized file does not exist at {output_path}")
-            return str(output_path)
-        except subprocess.CalledProcessError as e:
-            print_progress(f"Quantization failed: {e}")
-            if e.stderr:
-                print_progress(f"Stderr: {e.stderr}")
+        print_progress(f"Quantizing model to {', '.join(targets)}")
+        emit_stage('quantize', quantization=','.join(targets))
+        
+        # All targets run from the same page-cached source in one CPU slot
+        with stage_slot('cpu', on_wait=print_progress):
+            results = quantize_cached(str(gguf_path), targets, str(input_path.parent / input_path.stem),
+                                      tool=quantize_path, source_digest=source_digest, log=print_progress,
+                                      reporter=ProgressReporter('quantize', span=QUANTIZE_SPAN))
+        
+        for result in results:
+            if not result['success']:
+                print_progress(f"Quantization to {result['quantization']} failed")
+                print_progress(f"Stderr: {result['error']}")
+        succeeded = [r['output'] for r in results if r['success']]
+        if not succeeded:
             return gguf_path
+        if len(succeeded) == len(results):
+            # Remove original to save space
+            print_progress(f"Quantized files exist, removing original: {gguf_path}")
+            self.store.release(gguf_path, source_digest)
+            print_progress("Original removed successfully")
+        return succeeded[0]
     
     def download_model(self, model_name: str, output_dir: str, quantization: Optional[str] = None) -> str:
         """Download an Ollama model and save as GGUF"""
         model_path, tag = self.parse_model_name(model_name)
         
-        # Get manifest
-        manifest = self.get_manifest(model_path, tag)
+        # Get manifest: a tag a local Ollama has pulled resolves without the registry
+        manifest = self.local.get_manifest(model_path, tag) if self.local else None
+        if manifest:
+            print_progress(f"Using local Ollama manifest for {model_path}:{tag}")
+        else:
+            manifest = self.get_manifest(model_path, tag)
         
         # Find model layer
         model_layer = self.find_model_layer(manifest)
@@ -209,71 +214,96 @@ class OllamaDownloader:
         # Prepare output filename
         safe_name = model_name.replace('/', '_').replace(':', '_')
         
-        # Check if quantized version already exists
+        # Check if quantized versions already exist
         if quantization:
-            quantized_path = os.path.join(output_dir, f"{safe_name}-{quantization}.gguf")
-            if os.path.exists(quantized_path):
-                print_progress(f"Quantized model already exists at {quantized_path}")
-                return quantized_path
+            targets = as_targets(quantization)
+            quantized_paths = [os.path.join(output_dir, f"{safe_name}-{q}.gguf") for q in targets]
+            missing = [q for q, path in zip(targets, quantized_paths) if not os.path.exists(path)]
+            if not missing:
+                print_progress(f"Quantized model already exists at {quantized_paths[0]}")
+                return quantized_paths[0]
             
             # Also check if original exists and already has quantization in name
             original_path = os.path.join(output_dir, f"{safe_name}.gguf")
             if os.path.exists(original_path):
-                print_progress(f"Found existing model at {original_path}, will quantize to {quantization}")
-                return self.quantize_model(original_path, quantization)
+                print_progress(f"Found existing model at {original_path}, will quantize to {', '.join(missing)}")
+                result = self.quantize_model(original_path, missing, model_layer['digest'])
+                # The first requested type may have been there already or may have failed
+                return quantized_paths[0] if os.path.exists(quantized_paths[0]) else result
         
         output_path = os.path.join(output_dir, f"{safe_name}.gguf")
+        digest = model_layer['digest']
         
         # Check if already downloaded
         if os.path.exists(output_path):
             print_progress(f"Model already exists at {output_path}")
-            # Verify it's valid
-            if self.verify_download(output_path, model_layer['digest']):
+            # Verify it's valid (a link into the blob store was verified when stored)
+            if self.store.is_linked(digest, output_path) or self.verify_download(output_path, digest):
                 print_progress("Existing model verified")
+                if self.store.shares_device(output_path):
+                    self.store.ingest(output_path, digest)
                 # Quantize if needed
                 if quantization:
-                    return self.quantize_model(output_path, quantization)
+                    return self.quantize_model(output_path, quantization, digest)
                 return output_path
             else:
                 print_progress("Existing model corrupt, re-downloading")
                 os.remove(output_path)
         
-        # Download the model
-        self.download_blob(
-            model_path,
-            model_layer['digest'],
-            model_layer['size'],
-            output_path
-        )
-        
-        # Verify download
-        if not self.verify_download(output_path, model_layer['digest']):
-            os.remove(output_path)
-            raise Exception("Downloaded file is corrupt")
-        
+        # Same weights already fetched under another name: link, no network needed
+        if self.store.has(digest):
+            strategy = self.store.link(digest, output_path)
+            print_progress(f"Model found in blob store, linked to {output_path} ({strategy})")
+            if quantization:
+                return self.quantize_model(output_path, quantization, digest)
+            return output_path
+        
+        # Already pulled by a local Ollama: import it, no network needed
+        started = time.perf_counter()
+        strategy = self.import_local_blob(digest, model_layer['size'])
+        if strategy:
+            self.store.link(digest, output_path)
+            print_progress(f"Imported model from local Ollama store to {output_path} "
+                           f"({strategy}, {(time.perf_counter() - started) * 1000:.0f} ms)")
+            if quantization:
+                return self.quantize_model(output_path, quantization, digest)
+            return output_path
+        
+        # Download the model (digest is checked inline before the blob is moved into place).
+        # A store on another filesystem could only be linked out by copying, so the blob
+        # then goes straight to output_path instead of taking twice the disk
+        in_store = self.store.shares_device(output_path)
+        try:
+            self.download_blob(
+                model_path,
+                digest,
+                model_layer['size'],
+                str(self.store.path_for(digest)) if in_store else output_path,
+                span=DOWNLOAD_SPAN if quantization else (0, 100)
+            )
+        except DigestMismatch as e:
+            raise Exception(f"Downloaded file is corrupt ({e})")
+        
+        if in_store:
+            self.store.link(digest, output_path)
         print_progress("Download verified")
         
         # Quantize if requested
         if quantization:
-            return self.quantize_model(output_path, quantization)
+            return self.quantize_model(output_path, quantization, digest)
         
         return output_path
 
-VALID_QUANT_TYPES = {
-    'Q2_K', 'Q3_K_S', 'Q3_K_M', 'Q3_K_L',
-    'Q4_0', 'Q4_K_S', 'Q4_K_M',
-    'Q5_0', 'Q5_K_S', 'Q5_K_M',
-    'Q6_K', 'Q8_0', 'F16', 'F32',
-}
-
 def main():
-    if len(sys.argv) < 3:
-        print("Usage: download_ollama.py <model_name> <output_dir> [quantization]")
+    positional = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    if len(positional) < 2:
+        print("Usage: download_ollama.py <model_name> <output_dir> [quantization[,quantization...]] [--no-local]")
         sys.exit(1)
 
-    model_name = sys.argv[1]
-    output_dir = sys.argv[2]
-    quantization = sys.argv[3] if len(sys.argv) > 3 else None
+    model_name = positional[0]
+    output_dir = positional[1]
+    quantization = positional[2] if len(positional) > 2 else None
+    use_local = '--no-local' not in sys.argv[1:]
 
     # FIX: Validate model_name to safe characters (library/name:tag format)
     import re
@@ -281,10 +311,11 @@ def main():
         print("Error: Invalid model name format")
         sys.exit(1)
 
-    # FIX: Validate quantization type
-    if quantization and quantization not in VALID_QUANT_TYPES:
-        print(f"Error: Invalid quantization type '{quantization}'")
-        sys.exit(1)
+    # FIX: Validate quantization type(s)
+    for target in as_targets(quantization):
+        if target not in VALID_QUANT_TYPES:
+            print(f"Error: Invalid quantization type '{target}'")
+            sys.exit(1)
 
     # FIX: Resolve output_dir and ensure it exists under home to prevent path traversal
     output_dir = str(Path(output_dir).resolve())
@@ -297,10 +328,10 @@ def main():
     os.makedirs(output_dir, exist_ok=True)
     
     try:
-        downloader = OllamaDownloader()
+        downloader = OllamaDownloader(use_local=use_local)
         output_path = downloader.download_model(model_name, output_dir, quantization)
         
-        print_progress("100%")
+        emit_stage('done', path=output_path)
         print_progress(f"Model saved to: {output_path}")
         if quantization:
             print_progress(f"Model quantized to {quantization}")
@@ -309,6 +340,8 @@ def main():
     except Exception as e:
         print_progress(f"Error: {str(e)}")
         sys.exit(1)
+    finally:
+        report_stats(print_progress)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+GGUF page-cache prefetch for Llama Wrangler
+Reads a model's tensor region into the page cache ahead of llama-server (parallel
+sequential reads or posix_fadvise over the GGUF tensor table), skipping what is already
+resident, and reports page-cache residency measured with mincore
+"""
+
+import os
+import sys
+import json
+import mmap
+import time
+import ctypes
+import ctypes.util
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, List, Tuple
+
+from gguf_reader import read_gguf
+from gguf_split import shard_paths
+from quantize import available_memory
+
+CHUNK_SIZE = 64 * 1024 * 1024  # Unit of work and of residency checks
+READ_BLOCK = 4 * 1024 * 1024
+DEFAULT_WORKERS = 4
+FREE_MEMORY_HEADROOM = 1024 * 1024 * 1024  # Left untouched by background prefetch
+
+PAGE_SIZE = mmap.PAGESIZE
+
+
+def _load_libc():
+    """libc with mmap/mincore prototypes, or None where mincore isn't available"""
+    if sys.platform == 'win32':
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        libc.mmap.restype = ctypes.c_void_p
+        libc.mmap.argtypes = [ctypes.c_void_p, ctypes.c_size_t, ctypes.c_int, ctypes.c_int,
+                              ctypes.c_int, ctypes.c_int64]
+        libc.munmap.argtypes = [ctypes.c_void_p, ctypes.c_size_t]
+        libc.mincore.argtypes = [ctypes.c_void_p, ctypes.c_size_t, ctypes.c_void_p]
+        return libc
+    except (OSError, AttributeError):
+        return None
+
+
+_libc = _load_libc()
+
+
+def resident_bytes(fd: int, start: int, end: int) -> Optional[int]:
+    """Bytes of [start, end) currently in the page cache, or None if mincore is unavailable"""
+    if _libc is None or end <= start:
+        return None if _libc is None else 0
+    aligned = start - start % PAGE_SIZE
+    length = end - aligned
+    addr = _libc.mmap(None, length, mmap.PROT_READ, mmap.MAP_SHARED, fd, aligned)
+    if addr in (None, ctypes.c_void_p(-1).value):
+        return None
+    try:
+        pages = -(-length // PAGE_SIZE)
+        vec = (ctypes.c_ubyte * pages)()
+        if _libc.mincore(addr, length, vec) != 0:
+            return None
+        resident = pages - bytes(vec).count(0)  # Non-zero entries are resident pages
+    finally:
+        _libc.munmap(addr, length)
+    return min(resident * PAGE_SIZE, end - start)
+
+
+def free_memory() -> int:
+    """Bytes of RAM not used by anything, page cache included (MemFree on Linux)
+
+    Prefetching into truly free memory can't push the running model out of the cache.
+    """
+    try:
+        with open('/proc/meminfo', 'r') as f:
+            for line in f:
+                if line.startswith('MemFree:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        return os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_AVPHYS_PAGES')
+    except (ValueError, OSError, AttributeError):
+        return 0
+
+
+def tensor_region(path: str) -> Tuple[int, int]:
+    """(start, end) of the tensor data in a GGUF file"""
+    gguf = read_gguf(path)
+    spans = gguf.tensor_spans()
+    if not spans:
+        return gguf.data_offset, gguf.size
+    return spans[0][0], spans[-1][1]
+
+
+def model_files(path: str) -> List[str]:
+    """Every file llama-server maps for this model (all shards of a split GGUF)"""
+    return shard_paths(path)
+
+
+def plan_chunks(path: str) -> List[Tuple[str, int, int]]:
+    chunks = []
+    for file in model_files(path):
+        start, end = tensor_region(file)
+        for offset in range(start, end, CHUNK_SIZE):
+            chunks.append((file, offset, min(offset + CHUNK_SIZE, end)))
+    return chunks
+
+
+def _read_chunk(fd: int, start: int, end: int):
+    buf = bytearray(READ_BLOCK)
+    view = memoryview(buf)
+    offset = start
+    while offset < end:
+        count = os.preadv(fd, [view[:min(READ_BLOCK, end - offset)]], offset)
+        if count <= 0:
+            break
+        offset += count
+
+
+def residency(path: str) -> Dict[str, Any]:
+    """Page-cache residency of a model's tensor data"""
+    total = 0
+    resident = 0
+    known = True
+    for file, start, end in plan_chunks(path):
+        fd = os.open(file, os.O_RDONLY)
+        try:
+            count = resident_bytes(fd, start, end)
+        finally:
+            os.close(fd)
+        total += end - start
+        if count is None:
+            known = False
+        else:
+            resident += count
+    return {
+        'path': path,
+        'data_bytes': total,
+        'resident_bytes': resident if known else None,
+        'resident_percent': round(resident * 100 / total, 1) if known and total else None,
+    }
+
+
+def prefetch(path: str, method: str = 'read', workers: int = DEFAULT_WORKERS,
+             budget: Optional[int] = None) -> Dict[str, Any]:
+    """Bring a model's tensor data into the page cache; returns before/after residency
+
+    'read' issues parallel sequential reads (works everywhere and completes before
+    returning); 'advise' only queues kernel readahead with posix_fadvise(WILLNEED).
+    Chunks already resident are skipped, and at most `budget` bytes are read.
+    """
+    if method == 'advise' and not hasattr(os, 'posix_fadvise'):
+        method = 'read'
+    started = time.perf_counter()
+    chunks = plan_chunks(path)
+    fds = {file: os.open(file, os.O_RDONLY) for file in {c[0] for c in chunks}}
+    try:
+        todo = []
+        resident_before = 0
+        for file, start, end in chunks:
+            count = resident_bytes(fds[file], start, end)
+            resident_before += count or 0
+            if count is None or count < end - start:
+                todo.append((file, start, end, end - start - (count or 0)))
+
+        # Read in file order so the start of the model is warm first if the budget runs out
+        selected = []
+        planned = 0
+        for file, start, end, missing in todo:
+            if budget is not None and planned + missing > budget:
+                break
+            selected.append((file, start, end))
+            planned += missing
+
+        if hasattr(os, 'posix_fadvise'):
+            for fd in fds.values():
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+
+        def work(chunk):
+            file, start, end = chunk
+            if method == 'advise':
+                os.posix_fadvise(fds[file], start, end - start, os.POSIX_FADV_WILLNEED)
+            else:
+                _read_chunk(fds[file], start, end)
+
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            list(pool.map(work, selected))
+        elapsed = time.perf_counter() - started
+    finally:
+        for fd in fds.values():
+            os.close(fd)
+
+    after = residency(path)
+    return {
+        'path': path,
+        'method': method,
+        'data_bytes': after['data_bytes'],
+        'resident_before': resident_before if _libc else None,
+        'resident_after': after['resident_bytes'],
+        'resident_percent': after['resident_percent'],
+        'prefetched': planned,
+        'chunks': len(selected),
+        'budget_limited': len(selected) < len(todo),
+        'seconds': round(elapsed, 2),
+        'rate_mbps': round(planned / elapsed / 1e6, 1) if elapsed > 0 else None,
+    }
+
+
+def main():
+    # gguf_prefetch.py <model.gguf> [--status] [--advise] [--workers N] [--background]
+    # Prints one JSON line; --background limits reads to free (not cached) memory
+    args = list(sys.argv[1:])
+    workers = DEFAULT_WORKERS
+    if '--workers' in args:
+        index = args.index('--workers')
+        workers = int(args[index + 1]) if index + 1 < len(args) else DEFAULT_WORKERS
+        del args[index:index + 2]
+    paths = [arg for arg in args if not arg.startswith('--')]
+    if not paths:
+        print("Usage: gguf_prefetch.py <model.gguf> [--status] [--advise] [--workers N] [--background]")
+        sys.exit(1)
+
+    try:
+        if '--status' in args:
+            result = residency(paths[0])
+        else:
+            # Never read more than fits: background runs use only free RAM, foreground runs
+            # may also reclaim cache
+            if '--background' in args:
+                budget = max(0, free_memory() - FREE_MEMORY_HEADROOM)
+            else:
+                budget = available_memory() or None
+            result = prefetch(paths[0], 'advise' if '--advise' in args else 'read', workers, budget)
+    except (OSError, ValueError) as e:
+        print(json.dumps({'path': paths[0], 'error': str(e)}))
+        sys.exit(1)
+    print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
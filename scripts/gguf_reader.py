@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+GGUF metadata reader for Llama Wrangler
+Memory-maps a GGUF file and parses its header, key/value metadata and tensor table
+without touching tensor data, so even 100 GB files are inspected in milliseconds
+"""
+
+import os
+import sys
+import json
+import mmap
+import struct
+from typing import Optional, Dict, Any, List
+
+GGUF_MAGIC = b"GGUF"
+DEFAULT_ALIGNMENT = 32
+MAX_INLINE_ARRAY = 64  # Larger arrays (token lists etc.) are summarised, not materialised
+
+# GGUF metadata value types
+UINT8, INT8, UINT16, INT16, UINT32, INT32, FLOAT32, BOOL, STRING, ARRAY, UINT64, INT64, FLOAT64 = range(13)
+
+SCALAR_FORMATS = {
+    UINT8: '<B', INT8: '<b', UINT16: '<H', INT16: '<h',
+    UINT32: '<I', INT32: '<i', FLOAT32: '<f', BOOL: '<?',
+    UINT64: '<Q', INT64: '<q', FLOAT64: '<d',
+}
+
+# ggml_type ids as stored per tensor
+GGML_TYPES = {
+    0: "F32", 1: "F16", 2: "Q4_0", 3: "Q4_1", 6: "Q5_0", 7: "Q5_1", 8: "Q8_0", 9: "Q8_1",
+    10: "Q2_K", 11: "Q3_K", 12: "Q4_K", 13: "Q5_K", 14: "Q6_K", 15: "Q8_K",
+    16: "IQ2_XXS", 17: "IQ2_XS", 18: "IQ3_XXS", 19: "IQ1_S", 20: "IQ4_NL", 21: "IQ3_S",
+    22: "IQ2_S", 23: "IQ4_XS", 24: "I8", 25: "I16", 26: "I32", 27: "I64", 28: "F64",
+    29: "IQ1_M", 30: "BF16", 34: "TQ1_0", 35: "TQ2_0",
+}
+
+# llama_ftype ids as stored in general.file_type
+FILE_TYPES = {
+    0: "F32", 1: "F16", 2: "Q4_0", 3: "Q4_1", 7: "Q8_0", 8: "Q5_0", 9: "Q5_1",
+    10: "Q2_K", 11: "Q3_K_S", 12: "Q3_K_M", 13: "Q3_K_L", 14: "Q4_K_S", 15: "Q4_K_M",
+    16: "Q5_K_S", 17: "Q5_K_M", 18: "Q6_K", 19: "IQ2_XXS", 20: "IQ2_XS", 21: "Q2_K_S",
+    22: "IQ3_XS", 23: "IQ3_XXS", 24: "IQ1_S", 25: "IQ4_NL", 26: "IQ3_S", 27: "IQ3_M",
+    28: "IQ2_S", 29: "IQ2_M", 30: "IQ4_XS", 31: "IQ1_M", 32: "BF16", 36: "TQ1_0", 37: "TQ2_0",
+}
+
+
+class GGUFTensor:
+    """One entry of the tensor table; offset is relative to the data section"""
+
+    __slots__ = ('name', 'shape', 'type_id', 'offset')
+
+    def __init__(self, name: str, shape: List[int], type_id: int, offset: int):
+        self.name = name
+        self.shape = shape
+        self.type_id = type_id
+        self.offset = offset
+
+    @property
+    def type_name(self) -> str:
+        return GGML_TYPES.get(self.type_id, f"TYPE_{self.type_id}")
+
+    @property
+    def n_elements(self) -> int:
+        count = 1
+        for dim in self.shape:
+            count *= dim
+        return count
+
+
+class GGUFFile:
+    """Parsed header of a GGUF file"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.size = 0
+        self.version = 0
+        self.metadata: Dict[str, Any] = {}
+        self.kv_spans: Dict[str, tuple] = {}  # Raw (start, end) bytes of each key/value pair
+        self.tensors: List[GGUFTensor] = []
+        self.alignment = DEFAULT_ALIGNMENT
+        self.data_offset = 0
+        self._parse()
+
+    def _parse(self):
+        with open(self.path, 'rb') as f:
+            self.size = os.fstat(f.fileno()).st_size
+            if self.size < 24:
+                raise ValueError(f"Not a GGUF file (too small): {self.path}")
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+                self._parse_buffer(buf)
+
+    def _parse_buffer(self, buf):
+        if buf[0:4] != GGUF_MAGIC:
+            raise ValueError(f"Not a GGUF file (bad magic): {self.path}")
+
+        self.version = struct.unpack_from('<I', buf, 4)[0]
+        if self.version == 1:
+            # v1 used 32-bit counts and lengths; v2+ widened them to 64-bit
+            tensor_count, kv_count = struct.unpack_from('<II', buf, 8)
+            self._len_fmt, self._len_size = '<I', 4
+            offset = 16
+        else:
+            tensor_count, kv_count = struct.unpack_from('<QQ', buf, 8)
+            self._len_fmt, self._len_size = '<Q', 8
+            offset = 24
+
+        for _ in range(kv_count):
+            kv_start = offset
+            key, offset = self._read_string(buf, offset)
+            value_type = struct.unpack_from('<I', buf, offset)[0]
+            value, offset = self._read_value(buf, offset + 4, value_type)
+            self.metadata[key] = value
+            self.kv_spans[key] = (kv_start, offset)
+
+        for _ in range(tensor_count):
+            name, offset = self._read_string(buf, offset)
+            n_dims = struct.unpack_from('<I', buf, offset)[0]
+            offset += 4
+            shape = list(struct.unpack_from(f'<{n_dims}{self._len_fmt[1]}', buf, offset))
+            offset += n_dims * self._len_size
+            type_id, tensor_offset = struct.unpack_from('<IQ', buf, offset)
+            offset += 12
+            self.tensors.append(GGUFTensor(name, shape, type_id, tensor_offset))
+
+        alignment = self.metadata.get('general.alignment', DEFAULT_ALIGNMENT)
+        self.alignment = alignment if isinstance(alignment, int) and alignment > 0 else DEFAULT_ALIGNMENT
+        self.data_offset = -(-offset // self.alignment) * self.alignment
+
+    def _read_string(self, buf, offset: int):
+        length = struct.unpack_from(self._len_fmt, buf, offset)[0]
+        offset += self._len_size
+        return bytes(buf[offset:offset + length]).decode('utf-8', errors='replace'), offset + length
+
+    def _read_value(self, buf, offset: int, value_type: int):
+        if value_type in SCALAR_FORMATS:
+            fmt = SCALAR_FORMATS[value_type]
+            return struct.unpack_from(fmt, buf, offset)[0], offset + struct.calcsize(fmt)
+        if value_type == STRING:
+            return self._read_string(buf, offset)
+        if value_type == ARRAY:
+            item_type = struct.unpack_from('<I', buf, offset)[0]
+            count = struct.unpack_from(self._len_fmt, buf, offset + 4)[0]
+            offset += 4 + self._len_size
+            if count > MAX_INLINE_ARRAY:
+                return {'array_type': item_type, 'count': count}, self._skip_array(buf, offset, item_type, count)
+            items = []
+            for _ in range(count):
+                item, offset = self._read_value(buf, offset, item_type)
+                items.append(item)
+            return items, offset
+        raise ValueError(f"Unknown GGUF value type {value_type} in {self.path}")
+
+    def _skip_array(self, buf, offset: int, item_type: int, count: int) -> int:
+        """Advance past an array without building Python objects for its items"""
+        if item_type in SCALAR_FORMATS:
+            return offset + count * struct.calcsize(SCALAR_FORMATS[item_type])
+        if item_type == STRING:
+            unpack, step = struct.Struct(self._len_fmt).unpack_from, self._len_size
+            for _ in range(count):
+                offset += step + unpack(buf, offset)[0]
+            return offset
+        for _ in range(count):
+            _, offset = self._read_value(buf, offset, item_type)
+        return offset
+
+    @property
+    def architecture(self) -> Optional[str]:
+        return self.metadata.get('general.architecture')
+
+    def arch_value(self, key: str, default=None):
+        """Look up an architecture-scoped key such as '<arch>.context_length'"""
+        return self.metadata.get(f"{self.architecture}.{key}", default)
+
+    @property
+    def parameter_count(self) -> int:
+        return sum(t.n_elements for t in self.tensors)
+
+    def tensor_types(self) -> Dict[str, int]:
+        """Number of tensors stored in each ggml type"""
+        counts: Dict[str, int] = {}
+        for tensor in self.tensors:
+            counts[tensor.type_name] = counts.get(tensor.type_name, 0) + 1
+        return counts
+
+    def tensor_spans(self) -> List[tuple]:
+        """Absolute (start, end) byte ranges of each tensor's data, in file order"""
+        starts = sorted(self.data_offset + t.offset for t in self.tensors)
+        return [(start, end) for start, end in zip(starts, starts[1:] + [self.size])]
+
+    @property
+    def quantization(self) -> str:
+        """Model quantization from general.file_type, else the dominant tensor type"""
+        file_type = self.metadata.get('general.file_type')
+        if isinstance(file_type, int) and file_type in FILE_TYPES:
+            return FILE_TYPES[file_type]
+        weights: Dict[str, int] = {}
+        for tensor in self.tensors:
+            if len(tensor.shape) > 1:
+                weights[tensor.type_name] = weights.get(tensor.type_name, 0) + tensor.n_elements
+        return max(weights, key=weights.get) if weights else "GGUF"
+
+    def summary(self) -> Dict[str, Any]:
+        """Model facts used by the model list, quant selection and launch tuning"""
+        return {
+            'path': self.path,
+            'size': self.size,
+            'version': self.version,
+            'name': self.metadata.get('general.name'),
+            'architecture': self.architecture,
+            'quantization': self.quantization,
+            'context_length': self.arch_value('context_length'),
+            'embedding_length': self.arch_value('embedding_length'),
+            'block_count': self.arch_value('block_count'),
+            'head_count': self.arch_value('attention.head_count'),
+            'head_count_kv': self.arch_value('attention.head_count_kv'),
+            'expert_count': self.arch_value('expert_count'),
+            'parameter_count': self.parameter_count,
+            'tensor_count': len(self.tensors),
+            'tensor_types': self.tensor_types(),
+            'data_offset': self.data_offset,
+            'split_count': self.metadata.get('split.count'),
+            'split_no': self.metadata.get('split.no'),
+        }
+
+
+def read_gguf(path: str) -> GGUFFile:
+    """Parse a GGUF file's header and tensor table"""
+    return GGUFFile(path)
+
+
+def main():
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    if not args:
+        print("Usage: gguf_reader.py <model.gguf> [...] [--metadata] [--tensors]")
+        sys.exit(1)
+
+    results = []
+    for path in args:
+        try:
+            gguf = read_gguf(path)
+        except (OSError, ValueError, struct.error) as e:
+            results.append({'path': path, 'error': str(e)})
+            continue
+
+        info = gguf.summary()
+        if '--metadata' in sys.argv:
+            info['metadata'] = gguf.metadata
+        if '--tensors' in sys.argv:
+            info['tensors'] = [
+                {'name': t.name, 'shape': t.shape, 'type': t.type_name, 'offset': t.offset}
+                for t in gguf.tensors
+            ]
+        results.append(info)
+
+    print(json.dumps(results[0] if len(results) == 1 else results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Split/sharded GGUF support for Llama Wrangler
+Recognises `<name>-00001-of-00004.gguf` shard sets and merges them into a single file
+by streaming tensor data, so the model is never held in memory
+"""
+
+import os
+import re
+import sys
+import struct
+import shutil
+import subprocess
+from pathlib import Path
+from typing import Optional, List
+
+from gguf_reader import read_gguf, GGUF_MAGIC
+
+SHARD_PATTERN = re.compile(r'^(?P<prefix>.*)-(?P<index>\d{5})-of-(?P<count>\d{5})\.gguf$')
+COPY_CHUNK = 16 * 1024 * 1024
+
+
+def parse_shard_name(path: str):
+    """Return (prefix, index, count) for a shard file name, or None"""
+    match = SHARD_PATTERN.match(path)
+    if not match:
+        return None
+    return match.group('prefix'), int(match.group('index')), int(match.group('count'))
+
+
+def shard_paths(path: str) -> List[str]:
+    """All member paths of the shard set path belongs to ([path] for single files)"""
+    parsed = parse_shard_name(path)
+    if not parsed:
+        return [path]
+    prefix, _, count = parsed
+    return [f"{prefix}-{i:05d}-of-{count:05d}.gguf" for i in range(1, count + 1)]
+
+
+def is_first_shard(path: str) -> bool:
+    parsed = parse_shard_name(path)
+    return parsed is None or parsed[1] == 1
+
+
+def merged_name(path: str) -> str:
+    """Output name for a merged shard set: the shard prefix plus .gguf"""
+    parsed = parse_shard_name(path)
+    return f"{parsed[0]}.gguf" if parsed else path
+
+
+def _pack_string(value: str) -> bytes:
+    data = value.encode('utf-8')
+    return struct.pack('<Q', len(data)) + data
+
+
+def _copy_range(src, dest, start: int, length: int):
+    """Copy length bytes from src at start to dest's current position"""
+    src.seek(start)
+    remaining = length
+    while remaining > 0:
+        chunk = src.read(min(COPY_CHUNK, remaining))
+        if not chunk:
+            raise Exception(f"Unexpected end of file in {src.name}")
+        dest.write(chunk)
+        remaining -= len(chunk)
+
+
+def merge_shards(first_shard: str, output_path: Optional[str] = None) -> str:
+    """Merge a shard set into one GGUF file, streaming each shard's tensor data
+
+    Metadata is copied verbatim from the first shard (minus the split.* keys),
+    the tensor tables are concatenated with rebased offsets, and each shard's
+    data section is appended in order.
+    """
+    paths = shard_paths(first_shard)
+    missing = [p for p in paths if not os.path.exists(p)]
+    if missing:
+        raise Exception(f"Missing shards: {', '.join(os.path.basename(p) for p in missing)}")
+
+    shards = [read_gguf(p) for p in paths]
+    head = shards[0]
+    if head.version < 2:
+        raise Exception("GGUF v1 shard sets are not supported")
+    alignment = head.alignment
+
+    kv_keys = [k for k in head.kv_spans if not k.startswith('split.')]
+    tensor_count = sum(len(shard.tensors) for shard in shards)
+
+    # Tensor table: each shard's data section lands at an aligned base offset
+    tensor_info = bytearray()
+    data_bases = []
+    base = 0
+    for shard in shards:
+        data_bases.append(base)
+        for tensor in shard.tensors:
+            tensor_info += _pack_string(tensor.name)
+            tensor_info += struct.pack('<I', len(tensor.shape))
+            tensor_info += struct.pack(f'<{len(tensor.shape)}Q', *tensor.shape)
+            tensor_info += struct.pack('<IQ', tensor.type_id, base + tensor.offset)
+        data_size = shard.size - shard.data_offset
+        base += -(-data_size // alignment) * alignment
+
+    output_path = output_path or merged_name(first_shard)
+    tmp_path = output_path + '.partial'
+    with open(tmp_path, 'wb') as out:
+        out.write(GGUF_MAGIC)
+        out.write(struct.pack('<IQQ', head.version, tensor_count, len(kv_keys)))
+        with open(head.path, 'rb') as src:
+            for key in kv_keys:
+                start, end = head.kv_spans[key]
+                _copy_range(src, out, start, end - start)
+        out.write(tensor_info)
+        out.write(b'\0' * (-out.tell() % alignment))
+
+        data_start = out.tell()
+        for shard, shard_base in zip(shards, data_bases):
+            out.write(b'\0' * (data_start + shard_base - out.tell()))
+            with open(shard.path, 'rb') as src:
+                _copy_range(src, out, shard.data_offset, shard.size - shard.data_offset)
+        out.flush()
+        os.fsync(out.fileno())
+
+    os.replace(tmp_path, output_path)
+    return output_path
+
+
+def split_model(gguf_path: str, max_size: str, llama_cpp_path: Optional[str] = None) -> List[str]:
+    """Split a GGUF file into shards of at most max_size (e.g. '40G') with llama-gguf-split"""
+    candidates = []
+    if llama_cpp_path:
+        root = Path(llama_cpp_path)
+        candidates += [root / "build" / "bin" / "llama-gguf-split", root / "llama-gguf-split"]
+    tool = next((str(p) for p in candidates if p.exists()), None) or shutil.which('llama-gguf-split')
+    if not tool:
+        raise Exception("llama-gguf-split not found; build llama.cpp to split models")
+
+    prefix = gguf_path[:-len('.gguf')] if gguf_path.endswith('.gguf') else gguf_path
+    subprocess.run([tool, '--split', '--split-max-size', max_size, gguf_path, prefix], check=True)
+    produced = Path(prefix).parent.glob(f"{Path(prefix).name}-*-of-*.gguf")
+    return sorted(str(p) for p in produced if (parse_shard_name(str(p)) or ('',))[0] == prefix)
+
+
+def main():
+    if len(sys.argv) < 3 or sys.argv[1] not in ('merge', 'split'):
+        print("Usage: gguf_split.py merge <first-shard.gguf> [output.gguf]")
+        print("       gguf_split.py split <model.gguf> <max-size> [llama.cpp dir]")
+        sys.exit(1)
+
+    try:
+        if sys.argv[1] == 'merge':
+            output = merge_shards(sys.argv[2], sys.argv[3] if len(sys.argv) > 3 else None)
+            print(f"Merged into {output}")
+        else:
+            if len(sys.argv) < 4:
+                print("Error: split needs a max size, e.g. 40G")
+                sys.exit(1)
+            shards = split_model(sys.argv[2], sys.argv[3], sys.argv[4] if len(sys.argv) > 4 else None)
+            print(f"Split into {len(shards)} shards")
+    except Exception as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
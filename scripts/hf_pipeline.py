@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Pipelined safetensors snapshot download for Llama Wrangler
+Fetches a repo's files in parallel with the segmented engine (small files first) and
+inspects each safetensors shard on a CPU worker the moment it lands, so network and CPU
+work overlap and conversion can start as soon as the last shard is verified
+"""
+
+import os
+import sys
+import json
+import time
+import struct
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Optional, Dict, Any, List
+from urllib.parse import quote
+
+from range_download import SegmentedDownloader, default_connections
+from hf_tree import HFTreeCache, hf_endpoint, hf_auth_headers
+from progress import ProgressReporter
+from snapshot_plan import plan_snapshot
+DEFAULT_FILE_WORKERS = 4
+MAX_HEADER_SIZE = 100 * 1024 * 1024  # safetensors caps the JSON header at 100MB
+
+SAFETENSORS_DTYPE_SIZES = {
+    'F64': 8, 'I64': 8, 'U64': 8, 'F32': 4, 'I32': 4, 'U32': 4, 'F16': 2, 'BF16': 2,
+    'I16': 2, 'U16': 2, 'F8_E4M3': 1, 'F8_E5M2': 1, 'I8': 1, 'U8': 1, 'BOOL': 1,
+}
+
+
+def snapshot_digest(items: List[Dict[str, Any]]) -> str:
+    """Content digest of a set of repo files, from their LFS sha256 or git blob ids"""
+    sha256 = hashlib.sha256()
+    for item in sorted(items, key=lambda f: f['path']):
+        oid = (item.get('lfs') or {}).get('oid') or item.get('oid') or str(item.get('size'))
+        sha256.update(f"{item['path']}\0{oid}\n".encode())
+    return sha256.hexdigest()
+
+
+def inspect_safetensors(path: str) -> Dict[str, Any]:
+    """Parse a shard's header and check its tensor table covers the file exactly
+
+    Catches truncated or corrupt shards before the converter spends minutes on them,
+    and advises the kernel that the data will be read soon.
+    """
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size < 8:
+            raise Exception(f"{os.path.basename(path)} is not a safetensors file")
+        header_len = struct.unpack('<Q', f.read(8))[0]
+        if header_len > min(MAX_HEADER_SIZE, size - 8):
+            raise Exception(f"{os.path.basename(path)} has an invalid safetensors header")
+        header = json.loads(f.read(header_len))
+
+        data_start = 8 + header_len
+        data_end = 0
+        tensors = 0
+        parameters = 0
+        dtypes: Dict[str, int] = {}
+        for name, info in header.items():
+            if name == '__metadata__':
+                continue
+            start, end = info['data_offsets']
+            count = 1
+            for dim in info['shape']:
+                count *= dim
+            itemsize = SAFETENSORS_DTYPE_SIZES.get(info['dtype'])
+            if itemsize and end - start != count * itemsize:
+                raise Exception(f"{os.path.basename(path)}: tensor {name} has inconsistent size")
+            tensors += 1
+            parameters += count
+            dtypes[info['dtype']] = dtypes.get(info['dtype'], 0) + 1
+            data_end = max(data_end, end)
+
+        if data_start + data_end != size:
+            raise Exception(f"{os.path.basename(path)} is truncated or has trailing data")
+
+        if hasattr(os, 'posix_fadvise'):
+            os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_WILLNEED)
+
+    return {'tensors': tensors, 'parameters': parameters, 'dtypes': dtypes}
+
+
+class SnapshotPipeline:
+    """Parallel repo snapshot with per-shard work overlapped with the download"""
+
+    def __init__(self, tree: Optional[HFTreeCache] = None, connections: Optional[int] = None,
+                 file_workers: int = DEFAULT_FILE_WORKERS, span=(10, 40)):
+        self.tree = tree or HFTreeCache()
+        self.connections = connections or default_connections()
+        self.file_workers = file_workers
+        self.span = span
+        self.lock = threading.Lock()
+        self.file_progress: Dict[str, int] = {}
+        self.reporter: Optional[ProgressReporter] = None
+        self.cancel = threading.Event()  # Stops in-flight files once one of them has failed
+
+    def _on_progress(self, path: str):
+        def callback(downloaded, total):
+            with self.lock:
+                self.file_progress[path] = downloaded
+                done = sum(self.file_progress.values())
+            self.reporter.update(done)
+        return callback
+
+    def _fetch(self, repo_id: str, revision: str, item: Dict[str, Any], dest_dir: str,
+               connections: int) -> str:
+        """Download one file, verifying its LFS sha256 inline when published"""
+        dest_path = os.path.join(dest_dir, item['path'])
+        os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+        expected_sha256 = (item.get('lfs') or {}).get('oid')
+        if os.path.exists(dest_path) and os.path.getsize(dest_path) == item.get('size'):
+            self._on_progress(item['path'])(item['size'], item['size'])
+            return dest_path  # Left by an earlier, interrupted run
+
+        url = f"{hf_endpoint()}/{repo_id}/resolve/{quote(revision, safe='')}/{quote(item['path'])}"
+        downloader = SegmentedDownloader(
+            session=self.tree.session,
+            connections=connections,
+            headers=hf_auth_headers(),
+            progress_callback=self._on_progress(item['path']),
+            cancel=self.cancel
+        )
+        downloader.download(url, dest_path, expected_size=item.get('size') or None,
+                            expected_sha256=expected_sha256)
+        return dest_path
+
+    def run(self, repo_id: str, revision: str, dest_dir: str,
+            plan: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Fetch the planned files (see snapshot_plan.py) into dest_dir; returns timing and shard statistics"""
+        started = time.perf_counter()
+        self.cancel.clear()
+        plan = plan or plan_snapshot(self.tree, repo_id, revision)
+        items = plan['files']  # Smallest first, so config/tokenizer land before the weights
+        if not any(item['path'].endswith('.safetensors') for item in items):
+            raise Exception("Repository has no safetensors weights to convert")
+
+        total = sum(item.get('size', 0) for item in items)
+        self.reporter = ProgressReporter('download', total=total, name=repo_id, span=self.span)
+        self.reporter.set_digest('streaming')
+
+        # Large files share the connection budget; small ones need a single stream anyway
+        per_file = max(1, self.connections // self.file_workers)
+        shard_stats: Dict[str, Dict[str, Any]] = {}
+        shard_busy = 0.0
+        download_done = None
+
+        with ThreadPoolExecutor(max_workers=self.file_workers) as net_pool, \
+                ThreadPoolExecutor(max_workers=1) as cpu_pool:
+            downloads = {
+                net_pool.submit(self._fetch, repo_id, revision, item, dest_dir, per_file): item
+                for item in items
+            }
+            inspections = {}
+            try:
+                for future in as_completed(downloads):
+                    path = future.result()
+                    if path.endswith('.safetensors'):
+                        inspections[cpu_pool.submit(self._timed_inspect, path)] = path
+            except Exception:
+                # Queued files never start; running ones stop at their next chunk and keep
+                # their .partial for resume, so the error surfaces without waiting for them
+                self.cancel.set()
+                net_pool.shutdown(wait=False, cancel_futures=True)
+                raise
+            download_done = time.perf_counter()
+
+            for future in as_completed(inspections):
+                stats, elapsed = future.result()
+                shard_stats[os.path.basename(inspections[future])] = stats
+                shard_busy += elapsed
+
+        finished = time.perf_counter()
+        self.reporter.set_digest('verified')
+        self.reporter.finish()
+        download_s = download_done - started
+        return {
+            'files': len(items),
+            'bytes': total,
+            'digest': snapshot_digest(items),
+            'shards': len(shard_stats),
+            'parameters': sum(s['parameters'] for s in shard_stats.values()),
+            'download_s': round(download_s, 2),
+            'shard_work_s': round(shard_busy, 2),
+            # Shard work left after the last byte arrived; the rest overlapped the download
+            'tail_s': round(finished - download_done, 2),
+            'rate_mbps': round(total / download_s / 1e6, 1) if download_s > 0 else None,
+        }
+
+    @staticmethod
+    def _timed_inspect(path: str):
+        started = time.perf_counter()
+        stats = inspect_safetensors(path)
+        return stats, time.perf_counter() - started
+
+
+def main():
+    # hf_pipeline.py <org/repo> <dest_dir> [revision]: fetch a snapshot and print timings
+    if len(sys.argv) < 3:
+        print("Usage: hf_pipeline.py <org/repo> <dest_dir> [revision]")
+        sys.exit(1)
+
+    try:
+        stats = SnapshotPipeline().run(sys.argv[1], sys.argv[3] if len(sys.argv) > 3 else "main",
+                                       str(Path(sys.argv[2]).resolve()))
+        print(json.dumps(stats))
+    except Exception as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Cached HuggingFace repository tree lookups for Llama Wrangler
+Lists every file in a repo revision (recursively, across pages) and keeps the result
+on disk, revalidated with ETag/If-None-Match so repeat lookups cost one conditional
+request or none
+"""
+
+import os
+import re
+import json
+import time
+from pathlib import Path
+from typing import Optional, Dict, Any, List
+from urllib.parse import quote
+
+import requests
+
+from transport import shared_session
+
+FRESH_SECONDS = 300  # Serve cached trees without any request for this long
+COMMIT_SHA = re.compile(r'^[0-9a-f]{40}$')
+
+
+def hf_endpoint() -> str:
+    """Hub base URL, honouring HF_ENDPOINT like huggingface_hub does"""
+    return os.environ.get('HF_ENDPOINT', 'https://huggingface.co').rstrip('/')
+
+
+def hf_auth_headers() -> Dict[str, str]:
+    hf_token = os.environ.get('HF_TOKEN') or os.environ.get('HUGGING_FACE_HUB_TOKEN')
+    return {'Authorization': f'Bearer {hf_token}'} if hf_token else {}
+
+
+class HFTreeCache:
+    """Disk cache of repo file listings under ~/.llama-wrangler/cache/hf"""
+
+    def __init__(self, session: Optional[requests.Session] = None,
+                 cache_dir: Optional[str] = None, fresh_seconds: int = FRESH_SECONDS):
+        self.session = session or shared_session()
+        self.cache_dir = Path(cache_dir) if cache_dir else Path.home() / ".llama-wrangler" / "cache" / "hf"
+        self.fresh_seconds = fresh_seconds
+        self.requests_made = 0
+
+    def _cache_path(self, repo_id: str, revision: str) -> Path:
+        safe_repo = repo_id.replace('/', '--')
+        safe_rev = quote(revision, safe='')
+        return self.cache_dir / safe_repo / f"{safe_rev}.json"
+
+    def _load(self, path: Path) -> Optional[Dict[str, Any]]:
+        try:
+            with open(path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _save(self, path: Path, entry: Dict[str, Any]):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix('.json.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, path)
+
+    def list_files(self, repo_id: str, revision: str = "main", refresh: bool = False) -> List[Dict[str, Any]]:
+        """All files (not directories) in repo_id at revision, including subfolders"""
+        path = self._cache_path(repo_id, revision)
+        cached = self._load(path)
+
+        if cached and not refresh:
+            # A commit hash never changes, and recent lookups are trusted as-is
+            if COMMIT_SHA.match(revision) or time.time() - cached.get('fetched_at', 0) < self.fresh_seconds:
+                return cached['files']
+
+        url = (f"{hf_endpoint()}/api/models/{repo_id}/tree/{quote(revision, safe='')}"
+               f"?recursive=true")
+        headers = hf_auth_headers()
+        if cached and cached.get('etag'):
+            headers['If-None-Match'] = cached['etag']
+
+        response = self.session.get(url, headers=headers, timeout=10)
+        self.requests_made += 1
+        if response.status_code == 304 and cached:
+            cached['fetched_at'] = time.time()
+            self._save(path, cached)
+            return cached['files']
+        response.raise_for_status()
+
+        etag = response.headers.get('etag')
+        items = response.json()
+        # Large repos are paginated through Link: <...>; rel="next"
+        while 'next' in response.links:
+            response = self.session.get(response.links['next']['url'], headers=hf_auth_headers(), timeout=10)
+            self.requests_made += 1
+            response.raise_for_status()
+            items.extend(response.json())
+
+        files = [item for item in items if item.get('type', 'file') == 'file']
+        self._save(path, {'etag': etag, 'fetched_at': time.time(), 'files': files})
+        return files
+
+    def file_info(self, repo_id: str, revision: str, file_path: str) -> Optional[Dict[str, Any]]:
+        """Listing entry (size, lfs.oid, ...) for one file, or None"""
+        for item in self.list_files(repo_id, revision):
+            if item.get('path') == file_path:
+                return item
+        return None
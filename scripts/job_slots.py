@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Cross-process stage limits for Llama Wrangler jobs
+Every download/convert/quantize process takes a slot for the stage it is in (network,
+cpu or disk) so a queue of jobs overlaps stages without thrashing the machine, and
+network stages share one global bandwidth cap
+"""
+
+import os
+import sys
+import time
+import threading
+import subprocess
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional, Callable
+
+try:
+    import fcntl
+except ImportError:  # Windows: no flock, stages run uncoordinated
+    fcntl = None
+
+STAGES = ('network', 'cpu', 'disk')
+DEFAULT_LIMITS = {'network': 2, 'cpu': 1, 'disk': 1}
+POLL_INTERVAL = 0.5
+REBALANCE_INTERVAL = 2.0
+
+
+def locks_dir() -> Path:
+    path = Path.home() / ".llama-wrangler" / "locks"
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def stage_limit(stage: str) -> int:
+    """Slots for a stage, from LLAMA_WRANGLER_LIMIT_<STAGE> or the default"""
+    try:
+        return max(1, int(os.environ.get(f'LLAMA_WRANGLER_LIMIT_{stage.upper()}', DEFAULT_LIMITS[stage])))
+    except ValueError:
+        return DEFAULT_LIMITS[stage]
+
+
+def _slot_path(stage: str, index: int) -> Path:
+    return locks_dir() / f"{stage}.{index}.lock"
+
+
+def _try_lock(path: Path):
+    """Open and exclusively lock path without blocking; returns the file or None"""
+    f = open(path, 'a+')
+    try:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return f
+    except OSError:
+        f.close()
+        return None
+
+
+def active_slots(stage: str) -> int:
+    """How many slots of a stage are currently held, by any process"""
+    if fcntl is None:
+        return 1
+    held = 0
+    for index in range(stage_limit(stage)):
+        with open(_slot_path(stage, index), 'a+') as f:
+            try:
+                fcntl.flock(f.fileno(), fcntl.LOCK_SH | fcntl.LOCK_NB)
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            except OSError:
+                held += 1
+    return held
+
+
+@contextmanager
+def stage_slot(stage: str, on_wait: Optional[Callable[[str], None]] = None):
+    """Hold one of the stage's slots for the duration of the block"""
+    if fcntl is None or stage not in STAGES:
+        yield
+        return
+
+    waited = False
+    while True:
+        for index in range(stage_limit(stage)):
+            handle = _try_lock(_slot_path(stage, index))
+            if handle:
+                try:
+                    yield
+                finally:
+                    fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+                    handle.close()
+                return
+        if not waited and on_wait:
+            on_wait(f"Waiting for a free {stage} slot...")
+        waited = True
+        time.sleep(POLL_INTERVAL)
+
+
+class TokenBucket:
+    """Thread-safe token bucket; consume() blocks until the bytes may be sent"""
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        self.rate = float(rate)
+        self.burst = float(burst or rate)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def set_rate(self, rate: float):
+        with self.lock:
+            self.rate = float(rate)
+            self.burst = float(rate)
+            self.tokens = min(self.tokens, self.burst)
+
+    def consume(self, amount: int):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                # Chunks larger than the bucket are let through once it is full
+                if self.tokens >= min(amount, self.burst):
+                    self.tokens -= amount
+                    return
+                wait = (min(amount, self.burst) - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class SharedBandwidth(TokenBucket):
+    """Global cap from LLAMA_WRANGLER_BANDWIDTH (bytes/s) split across active downloads"""
+
+    def __init__(self, total_rate: float):
+        super().__init__(total_rate)
+        self.total_rate = total_rate
+        self.last_rebalance = 0.0
+
+    def consume(self, amount: int):
+        now = time.monotonic()
+        if now - self.last_rebalance >= REBALANCE_INTERVAL:
+            self.last_rebalance = now
+            self.set_rate(self.total_rate / max(1, active_slots('network')))
+        super().consume(amount)
+
+
+_bandwidth: Optional[SharedBandwidth] = None
+
+
+def bandwidth_limiter() -> Optional[SharedBandwidth]:
+    """Process-wide limiter for the configured global cap, or None when uncapped"""
+    global _bandwidth
+    try:
+        total = float(os.environ.get('LLAMA_WRANGLER_BANDWIDTH', 0))
+    except ValueError:
+        total = 0
+    if total <= 0:
+        return None
+    if _bandwidth is None or _bandwidth.total_rate != total:
+        _bandwidth = SharedBandwidth(total)
+    return _bandwidth
+
+
+def main():
+    # job_slots.py run <stage> -- <command...>: run an external tool inside a stage slot
+    if len(sys.argv) < 5 or sys.argv[1] != 'run' or sys.argv[3] != '--':
+        print("Usage: job_slots.py run <network|cpu|disk> -- <command> [args...]")
+        sys.exit(1)
+
+    with stage_slot(sys.argv[2], on_wait=lambda message: print(message, flush=True)):
+        sys.exit(subprocess.call(sys.argv[4:]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,414 @@
+#!/usr/bin/env python3
+"""
+Launch profiles for Llama Wrangler
+Derives llama-server settings (context size, threads, batch sizes, KV-cache type, mlock,
+GPU layers) from a model's GGUF header and the host's CPU topology and free memory,
+merges per-model overrides, and stores both in the model catalog
+"""
+
+import os
+import sys
+import json
+import subprocess
+from typing import Optional, Dict, Any, List, Tuple
+
+from gguf_reader import read_gguf
+from gguf_split import shard_paths
+from model_catalog import ModelCatalog
+from quantize import available_memory
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+GB = 1024 ** 3
+
+# Bytes per element of llama.cpp KV-cache types (q8_0/q4_0 store a scale per 32 values)
+KV_TYPE_BYTES = {'f16': 2.0, 'q8_0': 34 / 32, 'q4_0': 18 / 32}
+
+DEFAULT_CTX = 8192       # Used when the model doesn't declare a context length
+MIN_CTX = 2048
+MAX_AUTO_CTX = 32768     # Longer contexts are opt-in: their KV cache rarely pays for itself
+CTX_STEPS = (32768, 16384, 8192, 4096, 2048)
+
+COMPUTE_BUFFER = 512 * 1024 * 1024  # llama.cpp compute buffers at -ub 512
+HOST_HEADROOM = 1 * GB              # Left for the OS and the app
+GPU_HEADROOM = 512 * 1024 * 1024
+MLOCK_SHARE = 0.5                   # Lock only if the model takes at most this share of RAM
+
+# Profile keys, their llama-server flags and value types
+PROFILE_FLAGS = {
+    'ctx_size': ('-c', int),
+    'threads': ('-t', int),
+    'batch_size': ('-b', int),
+    'ubatch_size': ('-ub', int),
+    'gpu_layers': ('-ngl', int),
+    'cache_type_k': ('-ctk', str),
+    'cache_type_v': ('-ctv', str),
+    'flash_attn': ('-fa', bool),
+    'mlock': ('--mlock', bool),
+}
+
+
+def physical_cores() -> Tuple[int, int]:
+    """(physical cores usable for inference, logical CPUs)
+
+    Hyperthreads don't add matrix throughput, so llama.cpp runs best with one thread per
+    physical core; on Apple Silicon only performance cores are counted.
+    """
+    logical = len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else (os.cpu_count() or 1)
+    if sys.platform == 'darwin':
+        for key in ('hw.perflevel0.physicalcpu', 'hw.physicalcpu'):
+            try:
+                value = subprocess.run(['sysctl', '-n', key], capture_output=True, text=True, timeout=5).stdout
+                if value.strip().isdigit():
+                    return int(value), logical
+            except (OSError, subprocess.SubprocessError):
+                pass
+        return logical, logical
+
+    # Linux: count distinct sibling sets among the CPUs we may run on
+    cpus = os.sched_getaffinity(0) if hasattr(os, 'sched_getaffinity') else range(logical)
+    cores = set()
+    for cpu in cpus:
+        try:
+            with open(f'/sys/devices/system/cpu/cpu{cpu}/topology/thread_siblings_list', 'r') as f:
+                cores.add(f.read().strip())
+        except OSError:
+            return logical, logical
+    return max(1, len(cores)), logical
+
+
+def total_memory() -> int:
+    try:
+        return os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES')
+    except (ValueError, OSError, AttributeError):
+        return 0
+
+
+def gpu_info() -> Dict[str, Any]:
+    """GPU backend llama-server will use and its free memory (unified memory on Metal)"""
+    if sys.platform == 'darwin':
+        return {'backend': 'metal', 'free': None}
+    try:
+        result = subprocess.run(
+            ['nvidia-smi', '--query-gpu=memory.free', '--format=csv,noheader,nounits'],
+            capture_output=True, text=True, timeout=10,
+        )
+        free = [int(line) * 1024 * 1024 for line in result.stdout.split() if line.strip().isdigit()]
+        if result.returncode == 0 and free:
+            return {'backend': 'cuda', 'free': sum(free), 'devices': len(free)}
+    except (OSError, subprocess.SubprocessError):
+        pass
+    if os.path.exists('/usr/local/cuda/bin/nvcc'):
+        return {'backend': 'cuda', 'free': None}
+    return {'backend': None, 'free': None}
+
+
+def mlock_limit() -> Optional[int]:
+    """RLIMIT_MEMLOCK in bytes; None means unlimited"""
+    if resource is None:
+        return 0
+    soft, _ = resource.getrlimit(resource.RLIMIT_MEMLOCK)
+    return None if soft == resource.RLIM_INFINITY else soft
+
+
+def host_info() -> Dict[str, Any]:
+    cores, logical = physical_cores()
+    return {
+        'physical_cores': cores,
+        'logical_cpus': logical,
+        'available_memory': available_memory(),
+        'total_memory': total_memory(),
+        'mlock_limit': mlock_limit(),
+        'gpu': gpu_info(),
+    }
+
+
+def flash_attn_style(server_path: Optional[str]) -> Optional[str]:
+    """How this llama-server build takes flash attention: 'value' (-fa on), 'flag' (-fa) or None"""
+    if not server_path:
+        return None
+    try:
+        result = subprocess.run([server_path, '--help'], capture_output=True, text=True, timeout=15)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    for line in (result.stdout + result.stderr).splitlines():
+        if '--flash-attn' in line:
+            return 'value' if 'on|off' in line else 'flag'
+    return None
+
+
+def _first(value):
+    """Per-layer metadata arrays (e.g. head_count_kv on hybrid models) collapse to their max"""
+    if isinstance(value, list):
+        return max(value) if value else None
+    return value
+
+
+def model_facts(path: str) -> Dict[str, Any]:
+    """Sizes from the GGUF header that determine memory use"""
+    gguf = read_gguf(path)
+    embedding = _first(gguf.arch_value('embedding_length'))
+    heads = _first(gguf.arch_value('attention.head_count'))
+    head_dim = embedding // heads if embedding and heads else None
+    return {
+        'architecture': gguf.architecture,
+        'weights': sum(os.path.getsize(p) for p in shard_paths(path) if os.path.exists(p)),
+        'context_length': gguf.arch_value('context_length'),
+        'block_count': gguf.arch_value('block_count'),
+        'embedding_length': embedding,
+        'head_count': heads,
+        'head_count_kv': _first(gguf.arch_value('attention.head_count_kv')) or heads,
+        'key_length': gguf.arch_value('attention.key_length', head_dim),
+        'value_length': gguf.arch_value('attention.value_length', head_dim),
+    }
+
+
+def kv_cache_bytes(facts: Dict[str, Any], ctx: int, type_k: str, type_v: str) -> int:
+    """KV cache for ctx tokens: every layer stores a K and a V vector per KV head"""
+    layers = facts.get('block_count')
+    heads_kv = facts.get('head_count_kv')
+    if not layers or not heads_kv or not facts.get('key_length'):
+        # Unknown attention layout: assume a full-width f16 cache
+        return int(ctx * (layers or 32) * (facts.get('embedding_length') or 4096) * 2 * 2)
+    per_token = layers * heads_kv * (facts['key_length'] * KV_TYPE_BYTES[type_k] +
+                                     facts['value_length'] * KV_TYPE_BYTES[type_v])
+    return int(ctx * per_token)
+
+
+def context_options(facts: Dict[str, Any]) -> List[int]:
+    """Context sizes to try, largest first, never beyond what the model was trained for"""
+    trained = facts.get('context_length') or DEFAULT_CTX
+    cap = min(trained, MAX_AUTO_CTX)
+    options = [cap] + [step for step in CTX_STEPS if step < cap and step >= MIN_CTX]
+    return options
+
+
+def kv_options(fa_style: Optional[str]) -> List[Tuple[str, str]]:
+    """KV-cache types in order of preference; a quantized V cache needs flash attention"""
+    if fa_style:
+        return [('f16', 'f16'), ('q8_0', 'q8_0')]
+    return [('f16', 'f16'), ('q8_0', 'f16')]
+
+
+def fit(facts: Dict[str, Any], budget: int, fa_style: Optional[str],
+        weights: Optional[int] = None) -> Optional[Tuple[int, str, str]]:
+    """Largest (ctx, type_k, type_v) whose weights, KV cache and buffers fit in budget"""
+    weights = facts['weights'] if weights is None else weights
+    for ctx in context_options(facts):
+        for type_k, type_v in kv_options(fa_style):
+            if weights + kv_cache_bytes(facts, ctx, type_k, type_v) + COMPUTE_BUFFER <= budget:
+                return ctx, type_k, type_v
+    return None
+
+
+def auto_profile(facts: Dict[str, Any], host: Dict[str, Any],
+                 fa_style: Optional[str] = None) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """Throughput-oriented profile that keeps the model out of swap; returns (profile, estimate)
+
+    Prefers the longest context (up to MAX_AUTO_CTX) with an f16 cache, then a q8_0 cache,
+    before shrinking the context. With CUDA the whole model goes to VRAM when it fits,
+    otherwise as many layers as VRAM holds; Metal shares system memory.
+    """
+    gpu = host['gpu']
+    host_budget = max(0, host['available_memory'] - HOST_HEADROOM)
+    weights = facts['weights']
+    layers = facts.get('block_count') or 0
+
+    gpu_layers = 0
+    on_host = weights
+    choice = None
+    if gpu['backend'] == 'metal':
+        gpu_layers = 999
+        choice = fit(facts, host_budget, fa_style)
+    elif gpu['backend'] == 'cuda' and gpu['free'] is None:
+        gpu_layers = 999  # VRAM unknown (no nvidia-smi): offload everything as before
+        choice = fit(facts, host_budget, fa_style, weights=0)
+        on_host = 0
+    elif gpu['backend'] == 'cuda':
+        gpu_budget = max(0, gpu['free'] - GPU_HEADROOM)
+        choice = fit(facts, gpu_budget, fa_style)
+        if choice and choice[0] >= min(DEFAULT_CTX, context_options(facts)[0]):
+            gpu_layers = 999
+            on_host = 0
+        else:
+            # Partial offload: size the context for the host, then move whole layers to VRAM
+            choice = fit(facts, host_budget, fa_style)
+            if choice and layers:
+                per_layer = (weights + kv_cache_bytes(facts, *choice)) / layers
+                gpu_layers = max(0, min(layers, int((gpu_budget - COMPUTE_BUFFER) // per_layer)))
+                on_host = int(weights * (layers - gpu_layers) / layers)
+    else:
+        choice = fit(facts, host_budget, fa_style)
+
+    fits = choice is not None
+    if not fits:
+        ctx = context_options(facts)[-1]
+        choice = (ctx,) + kv_options(fa_style)[-1]
+    ctx, type_k, type_v = choice
+    kv_bytes = kv_cache_bytes(facts, ctx, type_k, type_v)
+    total = weights + kv_bytes + COMPUTE_BUFFER
+    host_need = on_host + (0 if gpu_layers == 999 and gpu['backend'] == 'cuda' else kv_bytes) + COMPUTE_BUFFER
+
+    # Bigger micro-batches speed up prompt processing on GPUs with room to spare; small
+    # ones keep compute buffers down when memory is tight
+    slack = host_budget - host_need
+    if gpu_layers == 999 and slack > 2 * GB:
+        batch_size, ubatch_size = 2048, 1024
+    elif not gpu_layers and slack < GB:
+        batch_size, ubatch_size = 512, 256
+    else:
+        batch_size, ubatch_size = 2048, 512
+
+    # Locking keeps weights from being paged out under pressure, but only when they are
+    # a modest share of RAM and the memlock limit allows it
+    limit = host['mlock_limit']
+    mlock = bool(
+        fits and on_host
+        and (limit is None or limit >= on_host)
+        and host_need <= host['total_memory'] * MLOCK_SHARE
+    )
+
+    profile = {
+        'ctx_size': ctx,
+        'threads': host['physical_cores'],
+        'batch_size': batch_size,
+        'ubatch_size': ubatch_size,
+        'gpu_layers': gpu_layers,
+        'cache_type_k': type_k,
+        'cache_type_v': type_v,
+        'flash_attn': type_v != 'f16',
+        'mlock': mlock,
+    }
+    estimate = {
+        'weights': weights,
+        'kv_cache': kv_bytes,
+        'compute': COMPUTE_BUFFER,
+        'total': total,
+        'host': host_need,
+        'host_budget': host_budget,
+        'fits': fits,
+    }
+    return profile, estimate
+
+
+def parse_overrides(pairs: List[str]) -> Dict[str, Any]:
+    """key=value strings into typed overrides; 'key=' clears an override (value None)"""
+    overrides: Dict[str, Any] = {}
+    for pair in pairs:
+        key, _, value = pair.partition('=')
+        if key not in PROFILE_FLAGS:
+            raise ValueError(f"Unknown launch setting: {key}")
+        kind = PROFILE_FLAGS[key][1]
+        if value == '':
+            overrides[key] = None
+        elif kind is bool:
+            overrides[key] = value.lower() in ('1', 'true', 'yes', 'on')
+        elif kind is int:
+            overrides[key] = int(value)
+        else:
+            if key.startswith('cache_type') and value not in KV_TYPE_BYTES:
+                raise ValueError(f"Unsupported KV-cache type: {value}")
+            overrides[key] = value
+    return overrides
+
+
+def server_args(profile: Dict[str, Any], fa_style: Optional[str] = None) -> List[str]:
+    """llama-server arguments for a profile (model path, host and port are added by the caller)"""
+    args = []
+    for key, (flag, kind) in PROFILE_FLAGS.items():
+        value = profile.get(key)
+        if value is None:
+            continue
+        if key == 'flash_attn':
+            if value and fa_style == 'value':
+                args += [flag, 'on']
+            elif value:
+                args.append(flag)
+        elif kind is bool:
+            if value:
+                args.append(flag)
+        else:
+            args += [flag, str(value)]
+    return args
+
+
+def resolve(path: str, server_path: Optional[str] = None,
+            catalog: Optional[ModelCatalog] = None) -> Dict[str, Any]:
+    """Effective profile for a model: auto-tuned values with its catalog overrides on top"""
+    path = os.path.abspath(path)
+    catalog = catalog or ModelCatalog()
+    entry = catalog.ensure(path)
+    overrides = entry.get('launch_overrides') or {}
+
+    fa_style = flash_attn_style(server_path)
+    facts = model_facts(path)
+    host = host_info()
+    auto, estimate = auto_profile(facts, host, fa_style)
+    profile = dict(auto)
+    profile.update(overrides)
+    if profile.get('cache_type_v', 'f16') != 'f16' and 'flash_attn' not in overrides:
+        profile['flash_attn'] = True
+
+    catalog.update_entry(path, launch_profile=profile)
+    catalog.save()
+    return {
+        'path': path,
+        'profile': profile,
+        'auto': auto,
+        'overrides': overrides,
+        'estimate': estimate,
+        'host': host,
+        'model': facts,
+        'args': server_args(profile, fa_style),
+    }
+
+
+def set_overrides(path: str, overrides: Dict[str, Any], reset: bool = False,
+                  catalog: Optional[ModelCatalog] = None) -> Dict[str, Any]:
+    """Merge (or with reset, replace) a model's stored overrides; None values are removed"""
+    path = os.path.abspath(path)
+    catalog = catalog or ModelCatalog()
+    entry = catalog.ensure(path)
+    merged = {} if reset else dict(entry.get('launch_overrides') or {})
+    merged.update(overrides)
+    merged = {key: value for key, value in merged.items() if value is not None}
+    catalog.update_entry(path, launch_overrides=merged)
+    catalog.save()
+    return merged
+
+
+def main():
+    # launch_profile.py <model.gguf> [--server <llama-server>]: print the effective profile
+    # launch_profile.py <model.gguf> --set key=value [key=value ...] [--reset]
+    args = list(sys.argv[1:])
+    server_path = None
+    if '--server' in args:
+        index = args.index('--server')
+        server_path = args[index + 1] if index + 1 < len(args) else None
+        del args[index:index + 2]
+    pairs = []
+    if '--set' in args:
+        index = args.index('--set')
+        pairs = [arg for arg in args[index + 1:] if not arg.startswith('--')]
+        args = args[:index] + [arg for arg in args[index + 1:] if arg.startswith('--')]
+    paths = [arg for arg in args if not arg.startswith('--')]
+    if not paths:
+        print("Usage: launch_profile.py <model.gguf> [--server <llama-server>] [--set key=value ...] [--reset]")
+        sys.exit(1)
+
+    try:
+        catalog = ModelCatalog()
+        if pairs or '--reset' in args:
+            set_overrides(paths[0], parse_overrides(pairs), '--reset' in args, catalog)
+        result = resolve(paths[0], server_path, catalog)
+    except (OSError, ValueError) as e:
+        print(json.dumps({'path': paths[0], 'error': str(e)}))
+        sys.exit(1)
+    print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
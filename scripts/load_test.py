@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Load test for Llama Wrangler's llama-server endpoint
+Sends concurrent streaming chat completions to the OpenAI-compatible API at several
+concurrency levels and reports aggregate tokens/s, time to first token and p50/p95/p99
+request latency for each level
+"""
+
+import sys
+import json
+import time
+import argparse
+import http.client
+from concurrent.futures import ThreadPoolExecutor
+from statistics import median
+from typing import Optional, Dict, Any, List
+from urllib.parse import urlparse
+
+DEFAULT_URL = 'http://127.0.0.1:7070'
+DEFAULT_PROMPT = "Write a short story about a llama who learns to herd cats."
+DEFAULT_LEVELS = '1,2,4,8'
+REQUEST_TIMEOUT = 300
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
+
+
+def distribution(values: List[float]) -> Dict[str, Optional[float]]:
+    """p50/p95/p99 of seconds, in milliseconds"""
+    return {name: (round(value * 1000, 1) if value is not None else None)
+            for name, value in (('p50', percentile(values, 50)), ('p95', percentile(values, 95)),
+                                ('p99', percentile(values, 99)))}
+
+
+class LoadTester:
+    """Streaming-completion client for one llama-server (or compatible) endpoint"""
+
+    def __init__(self, url: str = DEFAULT_URL, max_tokens: int = 128, prompt: str = DEFAULT_PROMPT,
+                 timeout: float = REQUEST_TIMEOUT):
+        parsed = urlparse(url)
+        self.host = parsed.hostname or '127.0.0.1'
+        self.port = parsed.port or (443 if parsed.scheme == 'https' else 80)
+        self.https = parsed.scheme == 'https'
+        self.max_tokens = max_tokens
+        self.prompt = prompt
+        self.timeout = timeout
+        self.model = None
+
+    def connect(self) -> http.client.HTTPConnection:
+        cls = http.client.HTTPSConnection if self.https else http.client.HTTPConnection
+        return cls(self.host, self.port, timeout=self.timeout)
+
+    def detect_model(self) -> str:
+        """Id of the served model; also fails fast when nothing is listening"""
+        conn = self.connect()
+        try:
+            conn.request('GET', '/v1/models')
+            response = conn.getresponse()
+            body = response.read()
+            if response.status != 200:
+                raise Exception(f"Server answered {response.status} for /v1/models; is a model loaded?")
+            data = json.loads(body or b'{}').get('data') or [{}]
+            self.model = data[0].get('id') or 'default'
+        finally:
+            conn.close()
+        return self.model
+
+    def request(self) -> Dict[str, Any]:
+        """One streaming completion; returns timings or an error"""
+        payload = json.dumps({
+            'model': self.model or 'default',
+            'messages': [{'role': 'user', 'content': self.prompt}],
+            'max_tokens': self.max_tokens,
+            'temperature': 0,
+            'stream': True,
+            'stream_options': {'include_usage': True},
+            'ignore_eos': True,  # llama-server: always generate max_tokens so runs compare
+        })
+        started = time.perf_counter()
+        first = last = None
+        chunks = 0
+        reported = None
+        conn = self.connect()
+        try:
+            conn.request('POST', '/v1/chat/completions', body=payload,
+                         headers={'Content-Type': 'application/json', 'Accept': 'text/event-stream'})
+            response = conn.getresponse()
+            if response.status != 200:
+                return {'error': f"HTTP {response.status}: {response.read(200).decode(errors='replace')}"}
+            for raw in response:
+                line = raw.strip()
+                if not line.startswith(b'data:'):
+                    continue
+                data = line[5:].strip()
+                if data == b'[DONE]':
+                    break
+                event = json.loads(data)
+                for choice in event.get('choices') or []:
+                    content = (choice.get('delta') or {}).get('content') or choice.get('text')
+                    if content:
+                        last = time.perf_counter()
+                        first = first or last
+                        chunks += 1
+                # llama-server reports exact counts in the final chunk; a chunk is one token otherwise
+                usage = event.get('usage') or {}
+                timings = event.get('timings') or {}
+                reported = usage.get('completion_tokens') or timings.get('predicted_n') or reported
+        except (OSError, http.client.HTTPException, ValueError) as e:
+            return {'error': str(e) or type(e).__name__}
+        finally:
+            conn.close()
+
+        finished = time.perf_counter()
+        if first is None:
+            return {'error': 'No tokens received'}
+        tokens = reported or chunks
+        decode = last - first
+        return {
+            'ttft': first - started,
+            'latency': finished - started,
+            'tokens': tokens,
+            'decode_tps': (tokens - 1) / decode if tokens > 1 and decode > 0 else None,
+        }
+
+    def run_level(self, concurrency: int, requests: int) -> Dict[str, Any]:
+        """`requests` completions with `concurrency` in flight at a time (closed loop)"""
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = list(pool.map(lambda _: self.request(), range(requests)))
+        elapsed = time.perf_counter() - started
+
+        done = [r for r in results if 'error' not in r]
+        errors = [r['error'] for r in results if 'error' in r]
+        tokens = sum(r['tokens'] for r in done)
+        decode_rates = [r['decode_tps'] for r in done if r['decode_tps']]
+        return {
+            'concurrency': concurrency,
+            'requests': requests,
+            'errors': len(errors),
+            'first_error': errors[0] if errors else None,
+            'tokens': tokens,
+            'seconds': round(elapsed, 3),
+            'tokens_per_sec': round(tokens / elapsed, 1) if elapsed > 0 else None,
+            'requests_per_sec': round(len(done) / elapsed, 2) if elapsed > 0 else None,
+            'decode_tps_per_request': round(median(decode_rates), 1) if decode_rates else None,
+            'ttft_ms': distribution([r['ttft'] for r in done]),
+            'latency_ms': distribution([r['latency'] for r in done]),
+        }
+
+
+def format_level(level: Dict[str, Any]) -> str:
+    ttft = level['ttft_ms']
+    latency = level['latency_ms']
+    errors = f"  {level['errors']} errors" if level['errors'] else ''
+    return (f"  c={level['concurrency']:<3} {level['tokens_per_sec'] or 0:>8.1f} tok/s  "
+            f"TTFT p50/p95/p99 {ttft['p50']}/{ttft['p95']}/{ttft['p99']} ms  "
+            f"latency p50/p95/p99 {latency['p50']}/{latency['p95']}/{latency['p99']} ms{errors}")
+
+
+def run_load_test(url: str, levels: List[int], requests: Optional[int] = None, max_tokens: int = 128,
+                  prompt: str = DEFAULT_PROMPT, warmup: bool = True, log=print) -> Dict[str, Any]:
+    """Measure every concurrency level in turn; `requests` defaults to 4 per in-flight slot"""
+    tester = LoadTester(url, max_tokens, prompt)
+    model = tester.detect_model()
+    log(f"Load testing {model} at {url} ({max_tokens} tokens per request)")
+    if warmup:
+        tester.request()  # First request pays for cold caches and prompt processing setup
+
+    results = []
+    for concurrency in levels:
+        level = tester.run_level(concurrency, requests or concurrency * 4)
+        log(format_level(level))
+        results.append(level)
+    best = max(results, key=lambda level: level['tokens_per_sec'] or 0) if results else None
+    return {
+        'url': url,
+        'model': model,
+        'max_tokens': max_tokens,
+        'levels': results,
+        'best_concurrency': best['concurrency'] if best else None,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test an OpenAI-compatible llama-server endpoint")
+    parser.add_argument('--url', default=DEFAULT_URL)
+    parser.add_argument('--concurrency', default=DEFAULT_LEVELS, help="Comma-separated levels")
+    parser.add_argument('--requests', type=int, default=None, help="Requests per level (default 4 x level)")
+    parser.add_argument('--max-tokens', type=int, default=128)
+    parser.add_argument('--prompt', default=DEFAULT_PROMPT)
+    parser.add_argument('--no-warmup', action='store_true')
+    args = parser.parse_args()
+
+    try:
+        levels = [int(level) for level in args.concurrency.split(',') if level]
+        if not levels or min(levels) < 1:
+            raise ValueError("Concurrency levels must be positive integers")
+        # Human-readable lines go to stderr; stdout carries only the JSON result
+        result = run_load_test(args.url, levels, args.requests, args.max_tokens, args.prompt,
+                               not args.no_warmup, log=lambda message: print(message, file=sys.stderr, flush=True))
+    except Exception as e:
+        print(json.dumps({'url': args.url, 'error': str(e)}))
+        sys.exit(1)
+    print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Model catalog for Llama Wrangler
+Persistent index of local GGUF files keyed by (path, size, mtime) with parsed metadata,
+so repeat scans only stat files and re-parse the ones that changed
+"""
+
+import os
+import sys
+import json
+import time
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Tuple
+
+from gguf_reader import read_gguf
+from gguf_split import parse_shard_name, shard_paths
+
+CATALOG_VERSION = 1
+
+# Summary fields kept per entry (tensor tables are not cached)
+METADATA_FIELDS = (
+    'name', 'architecture', 'quantization', 'context_length', 'embedding_length',
+    'block_count', 'head_count', 'head_count_kv', 'expert_count', 'parameter_count',
+    'tensor_count', 'tensor_types', 'split_count', 'split_no',
+)
+
+
+def is_model_file(filename: str) -> bool:
+    return filename.endswith('.gguf') and 'ggml-vocab' not in filename
+
+
+def group_shards(entries: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Collapse the shards of a split model into one logical entry for its first shard"""
+    by_path = {entry['path']: entry for entry in entries}
+    grouped = []
+    for entry in entries:
+        shard = parse_shard_name(entry['path'])
+        if not shard:
+            grouped.append(entry)
+            continue
+        if shard[1] != 1:
+            continue  # Reported as part of its first shard
+
+        members = shard_paths(entry['path'])
+        present = [by_path[p] for p in members if p in by_path]
+        logical = dict(entry)
+        logical['shards'] = [m['path'] for m in present]
+        logical['size'] = sum(m['size'] for m in present)
+        logical['incomplete'] = len(present) != len(members)
+
+        metadata = dict(entry.get('metadata') or {})
+        if metadata:
+            tensor_types: Dict[str, int] = {}
+            for member in present:
+                for name, count in ((member.get('metadata') or {}).get('tensor_types') or {}).items():
+                    tensor_types[name] = tensor_types.get(name, 0) + count
+            metadata['tensor_types'] = tensor_types
+            metadata['tensor_count'] = sum((m.get('metadata') or {}).get('tensor_count') or 0 for m in present)
+            metadata['parameter_count'] = sum((m.get('metadata') or {}).get('parameter_count') or 0 for m in present)
+            logical['metadata'] = metadata
+        grouped.append(logical)
+    return grouped
+
+
+class ModelCatalog:
+    """On-disk index of GGUF models under ~/.llama-wrangler/catalog.json"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = Path(path) if path else Path.home() / ".llama-wrangler" / "catalog.json"
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.dirty = False
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+            if data.get('version') == CATALOG_VERSION:
+                self.entries = data.get('entries', {})
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def save(self):
+        """Write the catalog atomically, only if something changed"""
+        if not self.dirty:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix('.json.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump({'version': CATALOG_VERSION, 'entries': self.entries}, f)
+        os.replace(tmp_path, self.path)
+        self.dirty = False
+
+    def get(self, path: str) -> Optional[Dict[str, Any]]:
+        return self.entries.get(os.path.abspath(path))
+
+    def update_entry(self, path: str, **fields):
+        """Attach extra fields (e.g. launch settings) to an existing entry"""
+        entry = self.entries.get(os.path.abspath(path))
+        if entry is not None:
+            entry.update(fields)
+            self.dirty = True
+
+    def ensure(self, path: str) -> Dict[str, Any]:
+        """Entry for one model file, indexing it if it isn't in the catalog yet"""
+        path = os.path.abspath(path)
+        entry, _ = self._refresh(path, os.stat(path))
+        return entry
+
+    def _refresh(self, path: str, stat: os.stat_result) -> Tuple[Dict[str, Any], bool]:
+        """Return the entry for path, re-parsing only if size or mtime changed"""
+        entry = self.entries.get(path)
+        if entry and entry.get('size') == stat.st_size and entry.get('mtime_ns') == stat.st_mtime_ns:
+            return entry, False
+
+        fresh = {
+            'path': path,
+            'name': os.path.basename(path),
+            'dir': os.path.dirname(path),
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+        }
+        try:
+            summary = read_gguf(path).summary()
+            fresh['metadata'] = {key: summary.get(key) for key in METADATA_FIELDS}
+        except Exception as e:
+            fresh['error'] = str(e)
+
+        # Keep user-level fields (overrides, profiles) across re-parses
+        for key, value in (entry or {}).items():
+            if key not in fresh and key not in ('metadata', 'error'):
+                fresh[key] = value
+
+        self.entries[path] = fresh
+        self.dirty = True
+        return fresh, True
+
+    def scan(self, dirs: List[str]) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """Index every model file in dirs; returns (logical models, scan statistics)"""
+        started = time.perf_counter()
+        cold = not self.entries
+        seen: Dict[str, Dict[str, Any]] = {}
+        parsed = 0
+        scanned_dirs = []
+
+        for directory in dirs:
+            directory = os.path.abspath(directory)
+            try:
+                with os.scandir(directory) as it:
+                    scanned_dirs.append(directory)
+                    for dirent in it:
+                        if not is_model_file(dirent.name) or dirent.path in seen:
+                            continue
+                        try:
+                            stat = dirent.stat()
+                        except OSError:
+                            continue  # Broken link or vanished mid-scan
+                        entry, changed = self._refresh(dirent.path, stat)
+                        seen[dirent.path] = entry
+                        parsed += changed
+            except OSError:
+                continue  # Directory doesn't exist or can't be read - this is normal
+
+        # Forget files that disappeared from the directories we just listed
+        for path in list(self.entries):
+            if path not in seen and os.path.dirname(path) in scanned_dirs:
+                del self.entries[path]
+                self.dirty = True
+
+        self.save()
+        stats = {
+            'cold': cold,
+            'files': len(seen),
+            'parsed': parsed,
+            'reused': len(seen) - parsed,
+            'scan_ms': round((time.perf_counter() - started) * 1000, 2),
+        }
+        return group_shards(list(seen.values())), stats
+
+
+def main():
+    if len(sys.argv) < 3 or sys.argv[1] != 'scan':
+        print("Usage: model_catalog.py scan <dir> [<dir> ...]")
+        sys.exit(1)
+
+    catalog = ModelCatalog()
+    models, stats = catalog.scan(sys.argv[2:])
+    print(json.dumps({'models': models, 'stats': stats}))
+
+
+if __name__ == "__main__":
+    main()
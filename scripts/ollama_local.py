@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Local Ollama store reader for Llama Wrangler
+Finds models an Ollama installation on this machine has already pulled (manifests under
+models/manifests, layers under models/blobs/sha256-<hex>) so the Ollama downloader can
+import them into the blob store without touching the network
+"""
+
+import os
+import sys
+import json
+from pathlib import Path
+from typing import Optional, Dict, Any, List
+
+from blob_store import normalize_digest
+
+DEFAULT_REGISTRY_HOST = 'registry.ollama.ai'
+
+
+def ollama_roots() -> List[Path]:
+    """Candidate Ollama model directories, most specific first"""
+    roots = []
+    if os.environ.get('OLLAMA_MODELS'):
+        roots.append(Path(os.environ['OLLAMA_MODELS']).expanduser())
+    roots.append(Path.home() / ".ollama" / "models")
+    if sys.platform.startswith('linux'):
+        roots.append(Path("/usr/share/ollama/.ollama/models"))  # Linux install script's service user
+    return roots
+
+
+class OllamaLocalStore:
+    """Read-only view of the manifests and blobs of one or more local Ollama installations"""
+
+    def __init__(self, roots: Optional[List[Path]] = None, host: str = DEFAULT_REGISTRY_HOST):
+        # os.path.isdir treats an untraversable root (e.g. a 0700 service user's home) as absent,
+        # where Path.is_dir raises PermissionError
+        self.roots = [root for root in (roots or ollama_roots()) if os.path.isdir(root / "manifests")]
+        self.host = host
+
+    def get_manifest(self, model_path: str, tag: str) -> Optional[Dict[str, Any]]:
+        """Manifest of <namespace>/<model>:<tag> as pulled locally, or None"""
+        for root in self.roots:
+            manifest_path = root / "manifests" / self.host / model_path / tag
+            try:
+                with open(manifest_path) as f:
+                    return json.load(f)
+            except (OSError, ValueError):
+                continue
+        return None
+
+    def blob_path(self, digest: str, size: Optional[int] = None) -> Optional[Path]:
+        """Path of a complete local blob with this digest (and size, if given), or None
+
+        Ollama names blobs by their verified digest and only renames them into place once
+        the pull has checked it, so a present blob of the right size is trusted as is.
+        """
+        name = f"sha256-{normalize_digest(digest)}"
+        for root in self.roots:
+            path = root / "blobs" / name
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            if size is None or stat.st_size == size:
+                return path
+        return None
+
+    def list_models(self) -> List[Dict[str, Any]]:
+        """Every locally pulled model with its model layer, for display"""
+        models = []
+        for root in self.roots:
+            base = root / "manifests" / self.host
+            try:
+                manifest_paths = sorted(base.glob("*/*/*"))
+            except OSError:
+                continue
+            for manifest_path in manifest_paths:
+                namespace, model, tag = manifest_path.relative_to(base).parts
+                try:
+                    with open(manifest_path) as f:
+                        manifest = json.load(f)
+                except (OSError, ValueError):
+                    continue
+                layers = [layer for layer in manifest.get('layers', [])
+                          if layer.get('mediaType') == 'application/vnd.ollama.image.model']
+                if not layers:
+                    continue
+                layer = max(layers, key=lambda layer: layer.get('size', 0))
+                name = model if namespace == 'library' else f"{namespace}/{model}"
+                models.append({
+                    'name': f"{name}:{tag}",
+                    'digest': layer.get('digest'),
+                    'size': layer.get('size', 0),
+                    'available': self.blob_path(layer['digest'], layer.get('size')) is not None,
+                    'root': str(root),
+                })
+        return models
+
+
+def main():
+    # ollama_local.py list: print the models a local Ollama has pulled
+    if len(sys.argv) < 2 or sys.argv[1] != 'list':
+        print("Usage: ollama_local.py list")
+        sys.exit(1)
+    store = OllamaLocalStore()
+    print(json.dumps({'roots': [str(root) for root in store.roots], 'models': store.list_models()}))
+
+
+if __name__ == "__main__":
+    main()
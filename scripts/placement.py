@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Model file placement for Llama Wrangler
+Materialises a file at a new path by hardlink, reflink, kernel-side copy or copy, cheapest first
+"""
+
+import os
+import sys
+import json
+import time
+import errno
+import shutil
+import ctypes
+import ctypes.util
+from typing import Optional, Callable
+
+FICLONE = 0x40049409  # Linux ioctl: share extents with another file (btrfs, xfs, ...)
+COPY_CHUNK = 64 * 1024 * 1024  # Bytes per copy_file_range call / read, between progress updates
+
+# copy_file_range can't be used for this pair of files (old kernel, cross-device before
+# Linux 5.3, unsupported filesystem): fall back to a userspace copy
+RANGE_UNSUPPORTED = (errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.EPERM)
+
+
+def _reflink(src: str, dest: str) -> bool:
+    """Clone src to dest sharing data blocks, if the filesystem supports it"""
+    if sys.platform == 'darwin':
+        libc_name = ctypes.util.find_library('c')
+        if not libc_name:
+            return False
+        libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(libc, 'clonefile'):
+            return False
+        return libc.clonefile(src.encode(), dest.encode(), 0) == 0
+
+    if not sys.platform.startswith('linux'):
+        return False
+
+    import fcntl
+    src_fd = os.open(src, os.O_RDONLY)
+    try:
+        dest_fd = os.open(dest, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+        try:
+            fcntl.ioctl(dest_fd, FICLONE, src_fd)
+            return True
+        except OSError:
+            pass
+        finally:
+            os.close(dest_fd)
+        os.remove(dest)
+        return False
+    finally:
+        os.close(src_fd)
+
+
+def _copy_range(src: str, dest: str, progress: Optional[Callable[[int, int], None]] = None) -> bool:
+    """Copy inside the kernel with copy_file_range (no userspace buffers; server-side on NFS/SMB)
+
+    Returns False, leaving nothing behind, when the kernel or filesystem can't do it.
+    """
+    if not hasattr(os, 'copy_file_range'):
+        return False
+    total = os.path.getsize(src)
+    done = 0
+    with open(src, 'rb') as fsrc, open(dest, 'wb') as fdst:
+        try:
+            while done < total:
+                copied = os.copy_file_range(fsrc.fileno(), fdst.fileno(), min(COPY_CHUNK, total - done))
+                if copied == 0:
+                    raise OSError(errno.EIO, f"{src} ended after {done} of {total} bytes")
+                done += copied
+                if progress:
+                    progress(done, total)
+        except OSError as e:
+            if done or e.errno not in RANGE_UNSUPPORTED:
+                raise
+    if done < total:
+        os.remove(dest)
+        return False
+    return True
+
+
+def _copy(src: str, dest: str, progress: Optional[Callable[[int, int], None]] = None):
+    """Userspace copy, in chunks when someone is watching the progress"""
+    if not progress:
+        shutil.copyfile(src, dest)
+        return
+    total = os.path.getsize(src)
+    done = 0
+    with open(src, 'rb') as fsrc, open(dest, 'wb') as fdst:
+        while True:
+            chunk = fsrc.read(COPY_CHUNK)
+            if not chunk:
+                break
+            fdst.write(chunk)
+            done += len(chunk)
+            progress(done, total)
+
+
+def place_file(src: str, dest: str, allow_hardlink: bool = True,
+               progress: Optional[Callable[[int, int], None]] = None) -> str:
+    """Make dest a copy of src without duplicating data where possible
+
+    Tries a hardlink, then a reflink/clone, then a kernel-side copy_file_range, then a
+    regular copy; `progress(done, total)` is called as bytes are copied. The result is
+    written to a temporary name and renamed over dest so readers never see a
+    half-placed file. Returns the strategy that was used.
+    """
+    dest_dir = os.path.dirname(os.path.abspath(dest))
+    os.makedirs(dest_dir, exist_ok=True)
+    tmp_path = os.path.join(dest_dir, f".{os.path.basename(dest)}.placing")
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    strategy: Optional[str] = None
+    if allow_hardlink:
+        try:
+            os.link(src, tmp_path)
+            strategy = 'hardlink'
+        except OSError:
+            pass
+
+    if not strategy:
+        try:
+            if _reflink(src, tmp_path):
+                strategy = 'reflink'
+        except OSError:
+            pass
+
+    try:
+        if not strategy and _copy_range(src, tmp_path, progress):
+            strategy = 'copy_file_range'
+        if not strategy:
+            _copy(src, tmp_path, progress)
+            strategy = 'copy'
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    os.replace(tmp_path, dest)
+    return strategy
+
+
+def same_file(a: str, b: str) -> bool:
+    """True when both paths name the same inode"""
+    try:
+        return os.path.samefile(a, b)
+    except OSError:
+        return False
+
+
+def main():
+    # placement.py <src> <dest> [--no-hardlink]: place a file, printing progress and
+    # then {"strategy", "seconds", "bytes"} as the last line
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    if len(args) != 2:
+        print("Usage: placement.py <src> <dest> [--no-hardlink]")
+        sys.exit(1)
+    src, dest = args
+    from progress import ProgressReporter
+
+    started = time.perf_counter()
+    try:
+        size = os.path.getsize(src)
+        reporter = ProgressReporter('place', total=size, name=os.path.basename(dest))
+        strategy = place_file(src, dest, allow_hardlink='--no-hardlink' not in sys.argv, progress=reporter)
+        if strategy in ('copy_file_range', 'copy'):
+            reporter.finish()
+    except Exception as e:
+        print(json.dumps({'src': src, 'dest': dest, 'error': str(e)}))
+        sys.exit(1)
+    print(json.dumps({'src': src, 'dest': dest, 'strategy': strategy,
+                      'seconds': round(time.perf_counter() - started, 3), 'bytes': size}))
+
+
+if __name__ == "__main__":
+    main()
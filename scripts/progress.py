@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Progress reporting for Llama Wrangler scripts
+Time-throttled progress events with byte counts, rates, ETA and digest state, written as
+JSON lines when LLAMA_WRANGLER_PROGRESS=jsonl (the Electron app) or as one short text line
+"""
+
+import os
+import sys
+import json
+import time
+import threading
+from contextlib import contextmanager
+from typing import Optional, Dict, Any, Tuple, List
+
+EMIT_INTERVAL = 0.25  # Seconds between progress events
+RATE_SMOOTHING = 0.3  # Weight of the newest rate sample in the ETA estimate
+
+# Digest states: 'none' (nothing to check), 'streaming' (hashed while downloading),
+# 'verified', 'unverified' (no published digest) or 'mismatch'
+DIGEST_STATES = ('none', 'streaming', 'verified', 'unverified', 'mismatch')
+
+
+def jsonl_enabled() -> bool:
+    return os.environ.get('LLAMA_WRANGLER_PROGRESS', '').lower() == 'jsonl'
+
+
+def emit_event(event: Dict[str, Any]):
+    """Write one event: a JSON line in jsonl mode, otherwise a readable line"""
+    if jsonl_enabled():
+        print(json.dumps(event, separators=(',', ':')), flush=True)
+    elif event.get('event') == 'progress':
+        print(format_event(event), flush=True)
+    elif event.get('event') == 'stage':
+        print(f"Stage: {event['stage']}", flush=True)
+
+
+def emit_stage(stage: str, **fields):
+    """Announce a new stage (download, merge, convert, quantize, ...)"""
+    emit_event(dict({'event': 'stage', 'stage': stage}, **fields))
+
+
+def format_bytes(count: float) -> str:
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if count < 1024:
+            return f"{count:.1f} {unit}"
+        count /= 1024
+    return f"{count:.1f} TB"
+
+
+def format_event(event: Dict[str, Any]) -> str:
+    """Text form of a progress event; keeps the 'N%' token older parsers look for"""
+    parts = [f"{int(event.get('overall', event.get('percent', 0)))}%"]
+    if event.get('total'):
+        parts.append(f"{format_bytes(event['done'])} / {format_bytes(event['total'])}")
+    if event.get('rate'):
+        parts.append(f"{format_bytes(event['rate'])}/s")
+    if event.get('eta') is not None:
+        minutes, seconds = divmod(int(event['eta']), 60)
+        parts.append(f"ETA {minutes}:{seconds:02d}")
+    return '  '.join(parts)
+
+
+class ProgressReporter:
+    """Thread-safe, throttled progress for one stage; callable as (done, total)
+
+    `span` maps this stage's 0-100% onto part of the overall job bar, e.g. (10, 40).
+    """
+
+    def __init__(self, stage: str, total: int = 0, name: Optional[str] = None,
+                 span: Tuple[float, float] = (0, 100), interval: float = EMIT_INTERVAL):
+        self.stage = stage
+        self.name = name
+        self.total = total
+        self.span = span
+        self.interval = interval
+        self.done = 0
+        self.digest = 'none'
+        self.lock = threading.Lock()
+        self.started = time.monotonic()
+        self.start_done: Optional[int] = None  # Bytes already present (resumed) at start
+        self.last_emit = 0.0
+        self.last_done = 0
+        self.smoothed_rate = 0.0
+        self.events = 0
+
+    def __call__(self, done: int, total: int = 0):
+        self.update(done, total)
+
+    def update(self, done: int, total: int = 0):
+        with self.lock:
+            if self.start_done is None:
+                self.start_done = done
+                self.last_done = done
+            self.done = done
+            if total:
+                self.total = total
+            now = time.monotonic()
+            if now - self.last_emit < self.interval:
+                return
+            self._emit(now)
+
+    def set_digest(self, state: str):
+        """Record a digest state change; always emitted immediately"""
+        with self.lock:
+            self.digest = state
+            self._emit(time.monotonic())
+
+    def finish(self):
+        with self.lock:
+            if self.total:
+                self.done = max(self.done, self.total)
+            self._emit(time.monotonic())
+
+    def _emit(self, now: float):
+        window = now - self.last_emit if self.last_emit else now - self.started
+        rate = (self.done - self.last_done) / window if window > 0 else 0.0
+        self.smoothed_rate = rate if not self.events else (
+            RATE_SMOOTHING * rate + (1 - RATE_SMOOTHING) * self.smoothed_rate)
+        elapsed = now - self.started
+        avg_rate = (self.done - (self.start_done or 0)) / elapsed if elapsed > 0 else 0.0
+
+        percent = (self.done / self.total) * 100 if self.total else 0.0
+        low, high = self.span
+        event = {
+            'event': 'progress',
+            'stage': self.stage,
+            'done': self.done,
+            'total': self.total,
+            'percent': round(percent, 1),
+            'overall': round(low + (high - low) * percent / 100, 1),
+            'rate': round(rate),
+            'avg_rate': round(avg_rate),
+            'eta': (round((self.total - self.done) / self.smoothed_rate, 1)
+                    if self.total and self.smoothed_rate > 0 else None),
+            'elapsed': round(elapsed, 2),
+            'digest': self.digest,
+        }
+        if self.name:
+            event['file'] = self.name
+
+        self.last_emit = now
+        self.last_done = self.done
+        self.events += 1
+        emit_event(event)
+
+
+@contextmanager
+def watch_files(reporter: 'ProgressReporter', paths: List[str], interval: float = EMIT_INTERVAL):
+    """Feed reporter the combined size of files another process is writing
+
+    For stages run by external tools (the convert script, llama-quantize) that report no
+    progress of their own. reporter.total is the caller's size estimate, so done is held
+    just under it until the caller finishes the stage.
+    """
+    stop = threading.Event()
+
+    def sample() -> int:
+        done = 0
+        for path in paths:
+            try:
+                done += os.path.getsize(path)
+            except OSError:
+                pass
+        return min(done, int(reporter.total * 0.99)) if reporter.total else done
+
+    def run():
+        while not stop.wait(interval):
+            reporter.update(sample())
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    try:
+        yield reporter
+    finally:
+        stop.set()
+        thread.join()
+
+
+def main():
+    # progress.py demo: emit a simulated transfer, handy for checking the app's parser
+    if len(sys.argv) < 2 or sys.argv[1] != 'demo':
+        print("Usage: progress.py demo")
+        sys.exit(1)
+
+    total = 256 * 1024 * 1024
+    reporter = ProgressReporter('download', total=total, name='demo.gguf')
+    reporter.set_digest('streaming')
+    for done in range(0, total + 1, 4 * 1024 * 1024):
+        reporter.update(done)
+        time.sleep(0.02)
+    reporter.set_digest('verified')
+    reporter.finish()
+
+
+if __name__ == "__main__":
+    main()
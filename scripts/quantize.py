@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Quantization fan-out for Llama Wrangler
+Runs llama-quantize for several target types from one source GGUF at once, sizing the
+process pool by CPU cores and free RAM so every run reads the same page-cached source
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Union, Callable
+
+from gguf_reader import read_gguf
+from job_slots import stage_slot
+from build_cache import BuildCache, tool_fingerprint
+from digest_cache import digest_cache
+from disk_budget import estimate_output_size
+from progress import ProgressReporter, watch_files
+from toolchain import cached_path
+
+VALID_QUANT_TYPES = {
+    'Q2_K', 'Q3_K_S', 'Q3_K_M', 'Q3_K_L',
+    'Q4_0', 'Q4_K_S', 'Q4_K_M',
+    'Q5_0', 'Q5_K_S', 'Q5_K_M',
+    'Q6_K', 'Q8_0', 'F16', 'F32',
+}
+
+MIN_THREADS_PER_RUN = 2
+WORKER_OVERHEAD = 256 * 1024 * 1024  # Fixed RSS of one llama-quantize process
+TENSOR_BUFFER_FACTOR = 6  # f32 working copy plus output buffer of the largest tensor
+
+
+def as_targets(quantization: Union[str, List[str], None]) -> List[str]:
+    """Normalise 'Q4_K_M', 'Q4_K_M,Q8_0' or a list into a de-duplicated list"""
+    if not quantization:
+        return []
+    items = quantization.split(',') if isinstance(quantization, str) else quantization
+    targets = []
+    for item in items:
+        item = item.strip()
+        if item and item not in targets:
+            targets.append(item)
+    return targets
+
+
+def find_quantize_tool(llama_cpp_path: Optional[Union[str, Path]] = None) -> Optional[Path]:
+    """Locate llama-quantize in a llama.cpp checkout, falling back to PATH"""
+    def resolve() -> Optional[Path]:
+        if llama_cpp_path:
+            root = Path(llama_cpp_path)
+            for candidate in (root / "build" / "bin" / "llama-quantize", root / "llama-quantize", root / "quantize"):
+                if candidate.exists():
+                    return candidate
+        found = shutil.which('llama-quantize')
+        return Path(found) if found else None
+    return cached_path(('llama-quantize', str(llama_cpp_path or '')), resolve)
+
+
+def tool_env(tool: Path) -> Dict[str, str]:
+    """Environment with llama.cpp's shared libraries on the loader path"""
+    env = os.environ.copy()
+    lib_dir = str(tool.parent.parent if tool.parent.name == 'bin' else tool.parent)
+    var = 'DYLD_LIBRARY_PATH' if sys.platform == 'darwin' else 'LD_LIBRARY_PATH'
+    env[var] = os.pathsep.join(p for p in (lib_dir, env.get(var)) if p)
+    return env
+
+
+def available_memory() -> int:
+    """Bytes of RAM available to new processes (MemAvailable on Linux)"""
+    try:
+        with open('/proc/meminfo', 'r') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        # No MemAvailable (macOS): assume half of physical memory is usable
+        return os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES') // 2
+    except (ValueError, OSError, AttributeError):
+        return 0
+
+
+def plan_pool(source: str, targets: List[str], max_workers: Optional[int] = None) -> Dict[str, int]:
+    """Concurrent runs and threads per run for quantizing source into targets
+
+    Cores are split so each run gets at least MIN_THREADS_PER_RUN threads; RAM left
+    after keeping the source cached must cover each run's tensor buffers.
+    """
+    cores = os.cpu_count() or 1
+    by_cpu = max(1, cores // MIN_THREADS_PER_RUN)
+
+    try:
+        spans = read_gguf(source).tensor_spans()
+        largest = max((end - start for start, end in spans), default=0)
+    except Exception:
+        largest = 0
+    per_run = WORKER_OVERHEAD + TENSOR_BUFFER_FACTOR * largest
+    spare = available_memory() - os.path.getsize(source)
+    by_ram = max(1, spare // per_run) if spare > 0 else 1
+
+    workers = max(1, min(len(targets), by_cpu, by_ram, max_workers or len(targets)))
+    return {'workers': workers, 'threads': max(1, cores // workers), 'per_run_bytes': per_run}
+
+
+def output_path_for(output_prefix: str, quantization: str) -> str:
+    return f"{output_prefix}-{quantization}.gguf"
+
+
+def quantize_fanout(source: str, targets: List[str], output_prefix: Optional[str] = None,
+                    tool: Optional[Path] = None, llama_cpp_path: Optional[Union[str, Path]] = None,
+                    max_workers: Optional[int] = None,
+                    log: Optional[Callable[[str], None]] = None) -> List[Dict[str, Any]]:
+    """Quantize source into every target type; one result dict per target, in order"""
+    log = log or (lambda message: print(message, flush=True))
+    tool = tool or find_quantize_tool(llama_cpp_path)
+    if not tool:
+        raise Exception("llama-quantize not found. Please ensure llama.cpp is properly installed.")
+    unknown = [t for t in targets if t not in VALID_QUANT_TYPES]
+    if unknown:
+        raise Exception(f"Invalid quantization type: {', '.join(unknown)}")
+
+    if output_prefix is None:
+        output_prefix = str(Path(source).with_suffix(''))
+    plan = plan_pool(source, targets, max_workers)
+    log(f"Quantizing to {', '.join(targets)}: {plan['workers']} concurrent runs, "
+        f"{plan['threads']} threads each")
+
+    # Read the source ahead once; concurrent runs then share its page cache
+    if hasattr(os, 'posix_fadvise'):
+        fd = os.open(source, os.O_RDONLY)
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+        finally:
+            os.close(fd)
+
+    env = tool_env(tool)
+
+    def run(quantization: str) -> Dict[str, Any]:
+        output = output_path_for(output_prefix, quantization)
+        cmd = [str(tool), source, output, quantization, str(plan['threads'])]
+        started = time.perf_counter()
+        result = subprocess.run(cmd, env=env, capture_output=True, text=True)
+        elapsed = time.perf_counter() - started
+        entry = {
+            'quantization': quantization,
+            'output': output,
+            'seconds': round(elapsed, 2),
+            'success': result.returncode == 0 and os.path.exists(output),
+        }
+        if entry['success']:
+            entry['size'] = os.path.getsize(output)
+            log(f"{quantization}: {entry['size'] / 1e9:.2f} GB in {elapsed:.1f}s")
+        else:
+            entry['error'] = (result.stderr or result.stdout or 'Unknown error').strip()[-500:]
+            log(f"{quantization}: failed after {elapsed:.1f}s")
+        return entry
+
+    with ThreadPoolExecutor(max_workers=plan['workers']) as pool:
+        return list(pool.map(run, targets))
+
+
+def quantize_cached(source: str, targets: List[str], output_prefix: Optional[str] = None,
+                    tool: Optional[Path] = None, llama_cpp_path: Optional[Union[str, Path]] = None,
+                    source_digest: Optional[str] = None, cache: Optional[BuildCache] = None,
+                    log: Optional[Callable[[str], None]] = None,
+                    reporter: Optional[ProgressReporter] = None) -> List[Dict[str, Any]]:
+    """quantize_fanout that links cached outputs first and caches what it builds
+
+    Hits are keyed by the source's digest and the quantizer binary's fingerprint, so
+    renamed sources still hit and a llama.cpp upgrade rebuilds. Without a source digest
+    nothing is cached: reading a multi-GB source just to key it costs more than a hit saves.
+    `reporter` gets the outputs' growth against their estimated sizes.
+    """
+    if reporter:
+        prefix = output_prefix if output_prefix is not None else str(Path(source).with_suffix(''))
+        source_size = os.path.getsize(source)
+        reporter.total = sum(estimate_output_size(source_size, q) for q in targets)
+        with watch_files(reporter, [output_path_for(prefix, q) for q in targets]):
+            results = quantize_cached(source, targets, prefix, tool=tool, llama_cpp_path=llama_cpp_path,
+                                      source_digest=source_digest, cache=cache, log=log)
+        reporter.finish()
+        return results
+
+    log = log or (lambda message: print(message, flush=True))
+    tool = tool or find_quantize_tool(llama_cpp_path)
+    if not tool:
+        raise Exception("llama-quantize not found. Please ensure llama.cpp is properly installed.")
+    if not source_digest:
+        return quantize_fanout(source, targets, output_prefix, tool=tool, log=log)
+    cache = cache or BuildCache()
+    if output_prefix is None:
+        output_prefix = str(Path(source).with_suffix(''))
+
+    tool_hash = tool_fingerprint(tool)
+    results: Dict[str, Dict[str, Any]] = {}
+    for quantization in targets:
+        output = output_path_for(output_prefix, quantization)
+        if cache.lookup(source_digest, quantization, tool_hash, output):
+            results[quantization] = {
+                'quantization': quantization, 'output': output, 'seconds': 0.0,
+                'success': True, 'size': os.path.getsize(output), 'cached': True,
+            }
+            log(f"{quantization}: reused cached build")
+
+    missing = [q for q in targets if q not in results]
+    if missing:
+        for entry in quantize_fanout(source, missing, output_prefix, tool=tool, log=log):
+            if entry['success']:
+                cache.put(source_digest, entry['quantization'], tool_hash, entry['output'])
+            results[entry['quantization']] = entry
+    return [results[q] for q in targets]
+
+
+def main():
+    # quantize.py <source.gguf> <output-prefix> <QUANT[,QUANT...]> [--tool <path>]
+    # Prints progress lines, then one JSON line: {"results": [...]}
+    args = list(sys.argv[1:])
+    tool = None
+    if '--tool' in args:
+        index = args.index('--tool')
+        tool = Path(args[index + 1]) if index + 1 < len(args) else None
+        del args[index:index + 2]
+    if len(args) < 3:
+        print("Usage: quantize.py <source.gguf> <output-prefix> <QUANT[,QUANT...]> [--tool <path>]")
+        sys.exit(1)
+
+    source, output_prefix, targets = args[0], args[1], as_targets(args[2])
+    try:
+        with stage_slot('cpu', on_wait=lambda message: print(message, flush=True)):
+            # Cached only when the source's digest is already known (e.g. a verified download)
+            results = quantize_cached(source, targets, output_prefix, tool=tool,
+                                      source_digest=digest_cache().get(source))
+    except Exception as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    print(json.dumps({'results': results}), flush=True)
+    sys.exit(0 if all(r['success'] for r in results) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,470 @@
+#!/usr/bin/env python3
+"""
+Segmented HTTP download engine for Llama Wrangler
+Splits large files into byte ranges and fetches them over parallel connections,
+resuming a segment from its last byte when its connection drops
+"""
+
+import os
+import json
+import time
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, List, Callable, Tuple
+
+import requests
+
+from transport import shared_session, backoff_delay, STREAM_ERRORS
+
+DEFAULT_CONNECTIONS = 8
+MIN_SEGMENT_SIZE = 32 * 1024 * 1024  # Don't split below 32MB per connection
+CHUNK_SIZE = 1024 * 1024  # 1MB reads
+JOURNAL_INTERVAL = 2.0  # Seconds between progress journal checkpoints
+PARTIAL_SUFFIX = '.partial'
+JOURNAL_SUFFIX = '.partial.json'
+STREAM_RETRIES = 5  # Consecutive failed attempts without progress before a segment gives up
+
+
+def default_connections() -> int:
+    """Connection count from LLAMA_WRANGLER_CONNECTIONS, falling back to the default"""
+    try:
+        value = int(os.environ.get('LLAMA_WRANGLER_CONNECTIONS', DEFAULT_CONNECTIONS))
+    except ValueError:
+        return DEFAULT_CONNECTIONS
+    return max(1, value)
+
+
+def has_partial(dest_path: str) -> bool:
+    """True when an interrupted download of dest_path can be resumed"""
+    return os.path.exists(dest_path + JOURNAL_SUFFIX) and os.path.exists(dest_path + PARTIAL_SUFFIX)
+
+
+class Segment:
+    """A byte range [start, end) of the target file and how much of it has landed"""
+
+    def __init__(self, start: int, end: int, done: int = 0):
+        self.start = start
+        self.end = end
+        self.done = done
+
+    @property
+    def offset(self) -> int:
+        return self.start + self.done
+
+    @property
+    def remaining(self) -> int:
+        return self.end - self.offset
+
+    def to_list(self) -> List[int]:
+        return [self.start, self.end, self.done]
+
+
+class IncompleteSegment(Exception):
+    """The server closed a range response before sending all of it"""
+
+
+class DigestMismatch(Exception):
+    """The downloaded data doesn't hash to the expected sha256; the .partial has been removed"""
+
+
+class DownloadCancelled(Exception):
+    """The caller's cancel event was set; the .partial and its journal are kept for resume"""
+
+
+class StreamingHasher(threading.Thread):
+    """Feeds SHA-256 in file order while segments land out of order
+
+    The hasher trails the contiguous prefix of the file that has been written and
+    reads it straight back through the page cache, so the digest is ready as soon
+    as the last segment completes instead of needing a second pass over the file.
+    """
+
+    def __init__(self, path: str, segments: List[Segment], total_size: int):
+        super().__init__(daemon=True)
+        self.path = path
+        self.segments = sorted(segments, key=lambda seg: seg.start)
+        self.total_size = total_size
+        self.position = 0
+        self.sha256 = hashlib.sha256()
+        self.error = None
+        self._cond = threading.Condition()
+        self._closing = False
+        self._cancelled = False
+
+    def notify(self):
+        """Wake the hasher after new bytes were written"""
+        with self._cond:
+            self._cond.notify()
+
+    def _available(self) -> int:
+        """Bytes written contiguously past the current hash position"""
+        for seg in self.segments:
+            if seg.start <= self.position < seg.end:
+                return seg.offset - self.position
+        return 0
+
+    def run(self):
+        try:
+            with open(self.path, 'rb') as f:
+                while self.position < self.total_size and not self._cancelled:
+                    with self._cond:
+                        available = self._available()
+                        while available <= 0 and not self._closing:
+                            self._cond.wait(0.5)
+                            available = self._available()
+                    if available <= 0:
+                        break
+                    f.seek(self.position)
+                    data = f.read(min(available, CHUNK_SIZE * 8))
+                    if not data:
+                        break
+                    self.sha256.update(data)
+                    self.position += len(data)
+        except Exception as e:
+            self.error = e
+
+    def cancel(self):
+        """Stop hashing early because the download failed"""
+        with self._cond:
+            self._cancelled = self._closing = True
+            self._cond.notify()
+
+    def finish(self) -> str:
+        """Wait for the hasher to drain and return the hex digest"""
+        with self._cond:
+            self._closing = True
+            self._cond.notify()
+        self.join()
+        if self.error:
+            raise self.error
+        if self.position != self.total_size:
+            raise Exception(f"Hashed {self.position} of {self.total_size} bytes")
+        return self.sha256.hexdigest()
+
+
+class SegmentedDownloader:
+    """Downloads a URL into a preallocated file using concurrent Range requests"""
+
+    def __init__(self, session: Optional[requests.Session] = None,
+                 connections: Optional[int] = None,
+                 headers: Optional[Dict[str, str]] = None,
+                 progress_callback: Optional[Callable[[int, int], None]] = None,
+                 timeout: Tuple[int, int] = (10, 60),
+                 limiter=None, cancel: Optional[threading.Event] = None):
+        self.session = session or shared_session()
+        self.connections = connections or default_connections()
+        self.headers = dict(headers or {})
+        self.progress_callback = progress_callback
+        self.timeout = timeout
+        # Optional object with consume(nbytes), e.g. a bandwidth cap; the transport's by default
+        self.limiter = limiter or getattr(self.session, 'limiter', None)
+        self._lock = threading.Lock()
+        self._checkpoint_lock = threading.Lock()  # One journal writer at a time, outside _lock
+        self._downloaded = 0
+        self._total = 0
+        self._abort = threading.Event()
+        self.cancel = cancel  # Set from another thread to stop this download (e.g. a sibling failed)
+        self._segments: List[Segment] = []
+        self._journal_path = None
+        self._journal_meta: Dict[str, Any] = {}
+        self._last_checkpoint = 0.0
+        self.validator = None
+        self.resumed_from = 0
+        self.sha256 = None
+        self._hasher = None
+        self._single_hash = None
+
+    def probe(self, url: str) -> Tuple[int, bool]:
+        """Return (total_size, accepts_ranges) using a one-byte ranged GET"""
+        headers = dict(self.headers, Range='bytes=0-0')
+        response = self.session.get(url, headers=headers, stream=True,
+                                    allow_redirects=True, timeout=self.timeout)
+        try:
+            response.raise_for_status()
+            self.validator = response.headers.get('etag') or response.headers.get('last-modified')
+            if response.status_code == 206:
+                content_range = response.headers.get('content-range', '')
+                total = content_range.rsplit('/', 1)[-1]
+                if total.isdigit():
+                    return int(total), True
+            return int(response.headers.get('content-length', 0)), False
+        finally:
+            response.close()
+
+    def plan_segments(self, total_size: int) -> List[Segment]:
+        """Split total_size into at most self.connections contiguous segments"""
+        count = max(1, min(self.connections, total_size // MIN_SEGMENT_SIZE))
+        step = -(-total_size // count)
+        return [Segment(start, min(start + step, total_size))
+                for start in range(0, total_size, step)]
+
+    def download(self, url: str, dest_path: str, expected_size: Optional[int] = None,
+                 expected_sha256: Optional[str] = None) -> str:
+        """Download url to dest_path, resuming any interrupted attempt
+
+        Data is written to dest_path + '.partial' alongside a small JSON journal of
+        per-segment offsets. The partial file is renamed over dest_path only once
+        every byte has landed, so a crash never leaves a truncated file behind.
+        The SHA-256 is computed while downloading and, when expected_sha256 is
+        given, checked before the rename.
+        """
+        if expected_sha256 and expected_sha256.startswith('sha256:'):
+            expected_sha256 = expected_sha256[len('sha256:'):]
+        self.validator = None
+        self.resumed_from = 0
+        self.sha256 = None
+        total_size, accepts_ranges = self.probe(url)
+        if expected_size and total_size and total_size != expected_size:
+            raise Exception(f"Size mismatch: server reports {total_size} bytes, expected {expected_size}")
+        total_size = total_size or expected_size or 0
+
+        partial_path = dest_path + PARTIAL_SUFFIX
+        self._journal_path = dest_path + JOURNAL_SUFFIX
+        self._journal_meta = {'url': url, 'size': total_size, 'validator': self.validator}
+        self._downloaded = 0
+        self._total = total_size
+        self._abort.clear()
+
+        if not accepts_ranges or total_size == 0:
+            self._segments = []
+            self._discard_journal()
+            self._single_hash = hashlib.sha256()
+            self._download_single(url, partial_path)
+            self.sha256 = self._single_hash.hexdigest()
+        else:
+            self._segments = self._load_journal(partial_path)
+            if self._segments:
+                self._downloaded = sum(seg.done for seg in self._segments)
+                self.resumed_from = self._downloaded
+                if self.progress_callback:
+                    self.progress_callback(self._downloaded, total_size)
+            else:
+                self._segments = self.plan_segments(total_size)
+                self._preallocate(partial_path, total_size)
+            self._checkpoint(partial_path, force=True)
+
+            # A resumed download re-hashes its existing prefix once from disk
+            self._hasher = StreamingHasher(partial_path, self._segments, total_size)
+            self._hasher.start()
+            try:
+                self._download_segments(url, partial_path)
+            except BaseException:
+                self._hasher.cancel()
+                raise
+            finally:
+                self._checkpoint(partial_path, force=True)
+                hasher, self._hasher = self._hasher, None
+            self.sha256 = hasher.finish()
+
+        if expected_sha256 and self.sha256 != expected_sha256.lower():
+            os.remove(partial_path)
+            self._discard_journal()
+            raise DigestMismatch(f"Digest mismatch: expected sha256:{expected_sha256}, got sha256:{self.sha256}")
+
+        self._finalize(partial_path, dest_path)
+        return dest_path
+
+    def _stopped(self) -> bool:
+        return self._abort.is_set() or bool(self.cancel and self.cancel.is_set())
+
+    def _download_segments(self, url: str, partial_path: str):
+        """Run every unfinished segment on its own connection"""
+        pending = [seg for seg in self._segments if seg.remaining > 0]
+        if not pending:
+            return
+
+        workers = min(len(pending), self.connections)
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(self._download_segment, url, partial_path, seg)
+                       for seg in pending]
+            errors = []
+            for future in futures:
+                try:
+                    future.result()
+                except Exception as e:
+                    self._abort.set()
+                    errors.append(e)
+
+        if errors:
+            raise errors[0]
+        if self._stopped():
+            raise DownloadCancelled(f"Download of {url} cancelled")
+
+    def _load_journal(self, partial_path: str) -> List[Segment]:
+        """Return saved segments if the journal matches this download, else start over"""
+        try:
+            with open(self._journal_path, 'r') as f:
+                journal = json.load(f)
+            if not os.path.exists(partial_path):
+                raise ValueError("partial file missing")
+            if os.path.getsize(partial_path) != self._journal_meta['size']:
+                raise ValueError("partial file size changed")
+            for key in ('size', 'validator'):
+                if journal.get(key) != self._journal_meta[key]:
+                    raise ValueError(f"remote {key} changed")
+            return [Segment(*entry) for entry in journal['segments']]
+        except (OSError, ValueError, KeyError, TypeError):
+            self._discard_journal()
+            return []
+
+    def _checkpoint(self, partial_path: str, force: bool = False):
+        """Persist segment offsets, after making the data they describe durable
+
+        Must not be called with _lock held. Segment threads skip the checkpoint while
+        another thread is writing one; forced checkpoints wait for it.
+        """
+        if not self._checkpoint_lock.acquire(blocking=force):
+            return
+        try:
+            with self._lock:
+                now = time.monotonic()
+                if not force and now - self._last_checkpoint < JOURNAL_INTERVAL:
+                    return
+                self._last_checkpoint = now
+                # Offsets taken before the fsync, so the journal never claims unsynced data
+                segments = [seg.to_list() for seg in self._segments]
+
+            fd = os.open(partial_path, os.O_RDWR)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+
+            tmp_path = self._journal_path + '.tmp'
+            with open(tmp_path, 'w') as f:
+                json.dump(dict(self._journal_meta, segments=segments), f)
+            os.replace(tmp_path, self._journal_path)
+        finally:
+            self._checkpoint_lock.release()
+
+    def _discard_journal(self):
+        """Remove a stale journal so the next attempt starts cleanly"""
+        if self._journal_path and os.path.exists(self._journal_path):
+            os.remove(self._journal_path)
+
+    def _finalize(self, partial_path: str, dest_path: str):
+        """Flush the completed partial file and atomically move it into place"""
+        with open(partial_path, 'rb+') as f:
+            os.fsync(f.fileno())
+        os.replace(partial_path, dest_path)
+        self._discard_journal()
+
+    def _preallocate(self, dest_path: str, size: int):
+        """Reserve the full file size up front so segments can write at their offsets"""
+        fd = os.open(dest_path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if hasattr(os, 'posix_fallocate'):
+                try:
+                    os.posix_fallocate(fd, 0, size)
+                    return
+                except OSError:
+                    pass  # Filesystem doesn't support it, sparse file is fine
+            os.ftruncate(fd, size)
+        finally:
+            os.close(fd)
+
+    def _retry_stream(self, url: str, attempt: int, error: Exception) -> bool:
+        """Back off before retrying a dropped stream; False once retries are exhausted"""
+        if attempt > STREAM_RETRIES or self._stopped():
+            return False
+        record = getattr(self.session, 'record_retry', None)
+        if record:
+            record(url, f"stream {type(error).__name__}")
+        time.sleep(backoff_delay(attempt))
+        return True
+
+    def _download_segment(self, url: str, dest_path: str, segment: Segment):
+        """Fetch one byte range, resuming from the last byte written if the stream drops"""
+        attempt = 0
+        while segment.remaining > 0 and not self._stopped():
+            before = segment.done
+            try:
+                self._fetch_segment(url, dest_path, segment)
+            except STREAM_ERRORS + (IncompleteSegment,) as e:
+                attempt = 1 if segment.done > before else attempt + 1
+                if not self._retry_stream(url, attempt, e):
+                    raise
+
+    def _fetch_segment(self, url: str, dest_path: str, segment: Segment):
+        """Fetch the rest of one byte range and write it at its own offset"""
+        if segment.remaining <= 0:
+            return
+        headers = dict(self.headers, Range=f'bytes={segment.offset}-{segment.end - 1}')
+        response = self.session.get(url, headers=headers, stream=True,
+                                    allow_redirects=True, timeout=self.timeout)
+        try:
+            response.raise_for_status()
+            if response.status_code != 206:
+                raise Exception("Server ignored Range request for segment")
+
+            with open(dest_path, 'r+b', buffering=0) as f:
+                f.seek(segment.offset)
+                for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                    if self._stopped():
+                        return
+                    if not chunk:
+                        continue
+                    chunk = chunk[:segment.remaining]
+                    f.write(chunk)
+                    segment.done += len(chunk)
+                    self._advance(len(chunk), dest_path)
+                    if segment.remaining == 0:
+                        break
+
+            if segment.remaining > 0:
+                raise IncompleteSegment(f"Segment at {segment.start} ended early ({segment.remaining} bytes short)")
+        finally:
+            response.close()
+
+    def _download_single(self, url: str, dest_path: str):
+        """Plain single-stream download for servers without Range support
+
+        Without ranges a dropped stream can only restart from the beginning.
+        """
+        attempt = 0
+        while True:
+            written = []
+            try:
+                self._fetch_single(url, dest_path, written)
+                return
+            except STREAM_ERRORS as e:
+                attempt += 1
+                with self._lock:
+                    self._downloaded -= sum(written)
+                self._single_hash = hashlib.sha256()
+                if not self._retry_stream(url, attempt, e):
+                    raise
+
+    def _fetch_single(self, url: str, dest_path: str, written: List[int]):
+        response = self.session.get(url, headers=self.headers, stream=True,
+                                    allow_redirects=True, timeout=self.timeout)
+        try:
+            response.raise_for_status()
+            if not self._total:
+                self._total = int(response.headers.get('content-length', 0))
+            with open(dest_path, 'wb') as f:
+                for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                    if self._stopped():
+                        raise DownloadCancelled(f"Download of {url} cancelled")
+                    if chunk:
+                        f.write(chunk)
+                        self._single_hash.update(chunk)
+                        written.append(len(chunk))
+                        self._advance(len(chunk))
+        finally:
+            response.close()
+
+    def _advance(self, nbytes: int, partial_path: Optional[str] = None):
+        """Record progress across all segments, notify the callback and checkpoint"""
+        with self._lock:
+            self._downloaded += nbytes
+            downloaded, total = self._downloaded, self._total
+            if self.progress_callback:
+                self.progress_callback(downloaded, total)
+        if partial_path and self._segments:
+            self._checkpoint(partial_path)
+        if self._hasher:
+            self._hasher.notify()
+        if self.limiter:
+            self.limiter.consume(nbytes)
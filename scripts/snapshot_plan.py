@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Selective HF snapshot planning for Llama Wrangler
+Picks the files llama.cpp's HF converter actually reads from a repo tree: config,
+tokenizer and one complete safetensors variant from the repo root, plus any remote-code
+modules the config names. Duplicate weight formats, adapters and subfolders (original/,
+onnx/, ...) are skipped, and the plan reports its size before anything is downloaded
+"""
+
+import re
+import sys
+import json
+from fnmatch import fnmatch
+from typing import Optional, Dict, Any, List
+from urllib.parse import quote
+
+from hf_tree import HFTreeCache, hf_endpoint, hf_auth_headers
+
+# Read by convert_hf_to_gguf.py (directly or through transformers' AutoTokenizer)
+CONVERTER_FILES = [
+    'config.json', 'generation_config.json',
+    'tokenizer.json', 'tokenizer_config.json', 'tokenizer.model', 'special_tokens_map.json',
+    'added_tokens.json', 'vocab.json', 'vocab.txt', 'merges.txt', 'spiece.model',
+    'sentencepiece.bpe.model', '*.tiktoken', 'chat_template.json', 'chat_template.jinja',
+    'tokenization_*.py', 'configuration_*.py',
+]
+
+SHARD_PATTERN = re.compile(r'^(?P<prefix>.+)-(?P<index>\d{5})-of-(?P<count>\d{5})\.safetensors$')
+
+# Weight sets the HF converter must not mix with the transformers-format ones
+SKIPPED_WEIGHT_PREFIXES = ('consolidated', 'adapter_')  # Mistral-native weights, LoRA adapters
+
+CONFIG_FETCH_TIMEOUT = 15
+
+
+def weight_groups(files: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+    """Root-level safetensors grouped into variants: one entry per shard set or single file"""
+    groups: Dict[str, List[Dict[str, Any]]] = {}
+    for item in files:
+        path = item['path']
+        if '/' in path or not path.endswith('.safetensors'):
+            continue
+        match = SHARD_PATTERN.match(path)
+        prefix = f"{match['prefix']} ({int(match['count'])} shards)" if match else path[:-len('.safetensors')]
+        groups.setdefault(prefix, []).append(item)
+
+    # A shard set with files missing from the listing can't be converted
+    complete = {}
+    for prefix, items in groups.items():
+        match = SHARD_PATTERN.match(items[0]['path'])
+        if match and len(items) != int(match['count']):
+            continue
+        complete[prefix] = sorted(items, key=lambda item: item['path'])
+    return complete
+
+
+def choose_weights(groups: Dict[str, List[Dict[str, Any]]]) -> Optional[str]:
+    """The variant to convert: transformers' own model*.safetensors, else the largest set"""
+    candidates = {prefix: items for prefix, items in groups.items()
+                  if not prefix.startswith(SKIPPED_WEIGHT_PREFIXES)}
+    if not candidates:
+        return None
+    for prefix in sorted(candidates):
+        if prefix == 'model' or prefix.startswith('model ('):
+            return prefix
+    return max(candidates, key=lambda prefix: sum(item.get('size', 0) for item in candidates[prefix]))
+
+
+def remote_code_modules(config: Optional[Dict[str, Any]]) -> List[str]:
+    """Python files named by the config's auto_map (trust_remote_code tokenizers and configs)"""
+    modules = set()
+    for value in ((config or {}).get('auto_map') or {}).values():
+        for reference in (value if isinstance(value, list) else [value]):
+            if isinstance(reference, str) and '.' in reference:
+                module = reference.split('--')[-1].rsplit('.', 1)[0]
+                modules.add(f"{module.replace('.', '/')}.py")
+    return sorted(modules)
+
+
+def fetch_config(tree: HFTreeCache, repo_id: str, revision: str) -> Optional[Dict[str, Any]]:
+    """config.json of the repo (a few KB), for the architecture and remote-code modules"""
+    url = f"{hf_endpoint()}/{repo_id}/resolve/{quote(revision, safe='')}/config.json"
+    try:
+        response = tree.session.get(url, headers=hf_auth_headers(), timeout=CONFIG_FETCH_TIMEOUT)
+        response.raise_for_status()
+        return response.json()
+    except Exception:
+        return None
+
+
+def plan_files(files: List[Dict[str, Any]], config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Split a repo listing into the files to fetch (smallest first) and the ones skipped"""
+    groups = weight_groups(files)
+    weights = choose_weights(groups)
+    wanted_weights = {item['path'] for item in groups.get(weights, [])}
+    wanted_code = set(remote_code_modules(config))
+
+    planned, skipped = [], []
+    for item in files:
+        path = item['path']
+        root_level = '/' not in path
+        if path in wanted_weights or path in wanted_code:
+            planned.append(item)
+        elif root_level and any(fnmatch(path, pattern) for pattern in CONVERTER_FILES):
+            planned.append(item)
+        else:
+            if path.endswith('.safetensors') and root_level:
+                reason = 'other weight variant'
+            elif not root_level:
+                reason = 'subfolder'
+            else:
+                reason = 'not read by the converter'
+            skipped.append(dict(item, reason=reason))
+
+    architectures = (config or {}).get('architectures') or []
+    return {
+        'architecture': architectures[0] if architectures else (config or {}).get('model_type'),
+        'weights': weights,
+        'variants': sorted(groups),
+        'files': sorted(planned, key=lambda f: (f.get('size', 0), f['path'])),
+        'bytes': sum(item.get('size', 0) for item in planned),
+        'skipped': sorted(skipped, key=lambda f: -f.get('size', 0)),
+        'skipped_bytes': sum(item.get('size', 0) for item in skipped),
+    }
+
+
+def plan_snapshot(tree: HFTreeCache, repo_id: str, revision: str = "main") -> Dict[str, Any]:
+    """List the repo through the tree cache and plan the minimal snapshot for conversion"""
+    files = tree.list_files(repo_id, revision)
+    config = fetch_config(tree, repo_id, revision) if any(f['path'] == 'config.json' for f in files) else None
+    return dict(plan_files(files, config), repo_id=repo_id, revision=revision)
+
+
+def format_plan(plan: Dict[str, Any]) -> str:
+    weights = plan['weights'] or 'no convertible safetensors'
+    return (f"Planned {len(plan['files'])} files, {plan['bytes'] / 1e9:.2f} GB "
+            f"({plan['architecture'] or 'unknown architecture'}, weights: {weights}); "
+            f"skipping {len(plan['skipped'])} files, {plan['skipped_bytes'] / 1e9:.2f} GB")
+
+
+def main():
+    # snapshot_plan.py <org/repo> [revision]: print the planned file set without downloading
+    if len(sys.argv) < 2:
+        print("Usage: snapshot_plan.py <org/repo> [revision]")
+        sys.exit(1)
+    try:
+        from transport import shared_session
+        plan = plan_snapshot(HFTreeCache(session=shared_session()), sys.argv[1],
+                             sys.argv[2] if len(sys.argv) > 2 else "main")
+    except Exception as e:
+        print(json.dumps({'repo_id': sys.argv[1], 'error': str(e)}))
+        sys.exit(1)
+    print(format_plan(plan), file=sys.stderr)
+    print(json.dumps(plan))
+
+
+if __name__ == "__main__":
+    main()
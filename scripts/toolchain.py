@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+llama.cpp toolchain discovery for Llama Wrangler
+Finds the llama.cpp checkout and its tools once per process and remembers them while
+they still exist, so the resident worker resolves them at startup and every job it
+forks inherits the answer
+"""
+
+import os
+import sys
+import json
+import time
+from pathlib import Path
+from typing import Optional, Dict, Any, Callable, Hashable
+
+_paths: Dict[Hashable, Path] = {}
+
+
+def cached_path(key: Hashable, resolve: Callable[[], Optional[Path]]) -> Optional[Path]:
+    """resolve() once per key; misses aren't cached, so a later build is found"""
+    path = _paths.get(key)
+    if path is not None and path.exists():
+        return path
+    path = resolve()
+    if path is not None:
+        _paths[key] = path
+    else:
+        _paths.pop(key, None)
+    return path
+
+
+def llama_cpp_locations() -> list:
+    home = Path.home()
+    return [
+        home / ".llama-wrangler" / "llama.cpp",
+        home / ".METALlama.cpp",  # METALlama installation
+        Path.cwd() / "llama.cpp",
+        home / "llama.cpp",
+        Path("/usr/local/llama.cpp"),
+    ]
+
+
+def has_converter_scripts(path: Path) -> bool:
+    """Check if the path has converter scripts"""
+    return any((
+        (path / "convert-hf-to-gguf.py").exists(),
+        (path / "convert_hf_to_gguf.py").exists(),
+        (path / "convert.py").exists()
+    ))
+
+
+def find_llama_cpp(custom_path: Optional[str] = None, require_converter: bool = False) -> Optional[Path]:
+    """Find the llama.cpp installation: custom_path if usable, else the common locations"""
+    def resolve() -> Optional[Path]:
+        usable = has_converter_scripts if require_converter else (lambda path: True)
+        candidates = ([Path(custom_path)] if custom_path else []) + llama_cpp_locations()
+        for path in candidates:
+            if path.exists() and usable(path):
+                return path
+        return None
+    return cached_path(('llama.cpp', custom_path, require_converter, os.getcwd()), resolve)
+
+
+def warm(custom_path: Optional[str] = None) -> Dict[str, Any]:
+    """Resolve every tool jobs use and fingerprint them; returns what was found and how long it took"""
+    from quantize import find_quantize_tool
+    from build_cache import tool_fingerprint
+
+    started = time.perf_counter()
+    llama_cpp = find_llama_cpp(custom_path)
+    converter_root = find_llama_cpp(custom_path, require_converter=True)
+    quantize_tool = find_quantize_tool(llama_cpp)
+    if quantize_tool:
+        tool_fingerprint(quantize_tool)
+    if converter_root and (converter_root / "gguf-py").exists():
+        tool_fingerprint(converter_root / "gguf-py")
+    return {
+        'llama_cpp': str(llama_cpp) if llama_cpp else None,
+        'converter_root': str(converter_root) if converter_root else None,
+        'quantize_tool': str(quantize_tool) if quantize_tool else None,
+        'warm_ms': round((time.perf_counter() - started) * 1000, 2),
+    }
+
+
+def main():
+    # toolchain.py [llama_cpp_path]: print the resolved toolchain
+    print(json.dumps(warm(sys.argv[1] if len(sys.argv) > 1 else None)))
+
+
+if __name__ == "__main__":
+    main()
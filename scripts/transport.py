@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Shared HTTP transport for Llama Wrangler downloads
+One pooled keep-alive requests session per process with default connect/read timeouts,
+exponential-backoff retries on transient statuses and connection resets, the global
+bandwidth cap, and per-host connection and retry statistics
+"""
+
+import sys
+import json
+import time
+import random
+import threading
+from typing import Optional, Dict, Any, Callable
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.util.retry import Retry
+
+from job_slots import bandwidth_limiter
+
+USER_AGENT = 'Llama-Wrangler/1.0'
+DEFAULT_TIMEOUT = (10, 60)  # (connect, read) seconds; read is per socket read, not per body
+POOL_MAXSIZE = 32           # Connections kept per host: file workers x segment connections
+
+RETRY_STATUSES = (408, 425, 429, 500, 502, 503, 504)
+RETRY_TOTAL = 6
+BACKOFF_FACTOR = 0.5        # 0.5s, 1s, 2s, 4s, ... between attempts
+BACKOFF_MAX = 30.0
+
+# Failures that happen mid-body, after urllib3's retries no longer apply; callers that
+# can resume (ranged segments) retry these themselves
+STREAM_ERRORS = (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError)
+
+
+def backoff_delay(attempt: int) -> float:
+    """Jittered exponential backoff for the given retry attempt (1-based)"""
+    return min(BACKOFF_MAX, BACKOFF_FACTOR * 2 ** (attempt - 1)) * random.uniform(0.5, 1.5)
+
+
+class HostStats:
+    """Per-host counters shared by the pools, retry policy and callers"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.hosts: Dict[str, Dict[str, Any]] = {}
+
+    def _host(self, host: str) -> Dict[str, Any]:
+        return self.hosts.setdefault(host, {'requests': 0, 'connections': 0, 'retries': 0, 'retry_reasons': {}})
+
+    def count(self, host: str, field: str):
+        with self.lock:
+            self._host(host)[field] += 1
+
+    def retry(self, host: str, reason: str):
+        with self.lock:
+            entry = self._host(host)
+            entry['retries'] += 1
+            entry['retry_reasons'][reason] = entry['retry_reasons'].get(reason, 0) + 1
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self.lock:
+            return json.loads(json.dumps(self.hosts))
+
+
+class CountingRetry(Retry):
+    """urllib3 Retry that records each retry against the host it happened on"""
+
+    stats: Optional[HostStats] = None
+
+    def new(self, **kw):
+        retry = super().new(**kw)
+        retry.stats = self.stats
+        return retry
+
+    def increment(self, method=None, url=None, response=None, error=None, _pool=None, _stacktrace=None):
+        if self.stats is not None and _pool is not None:
+            reason = f"HTTP {response.status}" if response is not None and error is None else type(error).__name__
+            self.stats.retry(_pool.host, reason)
+        return super().increment(method, url, response, error, _pool, _stacktrace)
+
+
+def _counting_pool(base, stats: HostStats):
+    class CountingPool(base):
+        def _new_conn(self):
+            stats.count(self.host, 'connections')
+            return super()._new_conn()
+    return CountingPool
+
+
+class CountingAdapter(HTTPAdapter):
+    """HTTPAdapter whose pools report every new (non-reused) connection"""
+
+    def __init__(self, stats: HostStats, **kwargs):
+        self.stats = stats
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': _counting_pool(HTTPConnectionPool, self.stats),
+            'https': _counting_pool(HTTPSConnectionPool, self.stats),
+        }
+
+
+class Transport(requests.Session):
+    """requests.Session with pooling, retries, default timeouts and statistics
+
+    Idempotent requests (GET, HEAD) are retried with backoff on connection errors and on
+    RETRY_STATUSES, honouring Retry-After. `limiter` is the bandwidth cap body readers
+    should consume() from.
+    """
+
+    def __init__(self, timeout=DEFAULT_TIMEOUT, retries: int = RETRY_TOTAL,
+                 pool_maxsize: int = POOL_MAXSIZE, limiter=None):
+        super().__init__()
+        self.timeout = timeout
+        self.limiter = limiter
+        self.host_stats = HostStats()
+        retry = CountingRetry(
+            total=retries,
+            backoff_factor=BACKOFF_FACTOR,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=frozenset(['GET', 'HEAD']),
+            raise_on_status=False,  # The last response is returned for raise_for_status()
+            respect_retry_after_header=True,
+        )
+        retry.stats = self.host_stats
+        adapter = CountingAdapter(self.host_stats, max_retries=retry, pool_connections=8,
+                                  pool_maxsize=pool_maxsize)
+        self.mount('http://', adapter)
+        self.mount('https://', adapter)
+        self.headers['User-Agent'] = USER_AGENT
+
+    def request(self, method, url, *args, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        self.host_stats.count(urlparse(url).hostname or '', 'requests')
+        return super().request(method, url, *args, **kwargs)
+
+    def record_retry(self, url: str, reason: str):
+        """Count a retry made above the HTTP layer (e.g. resuming a segment)"""
+        self.host_stats.retry(urlparse(url).hostname or '', reason)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return self.host_stats.snapshot()
+
+
+_shared: Optional[Transport] = None
+_shared_lock = threading.Lock()
+
+
+def shared_session() -> Transport:
+    """The process-wide transport, so every download in a process shares one pool"""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = Transport(limiter=bandwidth_limiter())
+        return _shared
+
+
+def format_stats(stats: Dict[str, Dict[str, Any]]) -> str:
+    lines = []
+    for host, entry in sorted(stats.items()):
+        line = f"{host}: {entry['requests']} requests over {entry['connections']} connections"
+        if entry['retries']:
+            reasons = ', '.join(f"{reason} x{count}" for reason, count in entry['retry_reasons'].items())
+            line += f", {entry['retries']} retries ({reasons})"
+        lines.append(line)
+    return '\n'.join(lines)
+
+
+def report_stats(log: Callable[[str], None] = print, session: Optional[Transport] = None):
+    """Log the per-host summary of the shared transport, if it was used"""
+    session = session or _shared
+    if session is None:
+        return
+    stats = session.stats()
+    if stats:
+        log("Transport: " + format_stats(stats).replace('\n', '; '))
+
+
+def main():
+    # transport.py <url>: GET url through the shared transport and print the statistics
+    if len(sys.argv) < 2:
+        print("Usage: transport.py <url>")
+        sys.exit(1)
+    session = shared_session()
+    started = time.perf_counter()
+    try:
+        response = session.get(sys.argv[1], stream=True)
+        size = sum(len(chunk) for chunk in response.iter_content(1024 * 1024))
+    except requests.RequestException as e:
+        print(json.dumps({'url': sys.argv[1], 'error': str(e), 'hosts': session.stats()}))
+        sys.exit(1)
+    print(json.dumps({'url': sys.argv[1], 'status': response.status_code, 'bytes': size,
+                      'seconds': round(time.perf_counter() - started, 3), 'hosts': session.stats()}))
+
+
+if __name__ == "__main__":
+    main()
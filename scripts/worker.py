@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""
+Resident Python worker for Llama Wrangler
+Started once by the Electron app and driven with JSON-RPC 2.0 over stdio. Each `run`
+request forks a child that executes a script's main() with the modules and toolchain
+paths the worker has already loaded, streaming its output back as notifications
+"""
+
+import time
+
+STARTED = time.perf_counter()  # Before any other import, for the startup report
+
+import os
+import sys
+import json
+import errno
+import runpy
+import codecs
+import signal
+import selectors
+import traceback
+import contextlib
+from statistics import median
+from typing import Optional, Dict, Any, List
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Imported once here so forked jobs start with them loaded; huggingface_hub is not among
+# them, download_hf.py imports it only on the path that needs it
+PRELOAD = ('requests', 'transport', 'range_download', 'blob_store', 'progress', 'job_slots',
+           'quantize', 'digest_cache', 'build_cache', 'hf_tree', 'snapshot_plan', 'hf_pipeline', 'disk_budget',
+           'ollama_local', 'download_hf', 'download_ollama')
+
+# Scripts a `run` request may name
+RUNNABLE = ('download_hf.py', 'download_ollama.py', 'quantize.py', 'blob_store.py', 'gguf_split.py')
+
+READ_SIZE = 64 * 1024
+MAX_OVERHEAD_SAMPLES = 200
+
+
+def write_message(message: Dict[str, Any]):
+    sys.stdout.buffer.write(json.dumps(message, separators=(',', ':')).encode() + b'\n')
+    sys.stdout.buffer.flush()
+
+
+def notify(method: str, params: Dict[str, Any]):
+    write_message({'jsonrpc': '2.0', 'method': method, 'params': params})
+
+
+class Job:
+    """A forked script run and the pipes its output comes back on"""
+
+    def __init__(self, request_id, pid: int, stdout_fd: int, stderr_fd: int, status_fd: int):
+        self.request_id = request_id
+        self.pid = pid
+        self.fds = {stdout_fd: 'stdout', stderr_fd: 'stderr'}
+        self.decoders = {fd: codecs.getincrementaldecoder('utf-8')(errors='replace') for fd in self.fds}
+        self.status_fd = status_fd
+        self.started = time.perf_counter()
+
+
+def signal_job(pid: int, sig: int):
+    """Signal a job's process group, or the job itself if its group isn't there"""
+    try:
+        os.killpg(pid, sig)
+    except ProcessLookupError:
+        with contextlib.suppress(ProcessLookupError):
+            os.kill(pid, sig)
+
+
+class Worker:
+    def __init__(self):
+        self.selector = selectors.DefaultSelector()
+        self.jobs: Dict[int, Job] = {}       # pid -> job
+        self.by_fd: Dict[int, Job] = {}
+        self.stdin_buffer = b''
+        self.running = True
+        self.requests = 0
+        self.overheads: List[float] = []
+        self.startup: Dict[str, Any] = {}
+
+    # -- startup -----------------------------------------------------------
+
+    def preload(self):
+        sys.path.insert(0, SCRIPTS_DIR)
+        started = time.perf_counter()
+        failed = []
+        # A module printing while it imports must not corrupt the RPC stream
+        with contextlib.redirect_stdout(sys.stderr):
+            for name in PRELOAD:
+                try:
+                    __import__(name)
+                except Exception as e:
+                    failed.append(f"{name}: {e}")
+            preload_ms = (time.perf_counter() - started) * 1000
+            try:
+                from toolchain import warm
+                toolchain = warm()
+            except Exception as e:
+                toolchain = {'error': str(e)}
+        self.startup = {
+            'pid': os.getpid(),
+            'fork': hasattr(os, 'fork'),
+            'startup_ms': round((time.perf_counter() - STARTED) * 1000, 2),
+            'preload_ms': round(preload_ms, 2),
+            'preload_failed': failed,
+            'toolchain': toolchain,
+        }
+
+    # -- requests ----------------------------------------------------------
+
+    def handle(self, message: Dict[str, Any]):
+        request_id = message.get('id')
+        method = message.get('method')
+        params = message.get('params') or {}
+        try:
+            if method == 'run':
+                self.run(request_id, params)
+                return  # Answered when the child exits
+            elif method == 'cancel':
+                result = self.cancel(params.get('id'), params.get('signal', 'SIGTERM'))
+            elif method == 'stats':
+                result = self.stats()
+            elif method == 'ping':
+                result = {'pid': os.getpid()}
+            elif method == 'shutdown':
+                self.running = False
+                result = {'running': len(self.jobs)}
+            else:
+                raise ValueError(f"Unknown method: {method}")
+            write_message({'jsonrpc': '2.0', 'id': request_id, 'result': result})
+        except Exception as e:
+            write_message({'jsonrpc': '2.0', 'id': request_id,
+                           'error': {'code': -32000, 'message': str(e)}})
+
+    def run(self, request_id, params: Dict[str, Any]):
+        received = time.monotonic()
+        script = params.get('script')
+        if script not in RUNNABLE:
+            raise ValueError(f"Script not allowed: {script}")
+        args = [str(arg) for arg in params.get('args') or []]
+        env = params.get('env') or {}
+        cwd = params.get('cwd')
+
+        out_r, out_w = os.pipe()
+        err_r, err_w = os.pipe()
+        status_r, status_w = os.pipe()
+        sys.stdout.flush()
+        pid = os.fork()
+        if pid == 0:
+            self._child(os.path.join(SCRIPTS_DIR, script), args, env, cwd, received,
+                        out_w, err_w, status_w, (out_r, err_r, status_r))
+        # Also set here, so a cancel that arrives before the child runs finds the group
+        try:
+            os.setpgid(pid, pid)
+        except OSError as e:
+            if e.errno not in (errno.EACCES, errno.ESRCH):
+                raise
+        for fd in (out_w, err_w, status_w):
+            os.close(fd)
+
+        self.requests += 1
+        job = Job(request_id, pid, out_r, err_r, status_r)
+        self.jobs[pid] = job
+        for fd in job.fds:
+            self.by_fd[fd] = job
+            self.selector.register(fd, selectors.EVENT_READ, 'job')
+
+    def _child(self, path: str, args: List[str], env: Dict[str, Optional[str]], cwd: Optional[str],
+               received: float, out_w: int, err_w: int, status_w: int, parent_fds):
+        """Runs in the forked child; never returns"""
+        code = 1
+        try:
+            os.setpgid(0, 0)  # Cancel signals the whole job, including llama-quantize & co.
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            self.selector.close()
+            for fd in parent_fds + tuple(self.by_fd) + tuple(job.status_fd for job in self.jobs.values()):
+                with contextlib.suppress(OSError):
+                    os.close(fd)
+            devnull = os.open(os.devnull, os.O_RDONLY)
+            os.dup2(devnull, 0)
+            os.dup2(out_w, 1)
+            os.dup2(err_w, 2)
+            for fd in (devnull, out_w, err_w):
+                os.close(fd)
+
+            for key, value in env.items():
+                if value is None:
+                    os.environ.pop(key, None)
+                else:
+                    os.environ[key] = str(value)
+            if cwd:
+                os.chdir(cwd)
+            sys.argv = [path] + args
+            overhead_ms = (time.monotonic() - received) * 1000
+            os.write(status_w, json.dumps({'overhead_ms': overhead_ms}).encode())
+            os.close(status_w)
+            runpy.run_path(path, run_name='__main__')
+            code = 0
+        except SystemExit as e:
+            if e.code is None or isinstance(e.code, int):
+                code = e.code or 0
+            else:
+                print(e.code, file=sys.stderr)
+                code = 1
+        except BaseException:
+            traceback.print_exc()
+        finally:
+            with contextlib.suppress(Exception):
+                sys.stdout.flush()
+                sys.stderr.flush()
+            os._exit(code)
+
+    def cancel(self, request_id, signal_name: str) -> Dict[str, Any]:
+        for job in self.jobs.values():
+            if job.request_id == request_id:
+                signal_job(job.pid, getattr(signal, signal_name, signal.SIGTERM))
+                return {'cancelled': True, 'pid': job.pid}
+        return {'cancelled': False}
+
+    def stats(self) -> Dict[str, Any]:
+        samples = self.overheads
+        return dict(self.startup, requests=self.requests, running=len(self.jobs), overhead_ms={
+            'last': round(samples[-1], 2) if samples else None,
+            'median': round(median(samples), 2) if samples else None,
+            'max': round(max(samples), 2) if samples else None,
+        })
+
+    # -- event loop --------------------------------------------------------
+
+    def read_job(self, fd: int):
+        job = self.by_fd[fd]
+        data = os.read(fd, READ_SIZE)
+        stream = job.fds[fd]
+        text = job.decoders[fd].decode(data, final=not data)
+        if text:
+            notify('output', {'id': job.request_id, 'stream': stream, 'data': text})
+        if data:
+            return
+        self.selector.unregister(fd)
+        os.close(fd)
+        del self.by_fd[fd]
+        del job.fds[fd]
+        if not job.fds:
+            self.finish(job)
+
+    def finish(self, job: Job):
+        """Both pipes closed: reap the child and answer its run request"""
+        _, status = os.waitpid(job.pid, 0)
+        del self.jobs[job.pid]
+        overhead = None
+        with contextlib.suppress(OSError, ValueError):
+            overhead = json.loads(os.read(job.status_fd, 4096) or b'null')
+        os.close(job.status_fd)
+        result = {
+            'exit_code': os.waitstatus_to_exitcode(status) if hasattr(os, 'waitstatus_to_exitcode') else status >> 8,
+            'seconds': round(time.perf_counter() - job.started, 3),
+            'overhead_ms': round(overhead['overhead_ms'], 2) if overhead else None,
+        }
+        if overhead:
+            self.overheads = (self.overheads + [overhead['overhead_ms']])[-MAX_OVERHEAD_SAMPLES:]
+        write_message({'jsonrpc': '2.0', 'id': job.request_id, 'result': result})
+
+    def read_stdin(self) -> bool:
+        data = os.read(0, READ_SIZE)
+        if not data:
+            return False  # The app went away
+        self.stdin_buffer += data
+        while b'\n' in self.stdin_buffer:
+            line, self.stdin_buffer = self.stdin_buffer.split(b'\n', 1)
+            if not line.strip():
+                continue
+            try:
+                message = json.loads(line)
+            except ValueError:
+                write_message({'jsonrpc': '2.0', 'id': None, 'error': {'code': -32700, 'message': 'Parse error'}})
+                continue
+            self.handle(message)
+        return True
+
+    def serve(self):
+        self.selector.register(0, selectors.EVENT_READ, 'stdin')
+        stdin_open = True
+        while self.running and (stdin_open or self.jobs):
+            for key, _ in self.selector.select():
+                if key.data == 'stdin':
+                    stdin_open = self.read_stdin()
+                    if not stdin_open:
+                        self.selector.unregister(0)
+                else:
+                    self.read_job(key.fd)
+        self.terminate_jobs()
+
+    def terminate_jobs(self, *_):
+        """Jobs run in their own process groups; orphans would keep downloading unobserved"""
+        for job in list(self.jobs.values()):
+            signal_job(job.pid, signal.SIGTERM)
+
+
+def main():
+    # worker.py: JSON-RPC 2.0 over stdin/stdout, one message per line
+    #   -> {"id": 1, "method": "run", "params": {"script": "download_hf.py", "args": [...], "env": {...}}}
+    #   <- {"method": "output", "params": {"id": 1, "stream": "stdout", "data": "..."}}  (notifications)
+    #   <- {"id": 1, "result": {"exit_code": 0, "seconds": 12.3, "overhead_ms": 1.2}}
+    # Also: cancel {id, signal}, stats, ping, shutdown. A "ready" notification follows startup.
+    worker = Worker()
+    worker.preload()
+    notify('ready', worker.startup)
+    if not worker.startup['fork']:
+        sys.exit(0)  # No fork (Windows): the app runs each script in its own process instead
+    signal.signal(signal.SIGTERM, lambda *_: (worker.terminate_jobs(), os._exit(0)))
+    worker.serve()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+const fs = require('fs');
+const path = require('path');
+
+// Finished jobs kept in jobs.json for the UI
+const MAX_FINISHED = 50;
+const FINISHED = new Set(['done', 'failed', 'cancelled']);
+
+/**
+ * Persistent download/convert/quantize job queue.
+ *
+ * Jobs run in priority order (higher first, then oldest) with at most `maxRunning`
+ * processes alive; each process then takes a network/cpu/disk slot in
+ * scripts/job_slots.py, so queued jobs overlap stages instead of all competing for one.
+ * Runners are `(job) => ({ child, result })` where result resolves to `{ success, error }`.
+ */
+class JobQueue {
+  constructor({ file, runners, maxRunning = 4, onUpdate = null }) {
+    this.file = file;
+    this.runners = runners;
+    this.maxRunning = maxRunning;
+    this.onUpdate = onUpdate;
+    this.jobs = [];
+    this.children = new Map(); // job id -> child process
+    this.waiters = new Map(); // job id -> [resolve]
+    this.stopping = false;
+    this.counter = 0;
+  }
+
+  // Restore jobs from disk; anything interrupted mid-run is queued again and resumes
+  // from its .partial journal
+  load() {
+    try {
+      const data = JSON.parse(fs.readFileSync(this.file, 'utf8'));
+      this.jobs = (data.jobs || []).filter(job => this.runners[job.kind]);
+      for (const job of this.jobs) {
+        if (job.status === 'running') {
+          job.status = 'queued';
+        }
+      }
+    } catch {
+      this.jobs = [];
+    }
+  }
+
+  save() {
+    const active = this.jobs.filter(job => !FINISHED.has(job.status));
+    const finished = this.jobs.filter(job => FINISHED.has(job.status)).slice(-MAX_FINISHED);
+    this.jobs = active.concat(finished).sort((a, b) => a.createdAt - b.createdAt);
+    try {
+      fs.mkdirSync(path.dirname(this.file), { recursive: true });
+      const tmpFile = `${this.file}.tmp`;
+      fs.writeFileSync(tmpFile, JSON.stringify({ jobs: this.jobs }, null, 2));
+      fs.renameSync(tmpFile, this.file);
+    } catch {
+      // Queue still works in memory if the file can't be written
+    }
+  }
+
+  list() {
+    return this.jobs.map(job => ({ ...job }));
+  }
+
+  // Queue a job and resolve with its result; an identical queued/running job is shared
+  submit(kind, args, { priority = 0 } = {}) {
+    const key = JSON.stringify([kind, args]);
+    let job = this.jobs.find(j => !FINISHED.has(j.status) && JSON.stringify([j.kind, j.args]) === key);
+    if (job) {
+      job.priority = Math.max(job.priority, priority);
+    } else {
+      job = {
+        id: `${Date.now().toString(36)}-${(this.counter++).toString(36)}`,
+        kind,
+        args,
+        priority,
+        status: 'queued',
+        createdAt: Date.now(),
+        startedAt: null,
+        finishedAt: null,
+        error: null,
+      };
+      this.jobs.push(job);
+    }
+
+    const result = new Promise(resolve => {
+      const waiting = this.waiters.get(job.id) || [];
+      waiting.push(resolve);
+      this.waiters.set(job.id, waiting);
+    });
+    this.changed(job);
+    this.pump();
+    return result;
+  }
+
+  setPriority(id, priority) {
+    const job = this.jobs.find(j => j.id === id);
+    if (!job || FINISHED.has(job.status)) return false;
+    job.priority = priority;
+    this.changed(job);
+    this.pump();
+    return true;
+  }
+
+  cancel(id) {
+    const job = this.jobs.find(j => j.id === id);
+    if (!job || FINISHED.has(job.status)) return false;
+
+    const child = this.children.get(id);
+    this.finish(job, { success: false, error: 'Cancelled' }, 'cancelled');
+    if (child && !child.killed) {
+      try {
+        child.kill('SIGTERM');
+      } catch {
+        // Already exited
+      }
+    }
+    return true;
+  }
+
+  // Start queued jobs while there is room, best priority first
+  pump() {
+    if (this.stopping) return;
+    const running = this.jobs.filter(job => job.status === 'running').length;
+    const queued = this.jobs
+      .filter(job => job.status === 'queued')
+      .sort((a, b) => b.priority - a.priority || a.createdAt - b.createdAt);
+
+    for (const job of queued.slice(0, Math.max(0, this.maxRunning - running))) {
+      this.run(job);
+    }
+  }
+
+  run(job) {
+    job.status = 'running';
+    job.startedAt = Date.now();
+    this.changed(job);
+
+    let started;
+    try {
+      started = this.runners[job.kind](job);
+    } catch (error) {
+      this.finish(job, { success: false, error: error.message });
+      return;
+    }
+
+    this.children.set(job.id, started.child);
+    started.result.then(
+      result => this.finish(job, result),
+      error => this.finish(job, { success: false, error: error.message })
+    );
+  }
+
+  finish(job, result, status = null) {
+    this.children.delete(job.id);
+    // Keep interrupted jobs "running" on quit so they resume next launch
+    if (this.stopping) return;
+    if (!FINISHED.has(job.status)) {
+      job.status = status || (result.success ? 'done' : 'failed');
+      job.error = result.success ? null : result.error;
+      job.finishedAt = Date.now();
+      this.changed(job);
+    }
+
+    for (const resolve of this.waiters.get(job.id) || []) {
+      resolve(job.status === 'cancelled' ? { success: false, error: 'Cancelled' } : result);
+    }
+    this.waiters.delete(job.id);
+    this.pump();
+  }
+
+  changed(job) {
+    this.save();
+    if (this.onUpdate) {
+      this.onUpdate({ ...job });
+    }
+  }
+
+  // Stop scheduling; running processes are killed by the caller
+  shutdown() {
+    this.stopping = true;
+    this.save();
+  }
+}
+
+module.exports = { JobQueue };
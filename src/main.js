@@ -19,11 +19,13 @@ if (process.platform === 'linux') {
 // app.commandLine.appendSwitch('remote-debugging-port', '61513');
 const os = require('os');
 const Store = require('electron-store').default || require('electron-store');
+const { JobQueue } = require('./job-queue');
+const { ServerPool, shardPaths } = require('./server-pool');
+const { PythonWorker } = require('./python-worker');
 
 const store = new Store();
 
 let mainWindow;
-let activeServerProcess = null;
 const activeDownloadProcesses = new Set(); // Track all active downloads
 
 // Configuration - now properly user-agnostic
@@ -41,6 +43,114 @@ function updateLlamaCppPath(newPath) {
   CONFIG.llamaCppDir = newPath;
 }
 
+// Resolve a bundled Python script (in production, scripts are in the resources folder)
+function scriptPath(name) {
+  return app.isPackaged
+    ? path.join(process.resourcesPath, 'scripts', name)
+    : path.join(__dirname, '..', 'scripts', name);
+}
+
+// Per-stage process limits and global bandwidth cap for queued jobs (see scripts/job_slots.py)
+function jobLimits() {
+  return Object.assign({ network: 2, cpu: 1, disk: 1, bandwidthMBps: 0 }, store.get('jobLimits', {}));
+}
+
+function jobEnv() {
+  const limits = jobLimits();
+  return Object.assign({}, process.env, {
+    LLAMA_WRANGLER_LIMIT_NETWORK: String(limits.network),
+    LLAMA_WRANGLER_LIMIT_CPU: String(limits.cpu),
+    LLAMA_WRANGLER_LIMIT_DISK: String(limits.disk),
+    LLAMA_WRANGLER_BANDWIDTH: String(Math.round(limits.bandwidthMBps * 1024 * 1024)),
+    LLAMA_WRANGLER_PROGRESS: 'jsonl',
+  });
+}
+
+// Scripts run inside the resident Python worker (see scripts/worker.py) when it is up, so
+// a job doesn't pay for a fresh interpreter, imports and toolchain discovery
+const pythonWorker = new PythonWorker({ script: scriptPath('worker.py') });
+
+// Variables in env that differ from ours; null for ones it drops
+function envDiff(env) {
+  const diff = {};
+  for (const [key, value] of Object.entries(env)) {
+    if (process.env[key] !== value) {
+      diff[key] = value;
+    }
+  }
+  for (const key of Object.keys(process.env)) {
+    if (!(key in env)) {
+      diff[key] = null;
+    }
+  }
+  return diff;
+}
+
+// Run scripts/<script> in the worker, or in its own python3 process where the worker isn't available
+function spawnScript(script, args, env = process.env) {
+  // A crashed worker comes back for later jobs; this one doesn't wait for it
+  pythonWorker.restart();
+  if (pythonWorker.available) {
+    return pythonWorker.run(script, args, envDiff(env));
+  }
+  return spawn('python3', [scriptPath(script), ...args], { env });
+}
+
+function jobPriority(options) {
+  const priority = Number(options && options.priority);
+  return Number.isFinite(priority) ? Math.max(-10, Math.min(10, Math.round(priority))) : 0;
+}
+
+// One process per stage slot can make progress; a few more may wait at their next stage
+function maxRunningJobs() {
+  const limits = jobLimits();
+  return limits.network + limits.cpu + limits.disk;
+}
+
+const jobQueue = new JobQueue({
+  file: path.join(os.homedir(), '.llama-wrangler', 'jobs.json'),
+  runners: {
+    huggingface: job => runHuggingFaceDownload(job),
+    ollama: job => runOllamaDownload(job),
+    quantize: job => runQuantize(job),
+  },
+  maxRunning: maxRunningJobs(),
+  onUpdate: job => {
+    if (job.status === 'done') {
+      invalidateModelList();
+    }
+    if (mainWindow && !mainWindow.isDestroyed()) {
+      try {
+        mainWindow.webContents.send('job-updated', job);
+      } catch (e) {
+        // Ignore send errors
+      }
+    }
+  },
+});
+
+// Resident llama-server instances: count and memory budget (0 = 60% of RAM)
+function serverPoolLimits() {
+  return Object.assign({ maxServers: 3, memoryGB: 0 }, store.get('serverPool', {}));
+}
+
+function serverPoolBudget() {
+  const limits = serverPoolLimits();
+  return limits.memoryGB > 0 ? limits.memoryGB * 1024 ** 3 : Math.round(os.totalmem() * 0.6);
+}
+
+const serverPool = new ServerPool({
+  port: parseInt(CONFIG.port, 10),
+  spawnServer: (modelPath, port) => spawnLlamaServer(modelPath, port),
+  memoryEstimate: modelPath => {
+    const profile = launchProfiles.get(modelPath);
+    return profile ? profile.estimate.total : null;
+  },
+  maxServers: serverPoolLimits().maxServers,
+  memoryBudget: serverPoolBudget(),
+  onStopped: code => sendToRenderer('server-stopped', code),
+});
+
 // Ensure directories exist
 async function ensureDirectories() {
   await fs.mkdir(CONFIG.modelsDir, { recursive: true });
@@ -105,18 +215,21 @@ function createWindow() {
 
 // Cleanup all processes
 function cleanupAllProcesses() {
-  // Kill server process
-  if (activeServerProcess && !activeServerProcess.killed) {
-    try {
-      activeServerProcess.kill('SIGTERM');
-      setTimeout(() => {
-        if (activeServerProcess && !activeServerProcess.killed) {
-          activeServerProcess.kill('SIGKILL');
-        }
-      }, 1000);
-    } catch (e) {
-      logError(e);
-    }
+  closeModelDirWatchers();
+  jobQueue.shutdown();
+
+  if (backgroundPrefetch) {
+    backgroundPrefetch.kill();
+  }
+  if (loadTestProcess) {
+    loadTestProcess.kill();
+  }
+
+  // Kill all pooled server processes and close the proxy
+  try {
+    serverPool.shutdown();
+  } catch (e) {
+    logError(e);
   }
 
   // Kill all download processes
@@ -130,11 +243,23 @@ function cleanupAllProcesses() {
     }
   }
   activeDownloadProcesses.clear();
+
+  // After the jobs above, so their cancels reach the worker before it goes
+  pythonWorker.shutdown();
 }
 
 app.whenReady().then(async () => {
   await ensureDirectories();
   createWindow();
+
+  const worker = await pythonWorker.start();
+  if (worker) {
+    console.log(`Python worker ready in ${worker.coldStartMs}ms (preload ${worker.preload_ms}ms)`);
+  }
+
+  // Resume jobs left queued or running by the last session
+  jobQueue.load();
+  jobQueue.pump();
 });
 
 // Simple error logging — write to user data dir, not __dirname (read-only in packaged app)
@@ -210,69 +335,160 @@ ipcMain.handle('window-close', () => { if (mainWindow) mainWindow.close(); });
 
 // IPC Handlers with better error handling
 
-ipcMain.handle('get-models', async () => {
-  try {
-    const models = [];
+// Model directories scanned for GGUF files, with the location label shown in the UI
+function getModelDirs() {
+  return [
+    { dir: path.join(CONFIG.metalLlamaDir, 'models'), location: 'MetalLlama' },
+    { dir: CONFIG.modelsDir, location: 'Wrangler' },
+    { dir: path.join(CONFIG.llamaCppDir, 'models'), location: 'llama.cpp' },
+    { dir: CONFIG.llamaCppDir, location: 'llama.cpp' },
+  ];
+}
 
-    const metalLlamaModelsDir = path.join(CONFIG.metalLlamaDir, 'models');
-    const modelDirs = [
-      metalLlamaModelsDir,
-      CONFIG.modelsDir,
-      path.join(CONFIG.llamaCppDir, 'models'),
-      CONFIG.llamaCppDir,
-    ];
+// Run a bundled Python script and parse the JSON document it prints on stdout
+function runPythonJson(script, args) {
+  return new Promise((resolve, reject) => {
+    const proc = spawn('python3', [scriptPath(script), ...args]);
+    let stdout = '';
+    let stderr = '';
+    proc.stdout.on('data', data => (stdout += data.toString()));
+    proc.stderr.on('data', data => (stderr += data.toString()));
+    proc.on('error', reject);
+    proc.on('close', code => {
+      if (code !== 0) {
+        reject(new Error(stderr || stdout || `${script} exited ${code}`));
+        return;
+      }
+      try {
+        resolve(JSON.parse(stdout));
+      } catch (e) {
+        reject(new Error(`${script} returned invalid JSON: ${e.message}`));
+      }
+    });
+  });
+}
 
-    for (const dir of modelDirs) {
+// Cached model list — rebuilt only after a watched model directory changes
+let modelListCache = null;
+let modelsChangedTimer = null;
+const modelDirWatchers = new Map();
+
+function invalidateModelList() {
+  modelListCache = null;
+
+  // Debounce bursts of events (a download touches the directory many times)
+  clearTimeout(modelsChangedTimer);
+  modelsChangedTimer = setTimeout(() => {
+    if (mainWindow && !mainWindow.isDestroyed()) {
       try {
-        // Check if directory exists before trying to read
-        await fs.access(dir);
-        const files = await fs.readdir(dir);
-
-        for (const file of files) {
-          if (file.endsWith('.gguf') && !file.includes('ggml-vocab')) {
-            const fullPath = path.join(dir, file);
-
-            if (models.some(m => m.path === fullPath)) continue;
-
-            try {
-              // Double-check file exists before trying to stat
-              await fs.access(fullPath);
-              const stats = await fs.stat(fullPath);
-              const size = (stats.size / (1024 * 1024 * 1024)).toFixed(2);
-
-              // Extract quantization type from filename
-              const quantMatch = file.match(/[QF]\d+_[A-Z0-9_]+/);
-              const quantType = quantMatch ? quantMatch[0] : 'GGUF';
-
-              models.push({
-                name: file,
-                path: fullPath,
-                size: `${size} GB`,
-                type: quantType,
-                location:
-                  dir === metalLlamaModelsDir
-                    ? 'MetalLlama'
-                    : dir === CONFIG.modelsDir
-                      ? 'Wrangler'
-                      : 'llama.cpp',
-                canSwitch: true,
-              });
-            } catch (statError) {
-              // File doesn't exist or can't be accessed - skip silently
-              console.log(`Skipping inaccessible file: ${fullPath}`);
-              continue;
-            }
-          }
+        mainWindow.webContents.send('models-changed');
+      } catch (e) {
+        // Ignore send errors
+      }
+    }
+  }, 500);
+}
+
+// fs.watch is inotify-backed on Linux and FSEvents-backed on macOS
+function watchModelDirs(dirs) {
+  for (const dir of dirs) {
+    if (modelDirWatchers.has(dir)) continue;
+    try {
+      const watcher = fsSync.watch(dir, (eventType, filename) => {
+        if (!filename || filename.endsWith('.gguf')) {
+          invalidateModelList();
         }
-      } catch (err) {
-        // Directory doesn't exist or can't be read - this is normal
-        console.log(`Skipping inaccessible directory: ${dir}`);
+      });
+      watcher.on('error', () => {
+        watcher.close();
+        modelDirWatchers.delete(dir);
+        invalidateModelList();
+      });
+      modelDirWatchers.set(dir, watcher);
+    } catch {
+      // Directory doesn't exist yet - it will be picked up on a later scan
+    }
+  }
+}
+
+function closeModelDirWatchers() {
+  for (const watcher of modelDirWatchers.values()) {
+    watcher.close();
+  }
+  modelDirWatchers.clear();
+  modelListCache = null;
+}
+
+// Fallback scan used when the Python catalog can't run (e.g. python3 missing)
+async function scanModelDirsDirect(modelDirs) {
+  const models = new Map();
+  for (const { dir } of modelDirs) {
+    let entries;
+    try {
+      entries = await fs.readdir(dir);
+    } catch {
+      continue; // Directory doesn't exist or can't be read - this is normal
+    }
+    for (const file of entries) {
+      if (!file.endsWith('.gguf') || file.includes('ggml-vocab')) continue;
+      const fullPath = path.join(dir, file);
+      if (models.has(fullPath)) continue;
+      try {
+        const stats = await fs.stat(fullPath);
+        models.set(fullPath, { path: fullPath, name: file, dir, size: stats.size });
+      } catch {
+        // File vanished or can't be accessed - skip silently
       }
     }
+  }
+  return [...models.values()];
+}
+
+ipcMain.handle('get-models', async () => {
+  try {
+    if (modelListCache) {
+      return { success: true, models: modelListCache.models, stats: modelListCache.stats };
+    }
+
+    const modelDirs = getModelDirs();
+    const locations = new Map(modelDirs.map(({ dir, location }) => [path.resolve(dir), location]));
+    watchModelDirs(modelDirs.map(({ dir }) => dir));
+
+    let entries;
+    let stats = null;
+    try {
+      const result = await runPythonJson('model_catalog.py', ['scan', ...modelDirs.map(({ dir }) => dir)]);
+      entries = result.models;
+      stats = result.stats;
+      console.log(
+        `Model catalog ${stats.cold ? 'cold' : 'warm'} scan: ${stats.files} files, ` +
+          `${stats.parsed} parsed, ${stats.reused} reused in ${stats.scan_ms} ms`
+      );
+    } catch (catalogError) {
+      console.log(`Model catalog unavailable, scanning directly: ${catalogError.message}`);
+      entries = await scanModelDirsDirect(modelDirs);
+    }
+
+    const models = entries.map(entry => {
+      const metadata = entry.metadata || null;
+      // Fall back to the filename when the header couldn't be parsed
+      const quantMatch = entry.name.match(/[QF]\d+_[A-Z0-9_]+/);
+      return {
+        name: entry.name,
+        path: entry.path,
+        size: `${(entry.size / (1024 * 1024 * 1024)).toFixed(2)} GB`,
+        type: metadata?.quantization || (quantMatch ? quantMatch[0] : 'GGUF'),
+        location: locations.get(path.resolve(entry.dir)) || 'llama.cpp',
+        canSwitch: !entry.incomplete,
+        shards: entry.shards ? entry.shards.length : 1,
+        metadata,
+      };
+    });
 
     models.sort((a, b) => a.name.localeCompare(b.name));
+    modelListCache = { models, stats };
 
-    return { success: true, models };
+    return { success: true, models, stats };
   } catch (error) {
     // Don't show errors to UI for model scanning - just log them
     console.error('Model scanning error:', error);
@@ -281,6 +497,11 @@ ipcMain.handle('get-models', async () => {
 });
 
 ipcMain.handle('get-current-model', async () => {
+  // Servers started by this app sit behind the pool's proxy on CONFIG.port
+  if (serverPool.activeModel()) {
+    return { success: true, model: path.basename(serverPool.activeModel()) };
+  }
+
   // FIX: Validate port is a safe integer before interpolating into shell command
   const safePort = parseInt(CONFIG.port, 10);
   if (!Number.isInteger(safePort) || safePort < 1 || safePort > 65535) {
@@ -322,6 +543,35 @@ ipcMain.handle('get-current-model', async () => {
   });
 });
 
+// Materialise modelPath at targetPath with scripts/placement.py (hardlink, reflink/clone,
+// copy_file_range, then copy), forwarding copy progress as 'placement-progress'; resolves
+// with { strategy, seconds, bytes }
+function placeModelFile(modelPath, targetPath) {
+  return new Promise((resolve, reject) => {
+    const proc = spawn('python3', [scriptPath('placement.py'), modelPath, targetPath], {
+      env: Object.assign({}, process.env, { LLAMA_WRANGLER_PROGRESS: 'jsonl' }),
+    });
+    let output = '';
+    let stderr = '';
+    proc.stdout.on('data', splitJobOutput({ id: null, kind: 'placement' }, text => (output += text + '\n')));
+    proc.stderr.on('data', data => (stderr += data.toString()));
+    proc.on('error', reject);
+    proc.on('close', code => {
+      let result = null;
+      try {
+        result = JSON.parse(output.trim().split('\n').pop());
+      } catch {
+        // No result line
+      }
+      if (code !== 0 || !result || result.error) {
+        reject(new Error(`Failed to place model: ${(result && result.error) || stderr || `exit code ${code}`}`));
+        return;
+      }
+      resolve(result);
+    });
+  });
+}
+
 // Check if LaunchAgent exists (macOS only)
 async function hasLaunchAgent() {
   if (process.platform !== 'darwin') return false;
@@ -334,42 +584,57 @@ async function hasLaunchAgent() {
   }
 }
 
+// A .gguf path inside the models, llama.cpp or MetalLlama directory
+function modelPathAllowed(modelPath) {
+  if (typeof modelPath !== 'string' || !modelPath.endsWith('.gguf')) {
+    return false;
+  }
+  const resolvedPath = path.resolve(modelPath);
+  const allowedBases = [CONFIG.modelsDir, CONFIG.llamaCppDir, CONFIG.metalLlamaDir].map(base => path.resolve(base));
+  return allowedBases.some(base => resolvedPath.startsWith(base + path.sep));
+}
+
 ipcMain.handle('switch-model', async (event, modelPath) => {
   try {
     // FIX: Validate modelPath is a string and resolves within expected directories
-    if (typeof modelPath !== 'string' || !modelPath.endsWith('.gguf')) {
+    if (!modelPathAllowed(modelPath)) {
       return { success: false, error: 'Invalid model path' };
     }
     const resolvedPath = path.resolve(modelPath);
-    const allowedBases = [
-      path.resolve(CONFIG.modelsDir),
-      path.resolve(CONFIG.llamaCppDir),
-      path.resolve(CONFIG.metalLlamaDir),
-    ];
-    const pathIsAllowed = allowedBases.some(base => resolvedPath.startsWith(base + path.sep) || resolvedPath.startsWith(base));
-    if (!pathIsAllowed) {
-      return { success: false, error: 'Model path is outside allowed directories' };
-    }
 
     // Check if using LaunchAgent
     const usingLaunchAgent = await hasLaunchAgent();
 
     if (usingLaunchAgent) {
-      // Use LaunchAgent method
+      // Use LaunchAgent method; its server needs CONFIG.port, so release the pool's proxy
+      serverPool.close();
       const modelName = path.basename(modelPath);
       const metalLlamaModelsDir = path.join(CONFIG.metalLlamaDir, 'models');
-      const targetPath = path.join(metalLlamaModelsDir, modelName);
 
-      // Ensure model exists in MetalLlama directory
-      if (modelPath !== targetPath) {
+      // Ensure the model, every shard of a split one, exists in the MetalLlama directory
+      const placed = [];
+      for (const shardPath of shardPaths(resolvedPath)) {
+        const targetPath = path.join(metalLlamaModelsDir, path.basename(shardPath));
+        if (shardPath === targetPath) {
+          continue;
+        }
         try {
           await fs.access(targetPath);
         } catch {
-          // Copy model to MetalLlama directory
-          await fs.mkdir(metalLlamaModelsDir, { recursive: true });
-          await fs.copyFile(modelPath, targetPath);
+          // Link or clone the file into the MetalLlama directory; a full copy only as a last resort
+          const result = await placeModelFile(shardPath, targetPath);
+          console.log(`Placed ${path.basename(shardPath)} in ${metalLlamaModelsDir} by ${result.strategy} in ${result.seconds}s`);
+          placed.push(result);
         }
       }
+      const placement = placed.length
+        ? {
+            strategy: Array.from(new Set(placed.map(result => result.strategy))).join(','),
+            seconds: placed.reduce((sum, result) => sum + result.seconds, 0),
+            bytes: placed.reduce((sum, result) => sum + result.bytes, 0),
+            files: placed.length,
+          }
+        : null;
 
       // Update preference file
       const preferenceFile = path.join(os.homedir(), '.config/llama_mps_server/preferred_model');
@@ -389,168 +654,441 @@ ipcMain.handle('switch-model', async (event, modelPath) => {
                   if (error2) {
                     reject(new Error('Failed to restart LaunchAgent'));
                   } else {
-                    setTimeout(() => resolve({ success: true }), 3000);
+                    setTimeout(() => resolve({ success: true, placement }), 3000);
                   }
                 }
               );
             } else {
-              setTimeout(() => resolve({ success: true }), 3000);
+              setTimeout(() => resolve({ success: true, placement }), 3000);
             }
           }
         );
       });
     }
 
-    // Standard method - stop current server if running
-    if (activeServerProcess && !activeServerProcess.killed) {
-      activeServerProcess.kill();
-      await new Promise(resolve => setTimeout(resolve, 2000));
+    // Standard method - repoint the proxy to a resident server, starting one if needed
+    const serverPath = findLlamaServer(); // Fail before evicting anything when llama.cpp isn't built
+    if (!serverPool.has(resolvedPath)) {
+      // Evict first, so the profile and the prefetch budget see the memory those servers held
+      await serverPool.reserve(serverPool.estimate(resolvedPath));
+      await loadLaunchProfile(resolvedPath, serverPath);
+      // Parallel reads warm the page cache faster than llama-server's page faults would; a
+      // background warm-up still reading would compete with them for the disk
+      stopBackgroundPrefetch();
+      const prefetch = await runPrefetch(resolvedPath, false);
+      if (prefetch) {
+        console.log(
+          `Prefetched ${path.basename(resolvedPath)}: ${prefetch.resident_percent}% resident ` +
+            `(read ${(prefetch.prefetched / 1e9).toFixed(2)} GB in ${prefetch.seconds}s)`
+        );
+      }
     }
+    const result = await serverPool.activate(resolvedPath);
+    console.log(`Switched to ${path.basename(resolvedPath)} in ${result.ms} ms (${result.warm ? 'warm' : 'cold'})`);
+    rememberModel(resolvedPath);
+    prefetchLikelyNext();
+    return { success: true, warm: result.warm, ms: result.ms };
+  } catch (error) {
+    logError(error);
+    return { success: false, error: error.message };
+  }
+});
 
-    // Find llama-server executable
-    const possiblePaths = [
-      path.join(CONFIG.llamaCppDir, 'build/bin/llama-server'),
-      path.join(CONFIG.llamaCppDir, 'build/bin/server'),
-      path.join(CONFIG.llamaCppDir, 'llama-server'),
-      path.join(CONFIG.llamaCppDir, 'server'),
-      path.join(CONFIG.metalLlamaDir, 'build/bin/llama-server'),
-      path.join(CONFIG.metalLlamaDir, 'build/bin/server'),
-    ];
+// Recently switched-to models, most recent first
+function recentModels() {
+  return store.get('recentModels', []);
+}
 
-    let serverPath = null;
-    for (const p of possiblePaths) {
-      try {
-        await fs.access(p);
-        serverPath = p;
-        break;
-      } catch {}
+function rememberModel(modelPath) {
+  store.set('recentModels', [modelPath].concat(recentModels().filter(p => p !== modelPath)).slice(0, 10));
+}
+
+// Run scripts/gguf_prefetch.py; resolves with its JSON result, or null if it failed
+let backgroundPrefetch = null;
+function runPrefetch(modelPath, background, statusOnly = false) {
+  return new Promise(resolve => {
+    const args = [scriptPath('gguf_prefetch.py'), modelPath];
+    if (background) {
+      args.push('--background');
+    }
+    if (statusOnly) {
+      args.push('--status');
+    }
+    const child = spawn('python3', args);
+    if (background) {
+      backgroundPrefetch = child;
     }
+    let output = '';
+    child.stdout.on('data', data => (output += data.toString()));
+    child.on('error', () => resolve(null));
+    child.on('close', code => {
+      if (backgroundPrefetch === child) {
+        backgroundPrefetch = null;
+      }
+      try {
+        resolve(code === 0 ? JSON.parse(output.trim().split('\n').pop()) : null);
+      } catch {
+        resolve(null);
+      }
+    });
+  });
+}
 
-    if (!serverPath) {
-      throw new Error(
-        'llama-server executable not found. Please ensure llama.cpp is built properly.'
-      );
+function stopBackgroundPrefetch() {
+  if (backgroundPrefetch) {
+    backgroundPrefetch.kill('SIGTERM');
+    backgroundPrefetch = null;
+  }
+}
+
+// Warm the page cache for the most recent model that isn't resident in the server pool,
+// using only free memory so the active model stays cached
+function prefetchLikelyNext() {
+  if (backgroundPrefetch) {
+    return;
+  }
+  const next = recentModels().find(p => !serverPool.has(p) && fsSync.existsSync(p));
+  if (!next) {
+    return;
+  }
+  runPrefetch(next, true).then(result => {
+    if (result) {
+      sendToRenderer('model-prefetched', result);
     }
+  });
+}
 
-    // Start new server
-    const args = [
-      '-m',
-      modelPath,
-      '--port',
-      CONFIG.port.toString(),
-      '--host',
-      '0.0.0.0',
-      '-c',
-      '8192',
-    ];
+ipcMain.handle('prefetch-model', async (event, modelPath, options = {}) => {
+  if (!modelPathAllowed(modelPath)) {
+    return { success: false, error: 'Invalid model path' };
+  }
+  const resolvedPath = path.resolve(modelPath);
+  // options.statusOnly reports page-cache residency without reading anything
+  if (!options.background && !options.statusOnly) {
+    stopBackgroundPrefetch();
+  }
+  const result = await runPrefetch(resolvedPath, Boolean(options.background), Boolean(options.statusOnly));
+  return result ? { success: true, ...result } : { success: false, error: 'Prefetch failed' };
+});
+
+// Locate the llama-server binary in the configured llama.cpp builds
+function findLlamaServer() {
+  const possiblePaths = [
+    path.join(CONFIG.llamaCppDir, 'build/bin/llama-server'),
+    path.join(CONFIG.llamaCppDir, 'build/bin/server'),
+    path.join(CONFIG.llamaCppDir, 'llama-server'),
+    path.join(CONFIG.llamaCppDir, 'server'),
+    path.join(CONFIG.metalLlamaDir, 'build/bin/llama-server'),
+    path.join(CONFIG.metalLlamaDir, 'build/bin/server'),
+  ];
+  for (const p of possiblePaths) {
+    if (fsSync.existsSync(p)) {
+      return p;
+    }
+  }
+  throw new Error('llama-server executable not found. Please ensure llama.cpp is built properly.');
+}
 
-    // Add GPU layers based on platform
+// Start llama-server for one pool slot; it listens on loopback, the pool's proxy serves CONFIG.port
+function spawnLlamaServer(modelPath, port) {
+  const serverPath = findLlamaServer();
+  const args = ['-m', modelPath, '--port', port.toString(), '--host', '127.0.0.1'];
+
+  const profile = launchProfiles.get(modelPath);
+  if (profile) {
+    args.push(...profile.args);
+  } else {
+    // No launch profile (tuner failed): fixed context, all layers on the GPU if there is one
+    args.push('-c', '8192');
     if (process.platform === 'darwin') {
       args.push('-ngl', '999'); // Use Metal on macOS
-    } else if (process.platform === 'linux') {
-      // Check for CUDA
+    } else if (process.platform === 'linux' && fsSync.existsSync('/usr/local/cuda/bin/nvcc')) {
+      args.push('-ngl', '999'); // Use CUDA if available
+    }
+  }
+
+  const serverProcess = spawn(serverPath, args);
+  serverProcess.stdout.on('data', data => sendToRenderer('server-log', data.toString()));
+  serverProcess.stderr.on('data', data => sendToRenderer('server-log', data.toString()));
+  serverProcess.on('error', error => {
+    logError(error);
+    sendToRenderer('server-error', error.message);
+  });
+  return serverProcess;
+}
+
+// Launch profiles from scripts/launch_profile.py, by model path; refreshed on each cold start
+const launchProfiles = new Map();
+
+async function loadLaunchProfile(modelPath, serverPath) {
+  try {
+    const result = await runPythonJson('launch_profile.py', [modelPath, '--server', serverPath]);
+    launchProfiles.set(modelPath, result);
+    if (!result.estimate.fits) {
+      sendToRenderer('server-log', `Warning: ${path.basename(modelPath)} may not fit in free memory\n`);
+    }
+    return result;
+  } catch (error) {
+    logError(error);
+    launchProfiles.delete(modelPath);
+    return null;
+  }
+}
+
+ipcMain.handle('get-launch-profile', async (event, modelPath) => {
+  if (!modelPathAllowed(modelPath)) {
+    return { success: false, error: 'Invalid model path' };
+  }
+  try {
+    const args = [path.resolve(modelPath)];
+    try {
+      args.push('--server', findLlamaServer());
+    } catch {
+      // Without a build the flash-attention flag style is unknown; the profile still applies
+    }
+    const result = await runPythonJson('launch_profile.py', args);
+    return { success: true, ...result };
+  } catch (error) {
+    return { success: false, error: error.message };
+  }
+});
+
+// overrides: { ctx_size: 16384, mlock: true, ... }; a null value restores the auto-tuned one.
+// Takes effect the next time the model's server starts
+ipcMain.handle('set-launch-overrides', async (event, modelPath, overrides, options = {}) => {
+  if (!modelPathAllowed(modelPath) || !overrides || typeof overrides !== 'object') {
+    return { success: false, error: 'Invalid launch overrides' };
+  }
+  const pairs = Object.entries(overrides).map(([key, value]) => `${key}=${value === null ? '' : value}`);
+  const args = [path.resolve(modelPath), '--set', ...pairs];
+  if (options.reset) {
+    args.push('--reset');
+  }
+  try {
+    const result = await runPythonJson('launch_profile.py', args);
+    return { success: true, ...result };
+  } catch (error) {
+    return { success: false, error: error.message };
+  }
+});
+
+// Load test the endpoint on CONFIG.port with scripts/load_test.py; per-level lines are
+// streamed as 'load-test-progress' and the full report is returned
+let loadTestProcess = null;
+ipcMain.handle('run-load-test', async (event, options = {}) => {
+  if (loadTestProcess) {
+    return { success: false, error: 'A load test is already running' };
+  }
+  const args = [scriptPath('load_test.py'), '--url', `http://127.0.0.1:${CONFIG.port}`];
+  if (Array.isArray(options.concurrency) && options.concurrency.every(n => Number.isInteger(n) && n > 0 && n <= 64)) {
+    args.push('--concurrency', options.concurrency.join(','));
+  }
+  if (Number.isInteger(options.requests) && options.requests > 0) {
+    args.push('--requests', options.requests.toString());
+  }
+  if (Number.isInteger(options.maxTokens) && options.maxTokens > 0) {
+    args.push('--max-tokens', options.maxTokens.toString());
+  }
+  if (typeof options.prompt === 'string' && options.prompt) {
+    args.push('--prompt', options.prompt);
+  }
+
+  return new Promise(resolve => {
+    const child = spawn('python3', args);
+    loadTestProcess = child;
+    let output = '';
+    child.stdout.on('data', data => (output += data.toString()));
+    child.stderr.on('data', data => sendToRenderer('load-test-progress', data.toString()));
+    child.on('error', error => {
+      loadTestProcess = null;
+      resolve({ success: false, error: error.message });
+    });
+    child.on('close', () => {
+      loadTestProcess = null;
       try {
-        await fs.access('/usr/local/cuda/bin/nvcc');
-        args.push('-ngl', '999'); // Use CUDA if available
+        const result = JSON.parse(output.trim().split('\n').pop());
+        resolve(result.error ? { success: false, error: result.error } : { success: true, ...result });
       } catch {
-        // CPU only
+        resolve({ success: false, error: 'Load test failed' });
       }
+    });
+  });
+});
+
+ipcMain.handle('get-python-worker-stats', async () => {
+  try {
+    return { success: true, stats: await pythonWorker.stats() };
+  } catch (error) {
+    return { success: false, error: error.message };
+  }
+});
+
+ipcMain.handle('get-server-pool', async () => {
+  return { success: true, servers: serverPool.status(), limits: serverPoolLimits() };
+});
+
+ipcMain.handle('set-server-pool-limits', async (event, limits) => {
+  if (!limits || typeof limits !== 'object') {
+    return { success: false, error: 'Invalid limits' };
+  }
+  const current = serverPoolLimits();
+  if (Number.isInteger(limits.maxServers) && limits.maxServers >= 1 && limits.maxServers <= 8) {
+    current.maxServers = limits.maxServers;
+  }
+  if (typeof limits.memoryGB === 'number' && limits.memoryGB >= 0) {
+    current.memoryGB = limits.memoryGB;
+  }
+  store.set('serverPool', current);
+  // Applies from the next switch; resident servers are evicted then if over budget
+  serverPool.maxServers = current.maxServers;
+  serverPool.memoryBudget = serverPoolBudget();
+  return { success: true, limits: current };
+});
+
+function sendToRenderer(channel, payload) {
+  if (mainWindow && !mainWindow.isDestroyed()) {
+    try {
+      mainWindow.webContents.send(channel, payload);
+    } catch (e) {
+      // Ignore send errors
     }
+  }
+}
 
-    activeServerProcess = spawn(serverPath, args);
+// Structured progress from scripts/progress.py: one JSON object per line, already
+// throttled. Returns false for ordinary text lines.
+function handleProgressEvent(line, job) {
+  if (!line.startsWith('{')) return false;
+  let event;
+  try {
+    event = JSON.parse(line);
+  } catch {
+    return false;
+  }
+  if (!event || typeof event.event !== 'string') return false;
 
-    activeServerProcess.stdout.on('data', data => {
-      if (mainWindow && !mainWindow.isDestroyed()) {
-        try {
-          mainWindow.webContents.send('server-log', data.toString());
-        } catch (e) {
-          // Ignore send errors
-        }
-      }
-    });
+  // Model placement is not a download: keep it off the download bar
+  if (job.kind === 'placement') {
+    sendToRenderer('placement-progress', event);
+    return true;
+  }
+  sendToRenderer('download-stats', Object.assign({ jobId: job.id, kind: job.kind }, event));
+  if (event.event === 'progress' && typeof event.overall === 'number') {
+    sendToRenderer('download-percentage', Math.floor(event.overall));
+  } else if (event.event === 'stage') {
+    sendToRenderer('download-progress', `Stage: ${event.stage}`);
+    if (event.stage === 'done') {
+      sendToRenderer('download-percentage', 100);
+    }
+  }
+  return true;
+}
 
-    activeServerProcess.stderr.on('data', data => {
-      if (mainWindow && !mainWindow.isDestroyed()) {
-        try {
-          mainWindow.webContents.send('server-log', data.toString());
-        } catch (e) {
-          // Ignore send errors
-        }
-      }
-    });
+// Split stdout chunks into whole lines, route progress events and pass the rest on as text
+function splitJobOutput(job, onText) {
+  let pending = '';
+  return data => {
+    const lines = (pending + data.toString()).split('\n');
+    pending = lines.pop();
+    const text = lines.filter(line => !handleProgressEvent(line, job)).join('\n');
+    if (text.trim()) {
+      onText(text);
+    }
+  };
+}
 
-    activeServerProcess.on('error', error => {
-      logError(error);
+function runHuggingFaceDownload(job) {
+  const downloadProcess = spawnScript(
+    'download_hf.py',
+    [job.args.modelId, CONFIG.modelsDir, CONFIG.defaultQuant].concat(job.args.lowDisk ? ['--low-disk'] : []),
+    jobEnv()
+  );
+
+  const result = new Promise(resolve => {
+    // Track this process
+    activeDownloadProcesses.add(downloadProcess);
+
+    let errorBuffer = '';
+
+    downloadProcess.stdout.on('data', splitJobOutput(job, message => {
       if (mainWindow && !mainWindow.isDestroyed()) {
         try {
-          mainWindow.webContents.send('server-error', error.message);
+          mainWindow.webContents.send('download-progress', message);
         } catch (e) {
           // Ignore send errors
         }
       }
-    });
 
-    activeServerProcess.on('close', code => {
-      if (mainWindow && !mainWindow.isDestroyed()) {
-        try {
-          mainWindow.webContents.send('server-stopped', code);
-        } catch (e) {
-          // Ignore send errors
+      if (message.includes('Error:')) {
+        errorBuffer += message;
+      }
+    }));
+
+    downloadProcess.stderr.on('data', data => {
+      const errorMsg = data.toString();
+      errorBuffer += errorMsg;
+
+      if (
+        errorMsg.includes('Error:') ||
+        errorMsg.includes('Exception:') ||
+        errorMsg.includes('Failed:')
+      ) {
+        const cleanError = errorMsg
+          .replace(/.*Error:\s*/g, '')
+          .replace(/.*Exception:\s*/g, '')
+          .replace(/.*Failed:\s*/g, '')
+          .split('\n')[0]
+          .trim();
+
+        if (cleanError && mainWindow && !mainWindow.isDestroyed()) {
+          try {
+            mainWindow.webContents.send('download-error', cleanError);
+          } catch (e) {
+            // Ignore send errors
+          }
         }
       }
-      activeServerProcess = null;
     });
 
-    // Wait for server to be ready
-    let serverReady = false;
-    const maxAttempts = 30;
-
-    for (let i = 0; i < maxAttempts; i++) {
-      await new Promise(resolve => setTimeout(resolve, 1000));
+    downloadProcess.on('close', async code => {
+      // Remove from tracking
+      activeDownloadProcesses.delete(downloadProcess);
 
-      try {
-        const http = require('http');
-        const testReady = await new Promise(resolve => {
-          const req = http.get(`http://localhost:${CONFIG.port}/v1/models`, res => {
-            let data = '';
-            res.on('data', chunk => (data += chunk));
-            res.on('end', () => {
-              try {
-                const json = JSON.parse(data);
-                resolve(json && (json.object === 'list' || json.data));
-              } catch {
-                resolve(false);
-              }
-            });
-          });
-          req.on('error', () => resolve(false));
-          req.setTimeout(2000, () => {
-            req.destroy();
-            resolve(false);
-          });
-        });
-
-        if (testReady) {
-          serverReady = true;
-          break;
+      if (code === 0) {
+        resolve({ success: true });
+      } else {
+        let errorMessage = `Download failed (exit code ${code})`;
+
+        if (errorBuffer.includes('llama.cpp not found')) {
+          errorMessage =
+            'llama.cpp installation not found. Please ensure llama.cpp is installed at the configured path.';
+        } else if (errorBuffer.includes('No compatible GGUF files')) {
+          errorMessage =
+            'No compatible pre-quantized GGUF files found. The app will download and convert the base model locally.';
+        } else if (errorBuffer.includes('pip install')) {
+          errorMessage =
+            'Python dependencies are missing. Please install: pip install huggingface-hub tqdm';
+        } else if (errorBuffer.includes('No such file or directory')) {
+          errorMessage = 'Script not found. Please ensure the download script exists.';
+        } else if (errorBuffer) {
+          // Include the actual error buffer content for debugging
+          errorMessage = `Download failed: ${errorBuffer.slice(0, 200)}`;
         }
-      } catch {
-        // Keep trying
+
+        resolve({ success: false, error: errorMessage });
       }
-    }
+    });
 
-    if (!serverReady) {
-      throw new Error('Server failed to start. Check the console for error messages.');
-    }
+    downloadProcess.on('error', error => {
+      activeDownloadProcesses.delete(downloadProcess);
+      resolve({ success: false, error: `Failed to start download: ${error.message}` });
+    });
+  });
 
-    return { success: true };
-  } catch (error) {
-    logError(error);
-    return { success: false, error: error.message };
-  }
-});
+  return { child: downloadProcess, result };
+}
 
-ipcMain.handle('download-huggingface', async (event, url) => {
+ipcMain.handle('download-huggingface', async (event, url, options = {}) => {
   try {
     // FIX: Validate URL is a string and is a huggingface.co URL before passing to subprocess
     if (typeof url !== 'string' || url.length > 2000) {
@@ -568,202 +1106,144 @@ ipcMain.handle('download-huggingface', async (event, url) => {
     const cleanUrl = url.split('?')[0];
     const modelId = cleanUrl.replace('https://huggingface.co/', '');
 
-    return new Promise((resolve, reject) => {
-      // In production, scripts are in the resources folder
-      const scriptPath = app.isPackaged
-        ? path.join(process.resourcesPath, 'scripts', 'download_hf.py')
-        : path.join(__dirname, '..', 'scripts', 'download_hf.py');
-
-      const downloadProcess = spawn('python3', [
-        scriptPath,
-        modelId,
-        CONFIG.modelsDir,
-        CONFIG.defaultQuant,
-      ]);
-
-      // Track this process
-      activeDownloadProcesses.add(downloadProcess);
-
-      let errorBuffer = '';
-
-      downloadProcess.stdout.on('data', data => {
-        const message = data.toString();
-        if (mainWindow && !mainWindow.isDestroyed()) {
-          try {
-            mainWindow.webContents.send('download-progress', message);
-          } catch (e) {
-            // Ignore send errors
-          }
-        }
+    // Low-disk mode frees the snapshot and F16 intermediate as soon as they've been used
+    const args = options.lowDisk ? { modelId, lowDisk: true } : { modelId };
+    return jobQueue.submit('huggingface', args, { priority: jobPriority(options) });
+  } catch (error) {
+    logError(error);
+    return { success: false, error: error.message };
+  }
+});
 
-        if (message.includes('Error:')) {
-          errorBuffer += message;
-        }
+function runOllamaDownload(job) {
+  const downloadProcess = spawnScript(
+    'download_ollama.py',
+    [job.args.modelName, CONFIG.modelsDir, CONFIG.defaultQuant],
+    jobEnv()
+  );
 
-        const progressMatch = message.match(/(\d+)%/);
-        if (progressMatch && mainWindow && !mainWindow.isDestroyed()) {
-          try {
-            mainWindow.webContents.send('download-percentage', parseInt(progressMatch[1]));
-          } catch (e) {
-            // Ignore send errors
-          }
+  const result = new Promise(resolve => {
+    // Track this process
+    activeDownloadProcesses.add(downloadProcess);
+
+    let errorBuffer = '';
+
+    downloadProcess.stdout.on('data', splitJobOutput(job, message => {
+      if (mainWindow && !mainWindow.isDestroyed()) {
+        try {
+          mainWindow.webContents.send('download-progress', message);
+        } catch (e) {
+          // Ignore send errors
         }
-      });
+      }
 
-      downloadProcess.stderr.on('data', data => {
-        const errorMsg = data.toString();
-        errorBuffer += errorMsg;
-
-        if (
-          errorMsg.includes('Error:') ||
-          errorMsg.includes('Exception:') ||
-          errorMsg.includes('Failed:')
-        ) {
-          const cleanError = errorMsg
-            .replace(/.*Error:\s*/g, '')
-            .replace(/.*Exception:\s*/g, '')
-            .replace(/.*Failed:\s*/g, '')
-            .split('\n')[0]
-            .trim();
-
-          if (cleanError && mainWindow && !mainWindow.isDestroyed()) {
-            try {
-              mainWindow.webContents.send('download-error', cleanError);
-            } catch (e) {
-              // Ignore send errors
-            }
-          }
+      if (message.includes('Error:')) {
+        errorBuffer += message;
+      }
+    }));
+
+    downloadProcess.stderr.on('data', data => {
+      const errorMsg = data.toString();
+      errorBuffer += errorMsg;
+      if (mainWindow && !mainWindow.isDestroyed()) {
+        try {
+          mainWindow.webContents.send('download-error', errorMsg);
+        } catch (e) {
+          // Ignore send errors
         }
-      });
+      }
+    });
 
-      downloadProcess.on('close', async code => {
-        // Remove from tracking
-        activeDownloadProcesses.delete(downloadProcess);
+    downloadProcess.on('close', async code => {
+      // Remove from tracking
+      activeDownloadProcesses.delete(downloadProcess);
 
-        if (code === 0) {
-          resolve({ success: true });
-        } else {
-          let errorMessage = `Download failed (exit code ${code})`;
-
-          if (errorBuffer.includes('llama.cpp not found')) {
-            errorMessage =
-              'llama.cpp installation not found. Please ensure llama.cpp is installed at the configured path.';
-          } else if (errorBuffer.includes('No compatible GGUF files')) {
-            errorMessage =
-              'No compatible pre-quantized GGUF files found. The app will download and convert the base model locally.';
-          } else if (errorBuffer.includes('pip install')) {
-            errorMessage =
-              'Python dependencies are missing. Please install: pip install huggingface-hub tqdm';
-          } else if (errorBuffer.includes('No such file or directory')) {
-            errorMessage = 'Script not found. Please ensure the download script exists.';
-          } else if (errorBuffer) {
-            // Include the actual error buffer content for debugging
-            errorMessage = `Download failed: ${errorBuffer.slice(0, 200)}`;
-          }
+      if (code === 0) {
+        resolve({ success: true });
+      } else {
+        let errorMessage = `Download failed (exit code ${code})`;
 
-          resolve({ success: false, error: errorMessage });
+        if (errorBuffer.includes('not found')) {
+          errorMessage = `Model '${job.args.modelName}' not found in Ollama registry. Please check the model name.`;
+        } else if (errorBuffer.includes('pip install')) {
+          errorMessage = 'Python dependencies are missing. Please install: pip install requests';
         }
-      });
 
-      downloadProcess.on('error', error => {
-        activeDownloadProcesses.delete(downloadProcess);
-        resolve({ success: false, error: `Failed to start download: ${error.message}` });
-      });
+        resolve({ success: false, error: errorMessage });
+      }
     });
-  } catch (error) {
-    logError(error);
-    return { success: false, error: error.message };
-  }
-});
 
-ipcMain.handle('download-ollama', async (event, modelName) => {
+    downloadProcess.on('error', error => {
+      activeDownloadProcesses.delete(downloadProcess);
+      resolve({ success: false, error: `Failed to start download: ${error.message}` });
+    });
+  });
+
+  return { child: downloadProcess, result };
+}
+
+ipcMain.handle('download-ollama', async (event, modelName, options = {}) => {
   try {
     // FIX: Validate model name to safe characters only — no shell metacharacters
     if (typeof modelName !== 'string' || !/^[a-zA-Z0-9_.:/\-]+$/.test(modelName) || modelName.length > 200) {
       return { success: false, error: 'Invalid model name' };
     }
-    return new Promise((resolve, reject) => {
-      // In production, scripts are in the resources folder
-      const scriptPath = app.isPackaged
-        ? path.join(process.resourcesPath, 'scripts', 'download_ollama.py')
-        : path.join(__dirname, '..', 'scripts', 'download_ollama.py');
-
-      const downloadProcess = spawn('python3', [
-        scriptPath,
-        modelName,
-        CONFIG.modelsDir,
-        CONFIG.defaultQuant,
-      ]);
-
-      // Track this process
-      activeDownloadProcesses.add(downloadProcess);
-
-      let errorBuffer = '';
-
-      downloadProcess.stdout.on('data', data => {
-        const message = data.toString();
-        if (mainWindow && !mainWindow.isDestroyed()) {
-          try {
-            mainWindow.webContents.send('download-progress', message);
-          } catch (e) {
-            // Ignore send errors
-          }
-        }
-
-        if (message.includes('Error:')) {
-          errorBuffer += message;
-        }
-
-        const progressMatch = message.match(/(\d+)%/);
-        if (progressMatch && mainWindow && !mainWindow.isDestroyed()) {
-          try {
-            mainWindow.webContents.send('download-percentage', parseInt(progressMatch[1]));
-          } catch (e) {
-            // Ignore send errors
-          }
-        }
-      });
-
-      downloadProcess.stderr.on('data', data => {
-        const errorMsg = data.toString();
-        errorBuffer += errorMsg;
-        if (mainWindow && !mainWindow.isDestroyed()) {
-          try {
-            mainWindow.webContents.send('download-error', errorMsg);
-          } catch (e) {
-            // Ignore send errors
-          }
-        }
-      });
+    return jobQueue.submit('ollama', { modelName }, { priority: jobPriority(options) });
+  } catch (error) {
+    logError(error);
+    return { success: false, error: error.message };
+  }
+});
 
-      downloadProcess.on('close', async code => {
-        // Remove from tracking
-        activeDownloadProcesses.delete(downloadProcess);
+// Models a local Ollama installation has already pulled; download-ollama imports these without the network
+ipcMain.handle('list-local-ollama-models', async () => {
+  try {
+    const result = await runPythonJson('ollama_local.py', ['list']);
+    return { success: true, ...result };
+  } catch (error) {
+    logError(error);
+    return { success: false, error: error.message };
+  }
+});
 
-        if (code === 0) {
-          resolve({ success: true });
-        } else {
-          let errorMessage = `Download failed (exit code ${code})`;
+ipcMain.handle('list-jobs', async () => {
+  return { success: true, jobs: jobQueue.list(), limits: jobLimits() };
+});
 
-          if (errorBuffer.includes('not found')) {
-            errorMessage = `Model '${modelName}' not found in Ollama registry. Please check the model name.`;
-          } else if (errorBuffer.includes('pip install')) {
-            errorMessage = 'Python dependencies are missing. Please install: pip install requests';
-          }
+ipcMain.handle('cancel-job', async (event, jobId) => {
+  if (typeof jobId !== 'string') {
+    return { success: false, error: 'Invalid job id' };
+  }
+  return jobQueue.cancel(jobId) ? { success: true } : { success: false, error: 'Job not found or already finished' };
+});
 
-          resolve({ success: false, error: errorMessage });
-        }
-      });
+ipcMain.handle('set-job-priority', async (event, jobId, priority) => {
+  if (typeof jobId !== 'string') {
+    return { success: false, error: 'Invalid job id' };
+  }
+  return jobQueue.setPriority(jobId, jobPriority({ priority }))
+    ? { success: true }
+    : { success: false, error: 'Job not found or already finished' };
+});
 
-      downloadProcess.on('error', error => {
-        activeDownloadProcesses.delete(downloadProcess);
-        resolve({ success: false, error: `Failed to start download: ${error.message}` });
-      });
-    });
-  } catch (error) {
-    logError(error);
-    return { success: false, error: error.message };
+ipcMain.handle('set-job-limits', async (event, limits) => {
+  if (!limits || typeof limits !== 'object') {
+    return { success: false, error: 'Invalid limits' };
+  }
+  const current = jobLimits();
+  for (const stage of ['network', 'cpu', 'disk']) {
+    if (Number.isInteger(limits[stage]) && limits[stage] >= 1 && limits[stage] <= 16) {
+      current[stage] = limits[stage];
+    }
   }
+  if (typeof limits.bandwidthMBps === 'number' && limits.bandwidthMBps >= 0) {
+    current.bandwidthMBps = limits.bandwidthMBps;
+  }
+  store.set('jobLimits', current);
+  // Running processes keep the limits they started with; new jobs pick these up
+  jobQueue.maxRunning = maxRunningJobs();
+  jobQueue.pump();
+  return { success: true, limits: current };
 });
 
 ipcMain.handle('open-external', async (event, url) => {
@@ -945,7 +1425,23 @@ ipcMain.handle('delete-model', async (event, modelPath) => {
       return { success: false, error: 'Model path is outside allowed directories' };
     }
     await fs.access(resolvedPath);
-    await fs.unlink(resolvedPath);
+
+    // A split model is deleted as a whole: <name>-00001-of-00004.gguf ... -00004-of-00004.gguf
+    const shardMatch = resolvedPath.match(/^(.*)-(\d{5})-of-(\d{5})\.gguf$/);
+    if (shardMatch) {
+      const count = parseInt(shardMatch[3], 10);
+      for (let i = 1; i <= count; i++) {
+        const shardPath = `${shardMatch[1]}-${String(i).padStart(5, '0')}-of-${shardMatch[3]}.gguf`;
+        await fs.unlink(shardPath).catch(() => {});
+      }
+    } else {
+      await fs.unlink(resolvedPath);
+    }
+
+    // Drop blob-store entries that no model file links to any more
+    const pruneProcess = spawnScript('blob_store.py', ['prune']);
+    pruneProcess.on('error', logError);
+
     return { success: true };
   } catch (error) {
     logError(error);
@@ -962,14 +1458,79 @@ const VALID_QUANT_TYPES = new Set([
   'F16', 'F32',
 ]);
 
-ipcMain.handle('quantize-model', async (event, modelPath, quantization) => {
+function runQuantize(job) {
+  const { modelPath, outputPrefix, quantizations, quantizePath } = job.args;
+
+  // quantize.py takes a CPU slot and fans the targets out over a core/RAM-aware pool
+  const quantizeProcess = spawnScript(
+    'quantize.py',
+    [modelPath, outputPrefix, quantizations.join(','), '--tool', quantizePath],
+    jobEnv()
+  );
+
+  const result = new Promise(resolve => {
+    // Track this process
+    activeDownloadProcesses.add(quantizeProcess);
+
+    let output = '';
+    let errorOutput = '';
+
+    quantizeProcess.stdout.on('data', data => {
+      output += data.toString();
+    });
+
+    quantizeProcess.stderr.on('data', data => {
+      errorOutput += data.toString();
+    });
+
+    quantizeProcess.on('close', async code => {
+      // Remove from tracking
+      activeDownloadProcesses.delete(quantizeProcess);
+
+      // Last stdout line is {"results": [{quantization, output, seconds, size, success, error}]}
+      let results = [];
+      try {
+        results = JSON.parse(output.trim().split('\n').pop()).results || [];
+      } catch {
+        // No summary: the run failed before any target started
+      }
+
+      if (code === 0 && results.length === quantizations.length) {
+        // Optionally delete the original
+        const deleteOriginal = store.get('deleteOriginalAfterQuantize', false);
+        if (deleteOriginal) {
+          await fs.unlink(modelPath);
+        }
+        resolve({ success: true, results });
+      } else {
+        const failed = results.filter(r => !r.success);
+        const errorMsg = failed.length
+          ? failed.map(r => `${r.quantization}: ${r.error}`).join('\n')
+          : errorOutput || output || 'Unknown error';
+        resolve({ success: false, error: `Quantization failed: ${errorMsg}`, results });
+      }
+    });
+
+    quantizeProcess.on('error', error => {
+      activeDownloadProcesses.delete(quantizeProcess);
+      resolve({ success: false, error: `Failed to start quantization: ${error.message}` });
+    });
+  });
+
+  return { child: quantizeProcess, result };
+}
+
+ipcMain.handle('quantize-model', async (event, modelPath, quantization, options = {}) => {
   try {
     // FIX: Validate both inputs before passing to child process
     if (typeof modelPath !== 'string' || !modelPath.endsWith('.gguf')) {
       return { success: false, error: 'Invalid model path' };
     }
-    if (!VALID_QUANT_TYPES.has(quantization)) {
-      return { success: false, error: `Invalid quantization type: ${quantization}` };
+    // One type or an array of types to produce from the same source
+    const quantizations = [...new Set(Array.isArray(quantization) ? quantization : [quantization])];
+    const invalid = quantizations.filter(q => !VALID_QUANT_TYPES.has(q));
+    if (quantizations.length === 0 || invalid.length > 0) {
+      return { success: false, error: `Invalid quantization type: ${invalid.join(', ') || 'none'}` };
     }
     const resolvedModelPath = path.resolve(modelPath);
     const allowedBases = [
@@ -1010,68 +1571,25 @@ ipcMain.handle('quantize-model', async (event, modelPath, quantization) => {
     const modelDir = path.dirname(modelPath);
     const modelName = path.basename(modelPath, '.gguf');
     const cleanName = modelName.replace(/-[QF]\d+_[A-Z0-9_]+$/, '');
-    const outputPath = path.join(modelDir, `${cleanName}-${quantization}.gguf`);
+    const outputPrefix = path.join(modelDir, cleanName);
 
-    try {
-      await fs.access(outputPath);
-      return { success: false, error: `Model with ${quantization} quantization already exists` };
-    } catch {
-      // Good, output doesn't exist
-    }
-
-    return new Promise(resolve => {
-      const args = [modelPath, outputPath, quantization];
-
-      const env = Object.assign({}, process.env);
-      if (process.platform === 'darwin') {
-        env.DYLD_LIBRARY_PATH = path.join(path.dirname(quantizePath), '..');
-      } else if (process.platform === 'linux') {
-        env.LD_LIBRARY_PATH = path.join(path.dirname(quantizePath), '..');
+    const missing = [];
+    for (const q of quantizations) {
+      try {
+        await fs.access(`${outputPrefix}-${q}.gguf`);
+      } catch {
+        missing.push(q);
       }
+    }
+    if (missing.length === 0) {
+      return { success: false, error: `Model with ${quantizations.join(', ')} quantization already exists` };
+    }
 
-      const quantizeProcess = spawn(quantizePath, args, { env });
-
-      // Track this process
-      activeDownloadProcesses.add(quantizeProcess);
-
-      let output = '';
-      let errorOutput = '';
-
-      quantizeProcess.stdout.on('data', data => {
-        output += data.toString();
-      });
-
-      quantizeProcess.stderr.on('data', data => {
-        errorOutput += data.toString();
-      });
-
-      quantizeProcess.on('close', async code => {
-        // Remove from tracking
-        activeDownloadProcesses.delete(quantizeProcess);
-
-        if (code === 0) {
-          try {
-            await fs.access(outputPath);
-            // Optionally delete the original
-            const deleteOriginal = store.get('deleteOriginalAfterQuantize', false);
-            if (deleteOriginal) {
-              await fs.unlink(modelPath);
-            }
-            resolve({ success: true });
-          } catch (error) {
-            resolve({ success: false, error: 'Quantization completed but output file not found' });
-          }
-        } else {
-          const errorMsg = errorOutput || output || 'Unknown error';
-          resolve({ success: false, error: `Quantization failed: ${errorMsg}` });
-        }
-      });
-
-      quantizeProcess.on('error', error => {
-        activeDownloadProcesses.delete(quantizeProcess);
-        resolve({ success: false, error: `Failed to start quantization: ${error.message}` });
-      });
-    });
+    return jobQueue.submit(
+      'quantize',
+      { modelPath, outputPrefix, quantizations: missing, quantizePath },
+      { priority: jobPriority(options) }
+    );
   } catch (error) {
     logError(error);
     return { success: false, error: error.message };
@@ -22,12 +22,31 @@ contextBridge.exposeInMainWorld('electronAPI', {
   getCurrentModel: () => ipcRenderer.invoke('get-current-model'),
   switchModel: modelPath => ipcRenderer.invoke('switch-model', modelPath),
   deleteModel: modelPath => ipcRenderer.invoke('delete-model', modelPath),
-  quantizeModel: (modelPath, quantization) =>
-    ipcRenderer.invoke('quantize-model', modelPath, quantization),
+  // quantization: one type or an array of types built from the same source
+  quantizeModel: (modelPath, quantization, options) =>
+    ipcRenderer.invoke('quantize-model', modelPath, quantization, options),
 
-  // Downloads
-  downloadHuggingFace: url => ipcRenderer.invoke('download-huggingface', url),
-  downloadOllama: modelName => ipcRenderer.invoke('download-ollama', modelName),
+  // Downloads (queued; options.priority orders the queue, higher first)
+  downloadHuggingFace: (url, options) => ipcRenderer.invoke('download-huggingface', url, options),
+  downloadOllama: (modelName, options) => ipcRenderer.invoke('download-ollama', modelName, options),
+  listLocalOllamaModels: () => ipcRenderer.invoke('list-local-ollama-models'),
+
+  // Job queue
+  listJobs: () => ipcRenderer.invoke('list-jobs'),
+  cancelJob: jobId => ipcRenderer.invoke('cancel-job', jobId),
+  setJobPriority: (jobId, priority) => ipcRenderer.invoke('set-job-priority', jobId, priority),
+  setJobLimits: limits => ipcRenderer.invoke('set-job-limits', limits),
+  getPythonWorkerStats: () => ipcRenderer.invoke('get-python-worker-stats'),
+
+  // Warm llama-server pool
+  getServerPool: () => ipcRenderer.invoke('get-server-pool'),
+  setServerPoolLimits: limits => ipcRenderer.invoke('set-server-pool-limits', limits),
+  getLaunchProfile: modelPath => ipcRenderer.invoke('get-launch-profile', modelPath),
+  setLaunchOverrides: (modelPath, overrides, options) =>
+    ipcRenderer.invoke('set-launch-overrides', modelPath, overrides, options),
+  runLoadTest: options => ipcRenderer.invoke('run-load-test', options),
+  // options: { background, statusOnly }; resolves with page-cache residency
+  prefetchModel: (modelPath, options) => ipcRenderer.invoke('prefetch-model', modelPath, options),
 
   // System
   checkDependencies: () => ipcRenderer.invoke('check-dependencies'),
@@ -41,7 +60,13 @@ contextBridge.exposeInMainWorld('electronAPI', {
   onServerStopped: callback => makeListener('server-stopped', callback),
   onDownloadProgress: callback => makeListener('download-progress', callback),
   onDownloadPercentage: callback => makeListener('download-percentage', callback),
+  onDownloadStats: callback => makeListener('download-stats', callback),
   onDownloadError: callback => makeListener('download-error', callback),
+  onModelsChanged: callback => makeListener('models-changed', callback),
+  onJobUpdated: callback => makeListener('job-updated', callback),
+  onModelPrefetched: callback => makeListener('model-prefetched', callback),
+  onPlacementProgress: callback => makeListener('placement-progress', callback),
+  onLoadTestProgress: callback => makeListener('load-test-progress', callback),
   onAppError: callback => makeListener('app-error', callback),
   onServerError: callback => makeListener('server-error', callback),
 });
@@ -0,0 +1,245 @@
+const os = require('os');
+const readline = require('readline');
+const { spawn } = require('child_process');
+const { EventEmitter } = require('events');
+
+const READY_TIMEOUT_MS = 15000;
+const RESTART_BACKOFF_MS = 1000; // Doubles with each crash in a row
+const MAX_RESTART_BACKOFF_MS = 60000;
+const MAX_CRASHES = 5; // In a row; after that jobs keep spawning python3 themselves
+const STABLE_MS = 60000; // Up this long, a worker's exit no longer counts towards MAX_CRASHES
+
+function signalName(code) {
+  return Object.keys(os.constants.signals).find(name => os.constants.signals[name] === code) || 'SIGTERM';
+}
+
+// A script running inside the worker, shaped like a ChildProcess (stdout/stderr 'data',
+// 'close' with code and signal, 'error', kill()) so job runners work with either
+class WorkerProcess extends EventEmitter {
+  constructor(worker, id) {
+    super();
+    this.worker = worker;
+    this.id = id;
+    this.stdout = new EventEmitter();
+    this.stderr = new EventEmitter();
+    this.exitCode = null;
+    this.signalCode = null;
+    this.killed = false;
+    this.finished = false;
+  }
+
+  kill(signal = 'SIGTERM') {
+    if (this.finished) {
+      return false;
+    }
+    this.killed = true;
+    this.worker.call('cancel', { id: this.id, signal }).catch(() => {});
+    return true;
+  }
+
+  exit(code, signal) {
+    if (this.finished) {
+      return;
+    }
+    this.finished = true;
+    this.exitCode = code;
+    this.signalCode = signal;
+    this.emit('exit', code, signal);
+    this.emit('close', code, signal);
+  }
+}
+
+/**
+ * Resident scripts/worker.py driven over JSON-RPC on stdio.
+ *
+ * The worker imports the download/quantize modules and resolves the llama.cpp toolchain
+ * once; each run() forks a child inside it instead of starting a new interpreter.
+ * `available` is false until the worker is ready, and stays false where it can't fork
+ * (Windows), so callers fall back to spawning the script directly.
+ */
+class PythonWorker {
+  constructor({ python = 'python3', script }) {
+    this.python = python;
+    this.script = script;
+    this.proc = null;
+    this.ready = null;
+    this.available = false;
+    this.info = null;
+    this.coldStartMs = null;
+    this.startedAt = 0;
+    this.crashes = 0;
+    this.restartAt = 0;
+    this.closed = false;
+    this.unsupported = false; // Worker reported it can't fork: never restarted
+    this.nextId = 1;
+    this.pending = new Map(); // request id -> { resolve, reject }
+    this.processes = new Map(); // run request id -> WorkerProcess
+  }
+
+  // Start the worker (once); resolves with its startup report, or null if it is unusable
+  start() {
+    if (this.ready) {
+      return this.ready;
+    }
+    const started = Date.now();
+    const proc = spawn(this.python, [this.script], { stdio: ['pipe', 'pipe', 'pipe'] });
+    this.proc = proc;
+    this.startedAt = started;
+
+    this.ready = new Promise(resolve => {
+      const timer = setTimeout(() => resolve(null), READY_TIMEOUT_MS);
+      this.onReady = params => {
+        clearTimeout(timer);
+        this.coldStartMs = Date.now() - started;
+        this.info = params;
+        this.available = Boolean(params.fork);
+        if (params.fork === false) {
+          this.unsupported = true; // It exits right after this on purpose
+        }
+        resolve({ coldStartMs: this.coldStartMs, ...params });
+      };
+      proc.on('error', () => {
+        clearTimeout(timer);
+        resolve(null);
+      });
+    });
+
+    readline.createInterface({ input: proc.stdout }).on('line', line => this.handle(line));
+    proc.stderr.on('data', data => console.error(`[python-worker] ${data.toString().trimEnd()}`));
+    proc.on('close', () => {
+      if (this.proc === proc && !this.unsupported) {
+        this.crashed();
+      }
+      this.stopped(proc);
+    });
+    return this.ready;
+  }
+
+  // Start a worker that exited, unless it is backing off after a crash, gave up or can't fork
+  // here; doesn't wait
+  restart() {
+    if (
+      this.proc ||
+      this.closed ||
+      this.unsupported ||
+      this.crashes >= MAX_CRASHES ||
+      Date.now() < this.restartAt
+    ) {
+      return;
+    }
+    this.start().catch(() => {});
+  }
+
+  crashed() {
+    this.crashes = Date.now() - this.startedAt >= STABLE_MS ? 1 : this.crashes + 1;
+    const backoff = Math.min(RESTART_BACKOFF_MS * 2 ** (this.crashes - 1), MAX_RESTART_BACKOFF_MS);
+    this.restartAt = Date.now() + backoff;
+    console.error(
+      this.crashes >= MAX_CRASHES
+        ? `[python-worker] exited ${this.crashes} times in a row, running scripts directly`
+        : `[python-worker] exited, restarting on the next job after ${backoff} ms`
+    );
+  }
+
+  handle(line) {
+    let message;
+    try {
+      message = JSON.parse(line);
+    } catch {
+      return;
+    }
+    if (message.method === 'ready') {
+      this.onReady(message.params);
+    } else if (message.method === 'output') {
+      const child = this.processes.get(message.params.id);
+      if (child) {
+        child[message.params.stream].emit('data', Buffer.from(message.params.data));
+      }
+    } else if (message.id !== undefined && this.pending.has(message.id)) {
+      const { resolve, reject } = this.pending.get(message.id);
+      this.pending.delete(message.id);
+      if (message.error) {
+        reject(new Error(message.error.message));
+      } else {
+        resolve(message.result);
+      }
+    }
+  }
+
+  call(method, params = {}) {
+    if (!this.proc || !this.proc.stdin.writable) {
+      return Promise.reject(new Error('Python worker is not running'));
+    }
+    const id = this.nextId++;
+    return new Promise((resolve, reject) => {
+      this.pending.set(id, { resolve, reject });
+      this.proc.stdin.write(JSON.stringify({ jsonrpc: '2.0', id, method, params }) + '\n');
+    });
+  }
+
+  // Run scripts/<script> with args; env holds only variables that differ from the app's
+  run(script, args, env = {}) {
+    const id = this.nextId++;
+    const child = new WorkerProcess(this, id);
+    this.processes.set(id, child);
+    this.pending.set(id, {
+      resolve: result => {
+        this.processes.delete(id);
+        const code = result.exit_code;
+        child.exit(code >= 0 ? code : null, code >= 0 ? null : signalName(-code));
+      },
+      reject: error => {
+        this.processes.delete(id);
+        child.emit('error', error);
+        child.exit(null, 'SIGKILL');
+      },
+    });
+    this.proc.stdin.write(
+      JSON.stringify({ jsonrpc: '2.0', id, method: 'run', params: { script, args, env } }) + '\n'
+    );
+    return child;
+  }
+
+  async stats() {
+    if (!this.available) {
+      return { available: false };
+    }
+    return { available: true, coldStartMs: this.coldStartMs, ...(await this.call('stats')) };
+  }
+
+  // The worker exited: fail whatever was in flight; the next restart() launches a new one
+  stopped(proc) {
+    if (this.proc !== proc) {
+      return;
+    }
+    this.proc = null;
+    this.ready = null;
+    this.available = false;
+    for (const { reject } of this.pending.values()) {
+      reject(new Error('Python worker exited'));
+    }
+    this.pending.clear();
+    for (const child of this.processes.values()) {
+      child.exit(null, 'SIGKILL');
+    }
+    this.processes.clear();
+  }
+
+  // Stops the worker for good; it terminates the jobs it is still running
+  shutdown() {
+    this.closed = true;
+    const proc = this.proc;
+    if (!proc) {
+      return;
+    }
+    this.stopped(proc);
+    try {
+      proc.stdin.end();
+      proc.kill('SIGTERM');
+    } catch {
+      // Already gone
+    }
+  }
+}
+
+module.exports = { PythonWorker };
@@ -49,6 +49,13 @@ document.addEventListener('DOMContentLoaded', async () => {
     });
     listenerCleanups.push(cleanPercentage);
 
+    const cleanDownloadStats = window.electronAPI.onDownloadStats(event => {
+      if (!isShuttingDown && event.event === 'progress' && event.total) {
+        updateLoadingText(formatDownloadStats(event));
+      }
+    });
+    listenerCleanups.push(cleanDownloadStats);
+
     const cleanDownloadError = window.electronAPI.onDownloadError(error => {
       if (!isShuttingDown) {
         hideLoading();
@@ -57,6 +64,14 @@ document.addEventListener('DOMContentLoaded', async () => {
     });
     listenerCleanups.push(cleanDownloadError);
 
+    // Model directories changed on disk (download finished, file removed, ...)
+    const cleanModelsChanged = window.electronAPI.onModelsChanged(() => {
+      if (!isShuttingDown) {
+        refreshModels();
+      }
+    });
+    listenerCleanups.push(cleanModelsChanged);
+
     const cleanAppError = window.electronAPI.onAppError && window.electronAPI.onAppError(msg => {
       console.error('App error from main process:', msg);
     });
@@ -1176,6 +1191,31 @@ function updateLoadingText(text) {
   if (loadingSubtext) loadingSubtext.textContent = text;
 }
 
+function formatBytes(bytes) {
+  const units = ['B', 'KB', 'MB', 'GB', 'TB'];
+  let value = bytes;
+  let unit = 0;
+  while (value >= 1024 && unit < units.length - 1) {
+    value /= 1024;
+    unit++;
+  }
+  return `${value.toFixed(1)} ${units[unit]}`;
+}
+
+// e.g. "Downloading model.gguf — 1.2 GB / 4.1 GB · 85.3 MB/s · 0:35 left"
+function formatDownloadStats(event) {
+  const parts = [`${formatBytes(event.done)} / ${formatBytes(event.total)}`];
+  if (event.rate) parts.push(`${formatBytes(event.rate)}/s`);
+  if (event.eta !== null && event.eta !== undefined) {
+    const minutes = Math.floor(event.eta / 60);
+    const seconds = String(Math.floor(event.eta % 60)).padStart(2, '0');
+    parts.push(`${minutes}:${seconds} left`);
+  }
+  if (event.digest === 'verified') parts.push('verified');
+  const label = event.file ? `Downloading ${event.file}` : 'Downloading';
+  return `${label} — ${parts.join(' · ')}`;
+}
+
 function updateProgress(percentage) {
   const progressBar = document.getElementById('progressBar');
   if (progressBar) progressBar.style.width = percentage + '%';
@@ -0,0 +1,355 @@
+const fs = require('fs');
+const net = require('net');
+const http = require('http');
+const path = require('path');
+
+// Per-server overhead on top of the weights (compute buffers, KV cache at -c 8192) when
+// no memory estimate is available
+const SERVER_OVERHEAD = 1024 * 1024 * 1024;
+const READY_POLL_MS = [50, 100, 200, 300, 500];
+const READY_TIMEOUT_MS = 120000;
+const KILL_GRACE_MS = 3000;
+
+// Every file of a split GGUF (<name>-00001-of-0000N.gguf ...), or just modelPath; the
+// same naming rule as scripts/gguf_split.py shard_paths
+function shardPaths(modelPath) {
+  const match = path.basename(modelPath).match(/^(.*)-\d{5}-of-(\d{5})\.gguf$/);
+  if (!match) {
+    return [modelPath];
+  }
+  const paths = [];
+  for (let i = 1; i <= parseInt(match[2], 10); i++) {
+    paths.push(path.join(path.dirname(modelPath), `${match[1]}-${String(i).padStart(5, '0')}-of-${match[2]}.gguf`));
+  }
+  return paths;
+}
+
+// Weights of a model, counting every shard of a split GGUF
+function modelBytes(modelPath) {
+  const shards = shardPaths(modelPath);
+  if (shards.length === 1) {
+    return fs.statSync(modelPath).size;
+  }
+  let total = 0;
+  for (const shard of shards) {
+    try {
+      total += fs.statSync(shard).size;
+    } catch {
+      // Missing shard: llama-server will report it
+    }
+  }
+  return total;
+}
+
+function findFreePort(startPort, taken) {
+  return new Promise((resolve, reject) => {
+    const tryPort = port => {
+      if (port > 65535) {
+        reject(new Error('No free port for llama-server'));
+        return;
+      }
+      if (taken.has(port)) {
+        tryPort(port + 1);
+        return;
+      }
+      const probe = net.createServer();
+      probe.once('error', () => tryPort(port + 1));
+      probe.listen(port, '127.0.0.1', () => probe.close(() => resolve(port)));
+    };
+    tryPort(startPort);
+  });
+}
+
+function probeReady(port) {
+  return new Promise(resolve => {
+    const req = http.get(`http://127.0.0.1:${port}/v1/models`, res => {
+      let data = '';
+      res.on('data', chunk => (data += chunk));
+      res.on('end', () => {
+        try {
+          const json = JSON.parse(data);
+          resolve(res.statusCode === 200 && Boolean(json && (json.object === 'list' || json.data)));
+        } catch {
+          resolve(false);
+        }
+      });
+    });
+    req.on('error', () => resolve(false));
+    req.setTimeout(2000, () => {
+      req.destroy();
+      resolve(false);
+    });
+  });
+}
+
+/**
+ * Warm pool of llama-server processes behind one HTTP proxy.
+ *
+ * Each model gets its own llama-server on a private loopback port; the proxy listens on
+ * the configured port and forwards every request to the active one. Switching to a
+ * model that is still resident only repoints the proxy. Servers are evicted least
+ * recently used first when the pool would exceed `maxServers` or its memory budget.
+ * `spawnServer(modelPath, port)` returns the child process; `memoryEstimate(modelPath)`
+ * may return the bytes a server will use (weights, KV cache and buffers).
+ */
+class ServerPool {
+  constructor({
+    port,
+    host = '0.0.0.0',
+    spawnServer,
+    memoryEstimate = null,
+    maxServers = 3,
+    memoryBudget = 0,
+    onStopped = null,
+  }) {
+    this.port = port;
+    this.host = host;
+    this.spawnServer = spawnServer;
+    this.memoryEstimate = memoryEstimate;
+    this.maxServers = maxServers;
+    this.memoryBudget = memoryBudget;
+    this.onStopped = onStopped;
+    this.servers = new Map(); // model path -> { modelPath, port, child, bytes, ready, lastUsed }
+    this.active = null;
+    this.proxy = null;
+    this.agent = new http.Agent({ keepAlive: true });
+  }
+
+  // Start forwarding CONFIG.port; fails if another process already serves it
+  listen() {
+    if (this.proxy) {
+      return Promise.resolve();
+    }
+    return new Promise((resolve, reject) => {
+      const proxy = http.createServer((req, res) => this.forward(req, res));
+      proxy.once('error', error => {
+        this.proxy = null;
+        reject(
+          error.code === 'EADDRINUSE'
+            ? new Error(`Port ${this.port} is already in use by another process`)
+            : error
+        );
+      });
+      proxy.listen(this.port, this.host, () => {
+        proxy.removeAllListeners('error');
+        proxy.on('error', () => {
+          // Per-connection errors; keep listening
+        });
+        resolve();
+      });
+      this.proxy = proxy;
+    });
+  }
+
+  // Route each request (not each connection) to the model active when it arrives, so
+  // keep-alive clients follow a switch; responses, including SSE streams, are piped through
+  forward(req, res) {
+    const server = this.active && this.servers.get(this.active);
+    if (!server || !server.ready) {
+      res.writeHead(503, { 'Content-Type': 'application/json' });
+      res.end(JSON.stringify({ error: { message: 'No model loaded', type: 'unavailable_error' } }));
+      return;
+    }
+    server.lastUsed = Date.now();
+    const upstream = http.request(
+      {
+        host: '127.0.0.1',
+        port: server.port,
+        method: req.method,
+        path: req.url,
+        headers: req.headers,
+        agent: this.agent,
+      },
+      upstreamRes => {
+        res.writeHead(upstreamRes.statusCode, upstreamRes.headers);
+        upstreamRes.pipe(res);
+      }
+    );
+    upstream.on('error', () => {
+      if (!res.headersSent) {
+        res.writeHead(502, { 'Content-Type': 'application/json' });
+        res.end(JSON.stringify({ error: { message: 'Model server unavailable', type: 'server_error' } }));
+      } else {
+        res.destroy();
+      }
+    });
+    // A client that disconnects mid-generation stops the generation too
+    res.on('close', () => {
+      if (!res.writableFinished) {
+        upstream.destroy();
+      }
+    });
+    req.pipe(upstream);
+  }
+
+  // Switch the proxy to modelPath, starting its server if it isn't resident
+  async activate(modelPath) {
+    const started = Date.now();
+    await this.listen();
+
+    let server = this.servers.get(modelPath);
+    const warm = Boolean(server);
+    if (!server) {
+      const bytes = this.estimate(modelPath);
+      this.makeRoom(bytes);
+      const taken = new Set([this.port, ...Array.from(this.servers.values(), s => s.port)]);
+      const port = await findFreePort(this.port + 1, taken);
+      server = { modelPath, port, bytes, child: null, ready: false, lastUsed: Date.now() };
+      this.servers.set(modelPath, server);
+      try {
+        server.child = this.spawnServer(modelPath, port);
+        this.watch(server);
+        await this.waitReady(server);
+      } catch (error) {
+        this.evict(server);
+        throw error;
+      }
+    } else if (!server.ready) {
+      await this.waitReady(server);
+    }
+
+    this.active = modelPath;
+    server.lastUsed = Date.now();
+    return { warm, ms: Date.now() - started, port: server.port };
+  }
+
+  watch(server) {
+    server.exited = new Promise(resolve => {
+      server.child.on('error', error => resolve(error.message));
+      server.child.on('close', code => {
+        if (this.servers.get(server.modelPath) === server) {
+          this.servers.delete(server.modelPath);
+        }
+        if (this.active === server.modelPath) {
+          this.active = null;
+          if (this.onStopped) {
+            this.onStopped(code, server.modelPath);
+          }
+        }
+        resolve(`llama-server exited with code ${code}`);
+      });
+    });
+  }
+
+  // Poll quickly at first (small models load in well under a second), then back off
+  async waitReady(server) {
+    const deadline = Date.now() + READY_TIMEOUT_MS;
+    let exitReason = null;
+    server.exited.then(reason => (exitReason = reason));
+    for (let attempt = 0; Date.now() < deadline; attempt++) {
+      if (exitReason) {
+        throw new Error(`Server failed to start: ${exitReason}`);
+      }
+      if (await probeReady(server.port)) {
+        server.ready = true;
+        return;
+      }
+      const delay = READY_POLL_MS[Math.min(attempt, READY_POLL_MS.length - 1)];
+      await new Promise(resolve => setTimeout(resolve, delay));
+    }
+    throw new Error('Server failed to start. Check the console for error messages.');
+  }
+
+  // Bytes a server for modelPath is expected to use
+  estimate(modelPath) {
+    return (this.memoryEstimate && this.memoryEstimate(modelPath)) || modelBytes(modelPath) + SERVER_OVERHEAD;
+  }
+
+  // Evict ahead of activate() until a server of `bytes` fits, and wait for the evicted ones to
+  // exit, so whatever is sized against free memory next sees the memory they held
+  async reserve(bytes) {
+    const evicted = this.makeRoom(bytes);
+    await Promise.all(evicted.map(server => server.exited));
+  }
+
+  // Evict least recently used servers until `bytes` more fits the count and memory budget;
+  // servers still starting are left alone, as another activate() is waiting on them
+  makeRoom(bytes) {
+    const overBudget = () => {
+      const used = Array.from(this.servers.values()).reduce((sum, s) => sum + s.bytes, 0);
+      return (
+        this.servers.size >= this.maxServers ||
+        (this.memoryBudget > 0 && used + bytes > this.memoryBudget)
+      );
+    };
+    const byAge = Array.from(this.servers.values())
+      .filter(server => server.ready)
+      .sort((a, b) => a.lastUsed - b.lastUsed);
+    const evicted = [];
+    for (const server of byAge) {
+      if (!overBudget()) {
+        break;
+      }
+      this.evict(server);
+      evicted.push(server);
+    }
+    return evicted;
+  }
+
+  evict(server) {
+    this.servers.delete(server.modelPath);
+    if (this.active === server.modelPath) {
+      this.active = null;
+    }
+    const child = server.child;
+    if (child && child.exitCode === null && !child.killed) {
+      try {
+        child.kill('SIGTERM');
+        setTimeout(() => {
+          if (child.exitCode === null) {
+            child.kill('SIGKILL');
+          }
+        }, KILL_GRACE_MS).unref();
+      } catch {
+        // Already gone
+      }
+    }
+  }
+
+  // Stop one model's server, or the active one
+  stop(modelPath = this.active) {
+    const server = modelPath && this.servers.get(modelPath);
+    if (server) {
+      this.evict(server);
+    }
+  }
+
+  has(modelPath) {
+    return this.servers.has(modelPath);
+  }
+
+  activeModel() {
+    return this.active;
+  }
+
+  status() {
+    return Array.from(this.servers.values()).map(server => ({
+      model: server.modelPath,
+      port: server.port,
+      active: server.modelPath === this.active,
+      ready: server.ready,
+      bytes: server.bytes,
+      lastUsed: server.lastUsed,
+    }));
+  }
+
+  // Stop every server and release CONFIG.port; the pool can listen again on the next activate()
+  close() {
+    for (const server of Array.from(this.servers.values())) {
+      this.evict(server);
+    }
+    if (this.proxy) {
+      this.proxy.close();
+      this.proxy.closeAllConnections();
+      this.proxy = null;
+    }
+  }
+
+  // For app exit: close() and drop the keep-alive agent for good
+  shutdown() {
+    this.close();
+    this.agent.destroy();
+  }
+}
+
+module.exports = { ServerPool, modelBytes, shardPaths };